@@ -0,0 +1,22 @@
+import os
+import sys
+
+
+def main():
+    """Entry point of the `dev` script
+
+    Completions of parameter paths are answered before the CLI (and typer, rich and boto3) is imported.
+    """
+    from cli.completion import COMPLETE_VAR, complete
+
+    if os.environ.get(COMPLETE_VAR):
+        code = complete()
+        if code is not None:
+            sys.exit(code)
+    from cli.main import app
+
+    app(prog_name="dev")
+
+
+if __name__ == "__main__":
+    main()
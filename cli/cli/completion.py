@@ -0,0 +1,210 @@
+# Only the standard library is imported here: typer, rich and boto3 take most of the time a completion would
+# otherwise take to import
+import mmap
+import os
+import shlex
+import sys
+import time
+from pathlib import PosixPath
+from typing import Iterable, Optional
+
+from cli.services import cache_service
+from cli.services.cache_service import cache_path, write_bytes_atomic
+
+COMPLETE_VAR = "_DEV_COMPLETE"
+PREFIX_INDEX_SUFFIX = ".txt"
+# Sorts before every parameter name, which all start with "/"
+PREFIX_INDEX_HEADER = b"# stale-after "
+# A background refresh isn't started again for this long
+BACKGROUND_REFRESH_INTERVAL_SECONDS = 600
+# Flags that can come between `dev params request` and the path being completed
+PATH_ARGUMENT_FLAGS = {"--encrypt", "--no-encrypt", "-e"}
+
+
+def prefix_index_path(env: str) -> PosixPath:
+    return cache_service.CACHE_DIR_PATH / f"ssm-names-{env}{PREFIX_INDEX_SUFFIX}"
+
+
+def write_prefix_index(env: str, names: Iterable[str], stale_after: float):
+    """Saves `names` as a sorted, newline separated file that completions binary search through a memory map
+
+    Completions refresh the file in the background once it's past `stale_after` (epoch seconds).
+    """
+    lines = sorted(name.encode("utf-8") for name in names)
+    data = b"%s%d\n%s" % (
+        PREFIX_INDEX_HEADER,
+        stale_after,
+        b"".join(line + b"\n" for line in lines),
+    )
+    write_bytes_atomic(cache_path(prefix_index_path(env).name), data)
+
+
+def indexed_envs() -> list[str]:
+    prefix, suffix = "ssm-names-", PREFIX_INDEX_SUFFIX
+    try:
+        files = os.listdir(cache_service.CACHE_DIR_PATH)
+    except OSError:
+        return []
+    return sorted(
+        name.removeprefix(prefix).removesuffix(suffix)
+        for name in files
+        if name.startswith(prefix) and name.endswith(suffix)
+    )
+
+
+def lower_bound(index: mmap.mmap, key: bytes, lo: int = 0) -> int:
+    """Offset of the first line of `index`, from the line starting at `lo`, that sorts at or after `key`"""
+    hi = len(index)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        start = index.rfind(b"\n", lo, mid) + 1 or lo
+        end = index.find(b"\n", start)
+        if end == -1:
+            end = len(index)
+        if index[start:end] < key:
+            lo = end + 1
+        else:
+            hi = start
+    return lo
+
+
+def next_sibling(prefix: bytes) -> bytes:
+    """The smallest key after every name that starts with `prefix`, which ends with "/" """
+    return prefix[:-1] + b"0"
+
+
+def complete_in_index(index: mmap.mmap, incomplete: str) -> list[str]:
+    """Names in `index` that start with `incomplete`, up to the next "/" after it
+
+    e.g., `/qa/se` completes to `/qa/service/` and `/qa/secret`. Each "directory" costs one binary search, so the
+    number of names under it doesn't matter.
+    """
+    key = incomplete.encode("utf-8")
+    completions = []
+    pos = lower_bound(index, key)
+    while pos < len(index):
+        end = index.find(b"\n", pos)
+        if end == -1:
+            end = len(index)
+        line = index[pos:end]
+        if not line.startswith(key):
+            break
+        slash = line.find(b"/", len(key))
+        if slash == -1:
+            completions.append(line.decode("utf-8"))
+            pos = end + 1
+        else:
+            directory = line[: slash + 1]
+            completions.append(directory.decode("utf-8"))
+            pos = lower_bound(index, next_sibling(directory), end + 1)
+    return completions
+
+
+def refresh_in_background(env: str):
+    """Starts `dev params refresh-index` for `env` in its own session, unless one was started recently"""
+    marker = cache_path(f"ssm-names-{env}.refreshing")
+    try:
+        if time.time() - marker.stat().st_mtime < BACKGROUND_REFRESH_INTERVAL_SECONDS:
+            return
+    except FileNotFoundError:
+        pass
+    marker.touch()
+    import subprocess
+
+    environment = {k: v for k, v in os.environ.items() if k != COMPLETE_VAR}
+    subprocess.Popen(
+        [sys.executable, "-m", "cli", "params", "refresh-index", "--env", env],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+        env=environment,
+    )
+
+
+def complete_parameter_path(incomplete: str) -> list[str]:
+    """Parameter paths that start with `incomplete`, from the prefix index of its env
+
+    A stale index is still used, and refreshed in the background.
+    """
+    env, separator, _rest = incomplete.lstrip("/").partition("/")
+    if not incomplete.startswith("/") or not separator:
+        return [
+            f"/{indexed}/"
+            for indexed in indexed_envs()
+            if f"/{indexed}/".startswith(incomplete or "/")
+        ]
+    try:
+        with prefix_index_path(env).open("rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as index:
+            header = index[: index.find(b"\n")]
+            completions = complete_in_index(index, incomplete)
+    except (OSError, ValueError):
+        # Missing or empty
+        return []
+    if header.startswith(PREFIX_INDEX_HEADER):
+        if time.time() > int(header.removeprefix(PREFIX_INDEX_HEADER)):
+            refresh_in_background(env)
+    return completions
+
+
+def completion_args(shell: str) -> Optional[tuple[list[str], str]]:
+    """The words before the one being completed and the (incomplete) word being completed, as typer's completion
+    scripts for `shell` pass them"""
+    try:
+        if shell == "bash":
+            words = shlex.split(os.environ.get("COMP_WORDS", ""))
+            cword = int(os.environ.get("COMP_CWORD", ""))
+            return words[1:cword], words[cword] if cword < len(words) else ""
+        if shell in ("zsh", "fish"):
+            line = os.environ.get("_TYPER_COMPLETE_ARGS", "")
+            words = shlex.split(line)[1:]
+            if words and not line.endswith(" "):
+                return words[:-1], words[-1]
+            return words, ""
+    except ValueError:
+        pass
+    return None
+
+
+def is_path_argument(args: list[str]) -> bool:
+    return args[:2] == ["params", "request"] and all(
+        arg in PATH_ARGUMENT_FLAGS for arg in args[2:]
+    )
+
+
+def format_completions(shell: str, completions: list[str]) -> tuple[str, int]:
+    """Output and exit code for `shell`, in the same format as typer's completion classes"""
+    if shell == "zsh":
+        if not completions:
+            return "_files", 0
+        items = "\n".join(
+            '"{}"'.format(
+                c.replace('"', '""')
+                .replace("'", "''")
+                .replace("$", "\\$")
+                .replace("`", "\\`")
+            )
+            for c in completions
+        )
+        return f"_arguments '*: :(({items}))'", 0
+    if shell == "fish" and os.environ.get("_TYPER_COMPLETE_FISH_ACTION") == "is-args":
+        return "", 0 if completions else 1
+    return "\n".join(completions), 0
+
+
+def complete() -> Optional[int]:
+    """Prints completions for `dev params request PATH` and returns the exit code, or returns `None` if typer needs to
+    handle the completion"""
+    shell = os.environ.get(COMPLETE_VAR, "").partition("_")[2]
+    parsed = completion_args(shell)
+    if parsed is None:
+        return None
+    args, incomplete = parsed
+    if not is_path_argument(args) or incomplete.startswith("-"):
+        return None
+    output, code = format_completions(shell, complete_parameter_path(incomplete))
+    if output:
+        print(output)
+    return code
@@ -41,6 +41,8 @@ AWS_GOOGLE_CONFIG_ROLE_PREFIX = "role/"
 
 ENVIRONMENTS = list(ENV_TO_AWS_ACCOUNT.keys())
 
+STAGE_ON_PROD_ACCOUNT = True
+
 ROLE_PRIORITY = [
     ["Administrator"],
     ["SRE", "DevOps"],
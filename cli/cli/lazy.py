@@ -0,0 +1,71 @@
+from contextlib import contextmanager
+from importlib import import_module
+from typing import NamedTuple, Optional
+
+import click
+import typer
+from typer.core import TyperGroup
+
+
+class LazySubcommand(NamedTuple):
+    """A typer sub-app that is only imported when its name is on the command line
+
+    `import_path` is in the form `module.path:attribute`, e.g., `cli.sso:app`
+    """
+
+    import_path: str
+    help: str
+
+
+class LazyTyperGroup(TyperGroup):
+    lazy_subcommands: dict[str, LazySubcommand] = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._listing_only = False
+
+    def list_commands(self, ctx: click.Context):
+        return sorted({*super().list_commands(ctx), *self.lazy_subcommands})
+
+    def get_command(self, ctx: click.Context, cmd_name: str):
+        if cmd_name in self.commands or cmd_name not in self.lazy_subcommands:
+            return super().get_command(ctx, cmd_name)
+        if self._listing_only:
+            return click.Command(
+                name=cmd_name, help=self.lazy_subcommands[cmd_name].help
+            )
+        return self._load(cmd_name)
+
+    def format_help(self, ctx: click.Context, formatter: click.HelpFormatter):
+        with self._listing():
+            return super().format_help(ctx, formatter)
+
+    @contextmanager
+    def _listing(self):
+        """Listing subcommands for help output only needs names and help text, not the sub-apps themselves"""
+        self._listing_only = True
+        try:
+            yield
+        finally:
+            self._listing_only = False
+
+    def _load(self, cmd_name: str) -> click.Command:
+        subcommand = self.lazy_subcommands[cmd_name]
+        module_path, _, attribute = subcommand.import_path.partition(":")
+        sub_app: typer.Typer = getattr(import_module(module_path), attribute)
+        group = typer.main.get_group(sub_app)
+        group.name = cmd_name
+        group.help = group.help or subcommand.help
+        self.add_command(group, cmd_name)
+        return group
+
+
+def lazy_group(
+    subcommands: dict[str, LazySubcommand], name: Optional[str] = None
+) -> type[LazyTyperGroup]:
+    """Makes a group class for `typer.Typer(cls=...)` that resolves `subcommands` on demand"""
+    return type(
+        name or LazyTyperGroup.__name__,
+        (LazyTyperGroup,),
+        {"lazy_subcommands": subcommands},
+    )
@@ -2,16 +2,22 @@ from logging import INFO, getLogger
 
 import typer
 
-from cli.parameter_store import app as param_store
-from cli.sso import app as sso
+from cli.lazy import LazySubcommand, lazy_group
 
 logger = getLogger()
 logger.setLevel(INFO)
 
-app = typer.Typer()
-app.add_typer(
-    param_store,
-    name="params",
-    help="Request changes to parameter store values or review requests",
-)
-app.add_typer(sso, name="sso", help="Manage your aws credentials")
+SUBCOMMANDS = {
+    "params": LazySubcommand(
+        "cli.parameter_store:app",
+        help="Request changes to parameter store values or review requests",
+    ),
+    "sso": LazySubcommand("cli.sso:app", help="Manage your aws credentials"),
+}
+
+app = typer.Typer(cls=lazy_group(SUBCOMMANDS, name="DevCommandGroup"))
+
+
+@app.callback()
+def main():
+    pass
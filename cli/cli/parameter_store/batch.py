@@ -0,0 +1,241 @@
+import csv
+import json
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from itertools import chain
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Optional, TextIO
+
+from botocore.exceptions import ClientError
+
+from cli.parameter_store.actions import make_request
+from cli.parameter_store.constants import MAX_UPLOAD_WORKERS, SSM_GET_PARAMETERS_MAX
+from cli.parameter_store.exceptions import (
+    DevCliException,
+    InsufficientPermissionException,
+    InvalidRequestRowError,
+    Permissions,
+)
+from cli.parameter_store.requests_client import RequestsClient as rq
+from cli.parameter_store.utils import get_env, transform_client_error
+from cli.parameter_store.validate import validate_param_name, validate_params_exist
+
+TRUE_VALUES = {"true", "yes", "y", "1"}
+FALSE_VALUES = {"false", "no", "n", "0"}
+
+
+class BatchFormat(str, Enum):
+    YAML = "yaml"
+    CSV = "csv"
+    JSONL = "jsonl"
+
+
+FORMAT_BY_SUFFIX = {
+    ".yaml": BatchFormat.YAML,
+    ".yml": BatchFormat.YAML,
+    ".csv": BatchFormat.CSV,
+    ".jsonl": BatchFormat.JSONL,
+    ".ndjson": BatchFormat.JSONL,
+}
+
+
+class BatchRow(NamedTuple):
+    number: int
+    path: str
+    value: str
+    encrypt: bool
+    note: Optional[tuple[str, str]]
+
+
+class RowOutcome(NamedTuple):
+    number: int
+    path: str
+    request_id: Optional[str] = None
+    key: Optional[str] = None
+    error: Optional[str] = None
+
+
+def sniff_format(first_line: str) -> BatchFormat:
+    """Best guess at the format of input without a file name (i.e., stdin)"""
+    line = first_line.lstrip()
+    if line.startswith("{"):
+        return BatchFormat.JSONL
+    if line.startswith(("-", "---")) or line.split(":", 1)[0].strip() == "path":
+        return BatchFormat.YAML
+    return BatchFormat.CSV
+
+
+def read_records(
+    stream: TextIO, input_format: Optional[BatchFormat] = None
+) -> Iterator[tuple[int, Any]]:
+    """(row number, row) for each row of `stream`, read as it's needed except for YAML documents
+
+    The format is taken from the file extension, or sniffed from the first line, unless `input_format` is given.
+    """
+    if input_format is None:
+        input_format = FORMAT_BY_SUFFIX.get(Path(getattr(stream, "name", "")).suffix)
+    if input_format is None:
+        first_line = stream.readline()
+        input_format = sniff_format(first_line)
+        lines: Iterable[str] = chain([first_line], stream)
+    else:
+        lines = stream
+    logging.debug(f"Reading requests as {input_format.value}")
+
+    if input_format == BatchFormat.JSONL:
+        number = 0
+        for line in lines:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                yield number, json.loads(line)
+            except ValueError as e:
+                yield number, InvalidRequestRowError(f"Invalid JSON: {e}")
+    elif input_format == BatchFormat.CSV:
+        yield from enumerate(csv.DictReader(lines), start=1)
+    else:
+        import yaml
+
+        rows = []
+        try:
+            for document in yaml.safe_load_all("".join(lines)):
+                if isinstance(document, list):
+                    rows.extend(document)
+                elif document is not None:
+                    rows.append(document)
+        except yaml.YAMLError as e:
+            raise InvalidRequestRowError(f"Invalid YAML: {e}")
+        yield from enumerate(rows, start=1)
+
+
+def parse_bool(value: Any, default: bool) -> bool:
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    if str(value).lower() in TRUE_VALUES:
+        return True
+    if str(value).lower() in FALSE_VALUES:
+        return False
+    raise InvalidRequestRowError(f"`encrypt` must be true or false, not {value!r}")
+
+
+def parse_row(
+    number: int,
+    record: Any,
+    encrypt: bool = True,
+    note: Optional[tuple[str, str]] = None,
+) -> BatchRow:
+    """A row of requests input, with `encrypt` and `note` as defaults for rows that don't set them
+
+    Rows have `path` and `value` and, optionally, `encrypt`, `note_subject` and `note_body`. Raises
+    `InvalidRequestRowError` or `InvalidParameterPathError`.
+    """
+    if isinstance(record, Exception):
+        raise record
+    if not isinstance(record, dict):
+        raise InvalidRequestRowError("Row must have `path` and `value` fields")
+    path, value = record.get("path"), record.get("value")
+    if not path:
+        raise InvalidRequestRowError("Row is missing `path`")
+    if value is None:
+        raise InvalidRequestRowError("Row is missing `value`")
+    path = str(path).strip()
+    validate_param_name(path)
+    if record.get("note_subject") or record.get("note_body"):
+        note = (record.get("note_subject") or "", record.get("note_body") or "")
+    return BatchRow(
+        number=number,
+        path=path,
+        value=str(value),
+        encrypt=parse_bool(record.get("encrypt"), encrypt),
+        note=note,
+    )
+
+
+def upload_row(row: BatchRow) -> RowOutcome:
+    env = get_env(row.path)
+    try:
+        body = make_request(
+            env=env, path=row.path, value=row.value, encrypt=row.encrypt, note=row.note
+        )
+        key, _ = rq.upload_request(request=body, env=env)
+    except ClientError as e:
+        logging.debug(f"{e}")
+        error = transform_client_error(e, env=env, action=Permissions.WRITE_S3)
+        return RowOutcome(row.number, row.path, error=str(error))
+    except Exception as e:
+        logging.debug(f"Could not submit request for row {row.number}: {e}")
+        return RowOutcome(row.number, row.path, error=str(e) or type(e).__name__)
+    return RowOutcome(row.number, row.path, request_id=body["id"], key=key)
+
+
+def submit_requests(
+    records: Iterable[tuple[int, Any]],
+    encrypt: bool = True,
+    note: Optional[tuple[str, str]] = None,
+    max_workers: int = MAX_UPLOAD_WORKERS,
+    on_read: Callable[[int], None] = lambda number: None,
+    on_outcome: Callable[[RowOutcome], None] = lambda outcome: None,
+) -> list[RowOutcome]:
+    """Creates a request for each row of `records`, returning the outcome of each row in row order
+
+    Rows are validated as they're read, checked against SSM `SSM_GET_PARAMETERS_MAX` per env at a time, and
+    uploaded by up to `max_workers` threads while later rows are still being read.
+    """
+    outcomes: list[RowOutcome] = []
+    outcomes_lock = Lock()
+
+    def done(outcome: RowOutcome):
+        with outcomes_lock:
+            outcomes.append(outcome)
+        on_outcome(outcome)
+
+    pending: defaultdict[str, list[BatchRow]] = defaultdict(list)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+
+        def flush(env: str):
+            rows = pending.pop(env, [])
+            try:
+                missing = validate_params_exist(env, [row.path for row in rows])
+            except InsufficientPermissionException as e:
+                logging.warning(
+                    f"{e}. Requests will continue, but may be rejected if their parameters don't exist"
+                )
+                missing = {}
+            except Exception as e:
+                message = (
+                    f"{e}"
+                    if isinstance(e, DevCliException)
+                    else f"{e}. Could not verify the parameter exists"
+                )
+                for row in rows:
+                    done(RowOutcome(row.number, row.path, error=message))
+                return
+            for row in rows:
+                if row.path in missing:
+                    done(RowOutcome(row.number, row.path, error=str(missing[row.path])))
+                else:
+                    pool.submit(upload_row, row).add_done_callback(
+                        lambda f: done(f.result())
+                    )
+
+        for number, record in records:
+            on_read(number)
+            try:
+                row = parse_row(number, record, encrypt=encrypt, note=note)
+            except DevCliException as e:
+                path = record.get("path") if isinstance(record, dict) else None
+                done(RowOutcome(number, str(path or ""), error=str(e)))
+                continue
+            env = get_env(row.path)
+            pending[env].append(row)
+            if len(pending[env]) == SSM_GET_PARAMETERS_MAX:
+                flush(env)
+        for env in list(pending):
+            flush(env)
+    return sorted(outcomes)
@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+MAX_UPLOAD_WORKERS = 8
+# `ssm.get_parameters` accepts at most this many names per call
+SSM_GET_PARAMETERS_MAX = 10
+# `ssm.describe_parameters` returns at most this many parameters per page, and 10 unless asked for more
+SSM_DESCRIBE_PARAMETERS_MAX = 50
+# The parameter name index is refreshed from SSM when it's older than this
+NAME_INDEX_TTL = timedelta(hours=4)
+# `sqs.receive_message` returns at most this many messages per call
+SQS_RECEIVE_MAX = 10
+# `dev params review` waits this long for messages to arrive before deciding the queue is empty
+REVIEW_WAIT_TIME_SECONDS = 5
+MAX_PREFETCH_WORKERS = 8
+# `sqs.change_message_visibility_batch` accepts at most this many messages per call
+SQS_BATCH_MAX = 10
+# Messages being reviewed are kept invisible to other reviewers for this long at a time...
+LEASE_VISIBILITY_TIMEOUT_SECONDS = 120
+# ... and extended this often, so a heartbeat or two can fail before the lease runs out
+LEASE_HEARTBEAT_SECONDS = 30
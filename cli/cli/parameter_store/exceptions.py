@@ -54,6 +54,10 @@ class NonExistentParameterPathError(devCliError):
     pass
 
 
+class InvalidRequestRowError(devCliError):
+    """A row of `dev params request --from` input can't be made into a request"""
+
+
 class ErrorAfterSQSMessageReceived(devCliError):
     def __init__(self, message, event=None, record=None):
         super().__init__(message)
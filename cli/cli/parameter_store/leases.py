@@ -0,0 +1,127 @@
+import logging
+import time
+from threading import Event, Lock, Thread
+from typing import Any, Optional
+
+from cli.parameter_store.constants import (
+    LEASE_HEARTBEAT_SECONDS,
+    LEASE_VISIBILITY_TIMEOUT_SECONDS,
+    SQS_BATCH_MAX,
+)
+from cli.services.aws.clients_service import change_sqs_message_visibility_batch
+
+
+class Lease:
+    def __init__(self, message_id: str, handle: str, expires_at: float):
+        self.message_id = message_id
+        self.handle = handle
+        # `time.monotonic()` after which the message is visible to other reviewers, unless it's extended
+        self.expires_at = expires_at
+        self.lost: Optional[str] = None
+
+
+class VisibilityLeases:
+    """Keeps held SQS messages invisible to other reviewers, by extending their visibility timeout from a background
+    heartbeat
+
+    Messages must be received with `visibility_timeout` as their visibility timeout. A lease is lost if its message
+    can't be extended (e.g., its receipt handle is no longer valid) or it runs out between heartbeats, after which
+    another reviewer may receive the message.
+    """
+
+    def __init__(
+        self,
+        env: str,
+        visibility_timeout: int = LEASE_VISIBILITY_TIMEOUT_SECONDS,
+        heartbeat_seconds: float = LEASE_HEARTBEAT_SECONDS,
+    ):
+        self.env = env
+        self.visibility_timeout = visibility_timeout
+        self.heartbeat_seconds = heartbeat_seconds
+        self._leases: dict[str, Lease] = {}
+        self._lock = Lock()
+        # Held for a whole heartbeat, so a message that's been dropped isn't extended afterwards (e.g., hiding it
+        # again right after it was restored to the queue)
+        self._extending = Lock()
+        self._stopped = Event()
+        self._thread: Optional[Thread] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, __exc_type, __exc_value, __traceback):
+        self.stop()
+
+    def hold(self, message: dict[str, Any]):
+        """Leases a message that was just received, starting the heartbeat if it isn't running"""
+        lease = Lease(
+            message["MessageId"],
+            message["ReceiptHandle"],
+            time.monotonic() + self.visibility_timeout,
+        )
+        with self._lock:
+            self._leases[lease.message_id] = lease
+            if self._thread is None and not self._stopped.is_set():
+                self._thread = Thread(
+                    target=self._run, name="sqs-lease-heartbeat", daemon=True
+                )
+                self._thread.start()
+
+    def drop(self, message_id: str) -> Optional[Lease]:
+        """Stops extending a message, returning its lease"""
+        with self._extending, self._lock:
+            return self._leases.pop(message_id, None)
+
+    def lost(self, message_id: str) -> Optional[str]:
+        """Why the message's lease was lost, or `None` if it's still held (or was never leased)"""
+        with self._lock:
+            lease = self._leases.get(message_id)
+            return lease.lost if lease else None
+
+    def _lose(self, lease: Lease, reason: str):
+        lease.lost = reason
+        logging.warning(f"Lost the lease on SQS message {lease.message_id}: {reason}")
+
+    def heartbeat(self):
+        """Extends every held lease that isn't lost"""
+        with self._extending:
+            now = time.monotonic()
+            with self._lock:
+                leases = [lease for lease in self._leases.values() if not lease.lost]
+                for lease in leases:
+                    if now >= lease.expires_at:
+                        self._lose(
+                            lease, "visibility timeout ran out before it was extended"
+                        )
+                leases = [lease for lease in leases if not lease.lost]
+            for start in range(0, len(leases), SQS_BATCH_MAX):
+                end = start + SQS_BATCH_MAX
+                self._extend(leases[start:end], now)
+
+    def _extend(self, leases: list[Lease], now: float):
+        try:
+            failed = change_sqs_message_visibility_batch(
+                env=self.env,
+                handles={lease.message_id: lease.handle for lease in leases},
+                visibility_timeout=self.visibility_timeout,
+            )
+        except Exception as e:
+            # Tried again next heartbeat, while the leases last
+            logging.debug(f"Could not extend SQS message visibility: {e}")
+            return
+        with self._lock:
+            for lease in leases:
+                if lease.message_id in failed:
+                    self._lose(lease, failed[lease.message_id])
+                else:
+                    lease.expires_at = now + self.visibility_timeout
+
+    def _run(self):
+        while not self._stopped.wait(self.heartbeat_seconds):
+            self.heartbeat()
+
+    def stop(self):
+        """Stops the heartbeat, waiting for one that's in progress to finish"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
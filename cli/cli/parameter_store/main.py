@@ -5,25 +5,29 @@ import typer
 from botocore.exceptions import ClientError
 from rich import print
 from rich.console import Console
+from rich.progress import Progress
+from rich.table import Table
 
-from cli.constants import GLOBAL_RICH_CONSOLE_THEME, ReviewableEnv
+from cli.completion import complete_parameter_path
+from cli.constants import ENVIRONMENTS, GLOBAL_RICH_CONSOLE_THEME, ReviewableEnv
 from cli.parameter_store.actions import (
     do,
     format_request,
     make_request,
     update_request_on_review,
 )
+from cli.parameter_store.batch import BatchFormat, read_records, submit_requests
 from cli.parameter_store.exceptions import (
     DevCliException,
+    DiscardMessageException,
     InsufficientPermissionException,
     InvalidParameterPathError,
-    NoMessagesInReviewQueue,
     Permissions,
-    Retry,
     StaleCredentialsError,
 )
+from cli.parameter_store.name_index import name_index, search_names
 from cli.parameter_store.requests_client import RequestsClient as rq
-from cli.parameter_store.requests_client import next_sqs_message
+from cli.parameter_store.requests_client import ReviewSession
 from cli.parameter_store.types import DecisionResponse, RequestType
 from cli.parameter_store.utils import get_env, transform_client_error
 from cli.parameter_store.validate import validate_param_exists, validate_param_name
@@ -42,14 +46,70 @@ NoteOption = typer.Option(
 EncryptOption = typer.Option(True, "--encrypt/--no-encrypt", "-e/-n")
 
 
+def request_from_file(
+    requests_file: typer.FileText,
+    input_format: Optional[BatchFormat],
+    encrypt: bool,
+    note: Optional[tuple[str, str]],
+):
+    console = Console(theme=GLOBAL_RICH_CONSOLE_THEME, stderr=True)
+    with Progress(console=console, transient=True) as progress:
+        task = progress.add_task("Submitting requests", total=None)
+        try:
+            outcomes = submit_requests(
+                read_records(requests_file, input_format),
+                encrypt=encrypt,
+                note=note,
+                on_read=lambda number: progress.update(task, total=number),
+                on_outcome=lambda _outcome: progress.advance(task),
+            )
+        except DevCliException as e:
+            progress.stop()
+            print(f"{e}")
+            raise typer.Exit(1)
+
+    failed = [outcome for outcome in outcomes if outcome.error]
+    print(f"Submitted {len(outcomes) - len(failed)} of {len(outcomes)} requests")
+    if failed:
+        table = Table("Row", "Path", "Error", title="Failed requests")
+        for outcome in failed:
+            table.add_row(str(outcome.number), outcome.path, outcome.error)
+        Console(theme=GLOBAL_RICH_CONSOLE_THEME).print(table)
+        raise typer.Exit(1)
+    return True
+
+
 @app.command()
 def request(
-    path: str,
-    value: str,
+    path: Optional[str] = typer.Argument(
+        None, show_default=False, autocompletion=complete_parameter_path
+    ),
+    value: Optional[str] = typer.Argument(None, show_default=False),
     encrypt: bool = EncryptOption,
     note: Optional[tuple[str, str]] = NoteOption,
+    requests_file: Optional[typer.FileText] = typer.Option(
+        None,
+        "--from",
+        help="Create a request for each row of a YAML, CSV or JSONL file (or `-` for stdin) with `path`, `value`"
+        + " and, optionally, `encrypt`, `note_subject` and `note_body` fields, instead of PATH and VALUE",
+        show_default=False,
+    ),
+    input_format: Optional[BatchFormat] = typer.Option(
+        None,
+        "--format",
+        help="Format of the --from input. Taken from the file extension, or guessed, by default",
+        show_default=False,
+    ),
 ):
     """Creates a new request to change the value of PATH to VALUE"""
+    if requests_file is not None:
+        if path is not None or value is not None:
+            print("PATH and VALUE can't be used with --from")
+            raise typer.Exit(2)
+        return request_from_file(requests_file, input_format, encrypt, note)
+    if path is None or value is None:
+        print("PATH and VALUE are required unless --from is used")
+        raise typer.Exit(2)
     env = get_env(path)
 
     try:
@@ -94,61 +154,148 @@ def request(
         return True
 
 
+def check_envs(environments: Optional[list[str]]):
+    unknown = [env for env in environments or [] if env not in ENVIRONMENTS]
+    if unknown:
+        print(
+            f"Unknown env(s): {', '.join(unknown)}. Expected one of {', '.join(ENVIRONMENTS)}"
+        )
+        raise typer.Exit(2)
+
+
+@app.command()
+def search(
+    query: str,
+    environments: Optional[list[str]] = typer.Option(
+        None,
+        "--env",
+        help="Env to search (may be repeated). Every env by default",
+        show_default=False,
+    ),
+    limit: int = typer.Option(20, "--limit", "-l", help="Maximum number of paths"),
+):
+    """Lists the parameter paths that best match QUERY, e.g., `db pass`"""
+    check_envs(environments)
+    results = search_names(query, environments or ENVIRONMENTS, limit)
+    if not results:
+        print(f"No parameter paths match {query!r}")
+        raise typer.Exit(1)
+    for result in results:
+        typer.echo(result.path)
+    return True
+
+
+@app.command("refresh-index")
+def refresh_index(
+    environments: Optional[list[str]] = typer.Option(
+        None,
+        "--env",
+        help="Env to refresh (may be repeated). Every env by default",
+        show_default=False,
+    ),
+):
+    """Refreshes the local index of parameter names that requests are validated against"""
+    check_envs(environments)
+    failed = False
+    for env in environments or ENVIRONMENTS:
+        try:
+            count = name_index(env).refresh()
+        except ClientError as e:
+            error = transform_client_error(e, env=env, action=Permissions.READ_SSM)
+            print(f"{env}: {error}")
+            failed = True
+        except Exception as e:
+            print(f"{env}: {e}. Could not refresh the parameter name index")
+            failed = True
+        else:
+            print(f"{env}: indexed {count} parameter names")
+    if failed:
+        raise typer.Exit(1)
+    return True
+
+
 @app.command()
 def review(environment: ReviewableEnv):
-    """Approve or reject requests for a given environment (i.e., `dev`, `qa`, `stage`, or `prod`)"""
+    """Approve or reject requests for a given environment (i.e., `dev`, `qa`, `stage`, or `prod`), one after another
+    until the queue is empty"""
+    console = Console(theme=GLOBAL_RICH_CONSOLE_THEME)
+    reviewed: dict[str, DecisionResponse] = {}
     try:
-        with next_sqs_message(env=environment) as message:
-            try:
-                param_request, key = rq.fetch_s3_object_from_sqs_message(
-                    env=environment, message=message
-                )
-            except ClientError as e:
-                raise transform_client_error(
-                    error=e, env=environment, action=Permissions.RECEIVE_SQS
-                )
-            param_request["touches"] += 1
-            console = Console(theme=GLOBAL_RICH_CONSOLE_THEME)
-            console.print(
-                format_request(request=param_request, key=key, env=environment)
-            )
-            request_id = param_request["id"]
-            confirmed = False
-            while not confirmed:
-                action = typer.prompt(
-                    "Would you like to [a]pprove, [r]eject, or [D]efer?",
-                    type=DecisionResponse,
-                    default=DecisionResponse.DEFER,
-                    show_choices=False,
-                    show_default=False,
-                )
-                if action in ["approve", "reject"]:
-                    confirmed = typer.confirm(
-                        f"Are you sure you want to {action} this request?"
+        try:
+            with ReviewSession(env=environment) as session:
+                for item in session:
+                    try:
+                        param_request, key = item.request()
+                    except DiscardMessageException as e:
+                        session.discard(item, e)
+                        continue
+                    request_id = param_request["id"]
+                    if request_id in reviewed:
+                        if reviewed[request_id] != DecisionResponse.DEFER:
+                            # A duplicate of a request that's already been decided
+                            session.done(item)
+                        # Otherwise deferred earlier in this session, it's left for the next one
+                        continue
+                    lost = session.lease_lost(item)
+                    if lost:
+                        print(
+                            f"Skipping {request_id}, another reviewer may have it now ({lost})"
+                        )
+                        session.restore(item.message_id)
+                        continue
+                    param_request["touches"] += 1
+                    console.print(
+                        format_request(request=param_request, key=key, env=environment)
                     )
-                else:
-                    confirmed = True
-            if action != DecisionResponse.DEFER:
-                param_request = update_request_on_review(
-                    env=environment, request=param_request
-                )
-
-            do(
-                env=environment,
-                action=action,
-                request=param_request,
-                original_key=key,
-            )
-            print(f"Success: You selected {action} for {request_id}")
+                    confirmed = False
+                    while not confirmed:
+                        action = typer.prompt(
+                            "Would you like to [a]pprove, [r]eject, or [D]efer?",
+                            type=DecisionResponse,
+                            default=DecisionResponse.DEFER,
+                            show_choices=False,
+                            show_default=False,
+                        )
+                        if action in ["approve", "reject"]:
+                            confirmed = typer.confirm(
+                                f"Are you sure you want to {action} this request?"
+                            )
+                        else:
+                            confirmed = True
+                    if action != DecisionResponse.DEFER:
+                        param_request = update_request_on_review(
+                            env=environment, request=param_request
+                        )
 
+                    lost = session.lease_lost(item)
+                    if lost:
+                        print(
+                            f"Could not {action} {request_id}, another reviewer may have it now ({lost})"
+                        )
+                        session.restore(item.message_id)
+                        continue
+                    do(
+                        env=environment,
+                        action=action,
+                        request=param_request,
+                        original_key=key,
+                    )
+                    session.done(item)
+                    reviewed[request_id] = action
+                    print(f"Success: You selected {action} for {request_id}")
+        except ClientError as e:
+            raise transform_client_error(
+                error=e, env=environment, action=Permissions.RECEIVE_SQS
+            )
+        if not reviewed:
+            print(
+                f":sparkles: Review queue for {environment} is empty, nothing needs doing"
+            )
+        else:
+            print(
+                f":sparkles: Reviewed {len(reviewed)} request(s), nothing else needs doing in {environment}"
+            )
         return True
-    except NoMessagesInReviewQueue:
-        print(
-            f":sparkles: Review queue for {environment} is empty, nothing needs doing"
-        )
-        raise typer.Exit()
-    except Retry:
-        return review(environment=environment)
     except InsufficientPermissionException:
         print(
             f"You don't have permission to review. If that doesn't seem right, please consult with SRE."
@@ -0,0 +1,167 @@
+import logging
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Iterable, Optional
+
+from cli.completion import refresh_in_background, write_prefix_index
+from cli.parameter_store.constants import NAME_INDEX_TTL
+from cli.parameter_store.search import (
+    SearchResult,
+    open_trigram_index,
+    search_index,
+    update_trigram_index,
+)
+from cli.services.aws.clients_service import describe_parameter_names
+from cli.services.cache_service import (
+    cache_path,
+    file_lock,
+    read_json_cache,
+    write_json_cache,
+)
+
+NAME_INDEX_CACHE_VERSION = 1
+
+_NAME_INDEXES: dict[str, "NameIndex"] = {}
+_NAME_INDEXES_LOCK = Lock()
+
+
+def now() -> datetime:
+    return datetime.now(tz=timezone.utc)
+
+
+def name_index_cache_name(env: str) -> str:
+    return f"ssm-names-{env}.json"
+
+
+class NameIndex:
+    """Names of an env's SSM parameters, cached on disk and refreshed with `describe_parameters` once they're older
+    than `NAME_INDEX_TTL`
+
+    Only parameter metadata is read, so the index can be built with `ssm:DescribeParameters` alone. Between refreshes,
+    names confirmed to exist by other means are added to it.
+    """
+
+    def __init__(self, env: str):
+        self.env = env
+        self.names: Optional[set[str]] = None
+        self.refreshed_at: Optional[datetime] = None
+        self.refresh_failed = False
+        self._lock = Lock()
+
+    @property
+    def cache_name(self) -> str:
+        return name_index_cache_name(self.env)
+
+    def load(self):
+        cached = read_json_cache(self.cache_name, default={})
+        if (
+            not isinstance(cached, dict)
+            or cached.get("version") != NAME_INDEX_CACHE_VERSION
+        ):
+            return
+        self.names = set(cached["names"])
+        self.refreshed_at = datetime.fromisoformat(cached["refreshed_at"])
+
+    def is_fresh(self) -> bool:
+        return (
+            self.refreshed_at is not None and now() - self.refreshed_at < NAME_INDEX_TTL
+        )
+
+    def _save(self):
+        names = sorted(self.names or ())
+        data = {
+            "version": NAME_INDEX_CACHE_VERSION,
+            "env": self.env,
+            "refreshed_at": self.refreshed_at.isoformat()
+            if self.refreshed_at
+            else None,
+            "names": names,
+        }
+        try:
+            write_json_cache(self.cache_name, data)
+            if self.refreshed_at:
+                stale_after = (self.refreshed_at + NAME_INDEX_TTL).timestamp()
+                write_prefix_index(self.env, names, stale_after)
+                update_trigram_index(self.env, names, stale_after)
+        except OSError as e:
+            logging.debug(f"Could not save parameter name index for {self.env}: {e}")
+
+    def refresh(self) -> int:
+        """Rebuilds the index from SSM, returning the number of names. Raises `ClientError` if SSM can't be read."""
+        names = set(describe_parameter_names(self.env))
+        with self._lock, file_lock(cache_path(f"{self.cache_name}.lock")):
+            self.names = names
+            self.refreshed_at = now()
+            self._save()
+        logging.debug(f"Indexed {len(names)} parameter names in {self.env}")
+        return len(names)
+
+    def get(self, refresh: bool = True) -> Optional[set[str]]:
+        """The indexed names, refreshed first if they're stale
+
+        Stale names are returned if they can't be refreshed, and `None` if there's no index at all. With
+        `refresh=False`, a stale or missing index is refreshed in a background process instead, as completions do.
+        """
+        if self.names is None:
+            self.load()
+        if not self.is_fresh() and not self.refresh_failed:
+            if not refresh:
+                refresh_in_background(self.env)
+                return self.names
+            try:
+                self.refresh()
+            except Exception as e:
+                # Not retried for the rest of the session
+                self.refresh_failed = True
+                logging.debug(
+                    f"Could not refresh parameter name index for {self.env}: {e}"
+                )
+        return self.names
+
+    def add(self, names: Iterable[str]):
+        """Adds `names`, which are known to exist, without changing when the index was refreshed"""
+        names = set(names)
+        with self._lock, file_lock(cache_path(f"{self.cache_name}.lock")):
+            # Another process may have refreshed the index since it was loaded
+            self.load()
+            if self.names is None or names <= self.names:
+                return
+            self.names |= names
+            self._save()
+
+
+def name_index(env: str) -> NameIndex:
+    with _NAME_INDEXES_LOCK:
+        if env not in _NAME_INDEXES:
+            _NAME_INDEXES[env] = NameIndex(env)
+        return _NAME_INDEXES[env]
+
+
+def search_names(
+    query: str, envs: list[str], limit: Optional[int] = None
+) -> list[SearchResult]:
+    """Parameter names in `envs` that fuzzily match `query`, best first
+
+    An env's trigram index is only refreshed (from its name index) when it's stale or missing.
+    """
+    results: list[SearchResult] = []
+    for env in envs:
+        with open_trigram_index(env) as index:
+            if index is not None and now().timestamp() < index.stale_after:
+                results += search_index(index, query, limit)
+                continue
+        indexed = name_index(env)
+        names = indexed.get()
+        if names is None:
+            logging.debug(f"No parameter names to search in {env}")
+            continue
+        with open_trigram_index(env) as index:
+            if index is None:
+                # e.g., a name index saved before trigram indexes existed
+                stale_after = (indexed.refreshed_at or now()) + NAME_INDEX_TTL
+                update_trigram_index(env, names, stale_after.timestamp())
+        with open_trigram_index(env) as index:
+            if index is not None:
+                results += search_index(index, query, limit)
+    results.sort(key=lambda result: (-result.score, result.path))
+    return results[:limit]
@@ -1,10 +1,18 @@
 import json
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import AbstractContextManager
 from io import BytesIO
+from typing import Any, Iterator, NamedTuple, Optional
 
 from botocore.exceptions import ClientError
 
+from cli.parameter_store.constants import (
+    LEASE_VISIBILITY_TIMEOUT_SECONDS,
+    MAX_PREFETCH_WORKERS,
+    REVIEW_WAIT_TIME_SECONDS,
+    SQS_RECEIVE_MAX,
+)
 from cli.parameter_store.exceptions import (
     DiscardMessageException,
     ErrorAfterSQSMessageReceived,
@@ -15,7 +23,8 @@ from cli.parameter_store.exceptions import (
     Retry,
     RetryReviewNotAllowed,
 )
-from cli.parameter_store.types import RequestType
+from cli.parameter_store.leases import VisibilityLeases
+from cli.parameter_store.types import RecordType, RequestType
 from cli.parameter_store.utils import (
     filename_from_obj,
     get_bucket_name,
@@ -28,6 +37,7 @@ from cli.services.aws.clients_service import (
     process_sqs_message,
     receive_sqs_message,
     restore_sqs_message,
+    sqs_message_records,
     upload_s3_obj,
 )
 
@@ -37,18 +47,26 @@ class next_sqs_message(AbstractContextManager):
         self.env = env
         self.response = None
         self.messages = None
+        self.leases = VisibilityLeases(env)
 
     def __enter__(self):
         queue_url = get_queue_url(self.env)
         logging.debug(f"QUEUE_URL: {queue_url}")
-        self.response = receive_sqs_message(queue_url=queue_url, env=self.env)
+        self.response = receive_sqs_message(
+            queue_url=queue_url,
+            env=self.env,
+            visibility_timeout=self.leases.visibility_timeout,
+        )
         try:
             self.messages = self.response["Messages"]
         except KeyError:
             raise NoMessagesInReviewQueue()
+        for message in self.messages:
+            self.leases.hold(message)
         return self.response
 
     def __exit__(self, __exc_type, __exc_value, __traceback):
+        self.leases.stop()
         if isinstance(__exc_value, DiscardMessageException) or __exc_type is None:
             for message in self.messages:
                 print("Deleting bad SQS message")
@@ -69,10 +87,169 @@ class next_sqs_message(AbstractContextManager):
         return super().__exit__(__exc_type, __exc_value, __traceback)
 
 
+class ReviewItem(NamedTuple):
+    """One record of a received SQS message, and the request it refers to as it's fetched in the background"""
+
+    message: dict[str, Any]
+    record: Optional[RecordType]
+    fetched: Future
+
+    @property
+    def message_id(self) -> str:
+        return self.message["MessageId"]
+
+    def request(self) -> tuple[RequestType, str]:
+        """The request and its S3 key, waiting for the fetch to finish if it hasn't"""
+        return self.fetched.result()
+
+
+class ReviewSession(AbstractContextManager):
+    """Receives an env's review queue in batches, for reviewing one request after another
+
+    Each receive long polls for up to `SQS_RECEIVE_MAX` messages, and the requests of all their records are fetched
+    from S3 in the background while the first is being reviewed. A message is deleted once all of its records are
+    done, and messages still held when the session ends are restored to the queue.
+
+    Held messages are leased (see `VisibilityLeases`), so other reviewers can drain the queue at the same time without
+    receiving them.
+    """
+
+    def __init__(
+        self,
+        env: str,
+        max_workers: int = MAX_PREFETCH_WORKERS,
+        wait_time_seconds: int = REVIEW_WAIT_TIME_SECONDS,
+        visibility_timeout: int = LEASE_VISIBILITY_TIMEOUT_SECONDS,
+    ):
+        self.env = env
+        self.max_workers = max_workers
+        self.wait_time_seconds = wait_time_seconds
+        self.queue_url: Optional[str] = None
+        self.pool: Optional[ThreadPoolExecutor] = None
+        # Messages received and not yet deleted or restored, by message id
+        self.held: dict[str, dict[str, Any]] = {}
+        # The number of records of each held message that aren't done yet
+        self.remaining: dict[str, int] = {}
+        self.leases = VisibilityLeases(env, visibility_timeout=visibility_timeout)
+
+    def __enter__(self):
+        self.queue_url = get_queue_url(self.env)
+        logging.debug(f"QUEUE_URL: {self.queue_url}")
+        self.pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self
+
+    def __exit__(self, __exc_type, __exc_value, __traceback):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+        self.leases.stop()
+        for message_id in list(self.held):
+            self.restore(message_id)
+        return super().__exit__(__exc_type, __exc_value, __traceback)
+
+    def fetch(self, message: dict[str, Any]) -> list[ReviewItem]:
+        """An item for each record of `message`, with its request being fetched"""
+        try:
+            records = sqs_message_records(message)
+        except MalformedSQSMessageError as e:
+            failed: Future = Future()
+            failed.set_exception(e)
+            self.remaining[message["MessageId"]] = 1
+            return [ReviewItem(message, None, failed)]
+        self.remaining[message["MessageId"]] = len(records)
+        return [
+            ReviewItem(
+                message,
+                record,
+                self.pool.submit(
+                    RequestsClient.fetch_s3_object_from_record, self.env, record
+                ),
+            )
+            for record in records
+        ]
+
+    def receive(self) -> list[ReviewItem]:
+        """Items for the next batch of messages, which is empty once the queue is"""
+        response = receive_sqs_message(
+            env=self.env,
+            queue_url=self.queue_url,
+            max_messages=SQS_RECEIVE_MAX,
+            wait_time_seconds=self.wait_time_seconds,
+            visibility_timeout=self.leases.visibility_timeout,
+        )
+        items = []
+        for message in response.get("Messages", []):
+            redelivered = message["MessageId"] in self.held
+            # Only the latest receipt handle of a message can delete it
+            self.held[message["MessageId"]] = message
+            self.leases.hold(message)
+            if not redelivered:
+                items += self.fetch(message)
+        logging.debug(f"Received {len(items)} requests to review from {self.env}")
+        return items
+
+    def __iter__(self) -> Iterator[ReviewItem]:
+        while True:
+            items = self.receive()
+            if not items:
+                return
+            yield from items
+
+    def release(self, message_id: str) -> Optional[dict[str, Any]]:
+        """Stops holding a message, returning it unless its lease was lost (in which case it's no longer ours to
+        delete or restore)"""
+        message = self.held.pop(message_id, None)
+        self.remaining.pop(message_id, None)
+        lease = self.leases.drop(message_id)
+        if lease is not None and lease.lost:
+            return None
+        return message
+
+    def delete(self, message_id: str):
+        message = self.release(message_id)
+        if message is not None:
+            delete_sqs_message(env=self.env, handle=message["ReceiptHandle"])
+
+    def restore(self, message_id: str):
+        """Makes a message visible to other reviewers right away, rather than when its lease would run out"""
+        message = self.release(message_id)
+        if message is not None:
+            print("Restoring SQS message")
+            restore_sqs_message(env=self.env, handle=message["ReceiptHandle"])
+
+    def lease_lost(self, item: ReviewItem) -> Optional[str]:
+        """Why the lease on `item`'s message was lost, if it was"""
+        return self.leases.lost(item.message_id)
+
+    def done(self, item: ReviewItem):
+        """Marks `item` as reviewed, deleting its message if it was the message's last record"""
+        if item.message_id not in self.remaining:
+            return
+        self.remaining[item.message_id] -= 1
+        if self.remaining[item.message_id] == 0:
+            self.delete(item.message_id)
+
+    def discard(self, item: ReviewItem, error: DiscardMessageException):
+        """Deletes `item`'s message, and its S3 object if that's what couldn't be read"""
+        print("Deleting bad SQS message")
+        logging.debug(item.message)
+        self.delete(item.message_id)
+        if isinstance(error, MalformedS3ObjectError):
+            key = error.record["s3"]["object"]["key"]
+            print(f"Deleting bad S3 object ({key})")
+            logging.debug(error.record)
+            RequestsClient.delete_request(env=self.env, key=key)
+
+
 class RequestsClient:
     @staticmethod
     def fetch_s3_object_from_sqs_message(env: str, message) -> tuple[RequestType, str]:
         record = process_sqs_message(env=env, message=message)
+        return RequestsClient.fetch_s3_object_from_record(env=env, record=record)
+
+    @staticmethod
+    def fetch_s3_object_from_record(
+        env: str, record: RecordType
+    ) -> tuple[RequestType, str]:
         try:
             key = record["s3"]["object"]["key"]
         except Exception as e:
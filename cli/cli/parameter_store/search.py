@@ -0,0 +1,275 @@
+import logging
+import mmap
+import struct
+from array import array
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from heapq import nlargest
+from math import ceil
+from random import getrandbits
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from cli.services import cache_service
+from cli.services.cache_service import cache_path, write_bytes_atomic, write_json_cache
+
+TRIGRAM_INDEX_MAGIC = b"DEVTRG1\0"
+# magic, number of names, number of trigrams, build id, stale after (epoch seconds)
+TRIGRAM_INDEX_HEADER = struct.Struct("=8sIIQd")
+# trigram, offset of its postings, number of postings
+TRIGRAM_ENTRY = struct.Struct("=III")
+# A name must share at least this fraction of the query's trigrams to be a match
+MIN_TRIGRAM_MATCH = 0.5
+# The index is rebuilt, rather than updated with a delta, once the delta has this many names...
+DELTA_MAX_NAMES = 500
+# ... or this fraction of the index's names
+DELTA_MAX_RATIO = 0.1
+
+
+class SearchResult(NamedTuple):
+    score: float
+    path: str
+
+
+def trigram_index_path(env: str):
+    return cache_service.CACHE_DIR_PATH / f"ssm-trigrams-{env}.idx"
+
+
+def delta_cache_name(env: str) -> str:
+    return f"ssm-trigrams-{env}.delta.json"
+
+
+def trigrams(value: str) -> set[int]:
+    data = value.lower().encode("utf-8")
+    return {a << 16 | b << 8 | c for a, b, c in zip(data, data[1:], data[2:])}
+
+
+def build_trigram_index(names: list[str], stale_after: float) -> tuple[bytes, int]:
+    """The index file for `names`, and its build id
+
+    Layout: header, trigram table (sorted by trigram, for binary search), name offsets, postings (name ids), then
+    the names themselves. Integers are native byte order, since the file never leaves the machine that built it.
+    """
+    postings: defaultdict[int, array] = defaultdict(lambda: array("I"))
+    for name_id, name in enumerate(names):
+        for trigram in trigrams(name):
+            postings[trigram].append(name_id)
+    encoded = [name.encode("utf-8") for name in names]
+
+    table_start = TRIGRAM_INDEX_HEADER.size
+    offsets_start = table_start + TRIGRAM_ENTRY.size * len(postings)
+    postings_start = offsets_start + 4 * (len(names) + 1)
+    table = bytearray()
+    postings_data = bytearray()
+    for trigram in sorted(postings):
+        ids = postings[trigram]
+        table += TRIGRAM_ENTRY.pack(
+            trigram, postings_start + len(postings_data), len(ids)
+        )
+        postings_data += ids.tobytes()
+    names_start = postings_start + len(postings_data)
+    name_offsets = array("I", [names_start])
+    for encoded_name in encoded:
+        name_offsets.append(name_offsets[-1] + len(encoded_name))
+
+    build_id = getrandbits(63)
+    header = TRIGRAM_INDEX_HEADER.pack(
+        TRIGRAM_INDEX_MAGIC, len(names), len(postings), build_id, stale_after
+    )
+    data = b"".join((header, table, name_offsets.tobytes(), postings_data, *encoded))
+    return data, build_id
+
+
+class TrigramIndex:
+    """A memory mapped trigram index of an env's parameter names, plus the names added or removed since it was built
+
+    Small changes are kept in a delta next to the index, so they don't rebuild it.
+    """
+
+    def __init__(self, env: str, index: mmap.mmap):
+        self.env = env
+        self.index = index
+        (
+            magic,
+            self.name_count,
+            self.trigram_count,
+            self.build_id,
+            self.stale_after,
+        ) = TRIGRAM_INDEX_HEADER.unpack_from(index)
+        if magic != TRIGRAM_INDEX_MAGIC:
+            raise ValueError(f"Not a trigram index: {trigram_index_path(env)}")
+        self.offsets_start = (
+            TRIGRAM_INDEX_HEADER.size + TRIGRAM_ENTRY.size * self.trigram_count
+        )
+        delta = cache_service.read_json_cache(delta_cache_name(env), default={})
+        if not isinstance(delta, dict) or delta.get("build_id") != self.build_id:
+            delta = {}
+        self.added: list[str] = delta.get("added", [])
+        self.removed: set[str] = set(delta.get("removed", []))
+        self.stale_after = delta.get("stale_after", self.stale_after)
+
+    def name(self, name_id: int) -> str:
+        start, end = struct.unpack_from(
+            "=II", self.index, self.offsets_start + 4 * name_id
+        )
+        return self.index[start:end].decode("utf-8")
+
+    def name_offsets(self) -> array:
+        start = self.offsets_start
+        end = start + 4 * (self.name_count + 1)
+        return array("I", self.index[start:end])
+
+    def base_names(self) -> list[str]:
+        offsets = self.name_offsets()
+        return [
+            self.index[start:end].decode("utf-8")
+            for start, end in zip(offsets, offsets[1:])
+        ]
+
+    def names(self) -> set[str]:
+        return (set(self.base_names()) - self.removed) | set(self.added)
+
+    def names_containing(self, term: str) -> Iterator[str]:
+        """Names that contain `term`, case insensitively, found by scanning the names (for terms too short to have
+        trigrams)"""
+        offsets = self.name_offsets()
+        first, last = offsets[0], offsets[-1]
+        blob = self.index[first:last].lower()
+        key = term.lower().encode("utf-8")
+        pos = blob.find(key)
+        while pos != -1:
+            name_id = bisect_right(offsets, first + pos) - 1
+            name_end = offsets[name_id + 1] - first
+            if pos + len(key) > name_end:
+                # Spans two names
+                pos = blob.find(key, pos + 1)
+                continue
+            name = self.name(name_id)
+            if name not in self.removed:
+                yield name
+            pos = blob.find(key, name_end)
+        yield from (name for name in self.added if term.lower() in name.lower())
+
+    def postings(self, trigram: int) -> array:
+        lo, hi = 0, self.trigram_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key, offset, count = TRIGRAM_ENTRY.unpack_from(
+                self.index, TRIGRAM_INDEX_HEADER.size + TRIGRAM_ENTRY.size * mid
+            )
+            if key < trigram:
+                lo = mid + 1
+            elif key > trigram:
+                hi = mid
+            else:
+                end = offset + 4 * count
+                return array("I", self.index[offset:end])
+        return array("I")
+
+    def candidates(self, query_trigrams: set[int]) -> Iterator[tuple[str, int]]:
+        """Names sharing at least `MIN_TRIGRAM_MATCH` of `query_trigrams`, with the number they share"""
+        required = max(1, ceil(len(query_trigrams) * MIN_TRIGRAM_MATCH))
+        hits: Counter[int] = Counter()
+        for trigram in query_trigrams:
+            hits.update(self.postings(trigram))
+        for name_id, count in hits.items():
+            if count >= required:
+                name = self.name(name_id)
+                if name not in self.removed:
+                    yield name, count
+        for name in self.added:
+            count = len(query_trigrams & trigrams(name))
+            if count >= required:
+                yield name, count
+
+
+def score(name: str, terms: list[str], query_trigrams: set[int], shared: int) -> float:
+    """Higher for names that share more of the query's trigrams, contain its terms (especially in their last
+    segment), and are shorter"""
+    lower = name.lower()
+    leaf = lower.rpartition("/")[2]
+    value = shared / len(query_trigrams) if query_trigrams else 0.0
+    for term in terms:
+        if term in leaf:
+            value += 1.5
+        elif term in lower:
+            value += 1.0
+    return value - len(name) / 1000
+
+
+def search_index(
+    index: TrigramIndex, query: str, limit: Optional[int] = None
+) -> list[SearchResult]:
+    """The names in `index` that match `query`, best first"""
+    terms = query.lower().split()
+    query_trigrams = set().union(*(trigrams(term) for term in terms))
+    short_terms = [term for term in terms if len(term) < 3]
+    if query_trigrams:
+        candidates: Iterable[tuple[str, int]] = index.candidates(query_trigrams)
+    elif short_terms:
+        candidates = ((name, 0) for name in index.names_containing(short_terms[0]))
+    else:
+        return []
+    results = (
+        SearchResult(score(name, terms, query_trigrams, shared), name)
+        for name, shared in candidates
+        if all(term in name.lower() for term in short_terms)
+    )
+    if limit is None:
+        return sorted(results, reverse=True)
+    return nlargest(limit, results)
+
+
+@contextmanager
+def open_trigram_index(env: str) -> Iterator[Optional[TrigramIndex]]:
+    """The env's trigram index, or `None` if it hasn't been built"""
+    try:
+        f = trigram_index_path(env).open("rb")
+    except OSError as e:
+        logging.debug(f"No trigram index for {env}: {e}")
+        yield None
+        return
+    with f:
+        try:
+            index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            # An empty file can't be mapped
+            logging.debug(f"Ignoring empty trigram index for {env}: {e}")
+            yield None
+            return
+        with index:
+            try:
+                trigram_index: Optional[TrigramIndex] = TrigramIndex(env, index)
+            except (ValueError, struct.error) as e:
+                logging.debug(f"Ignoring unreadable trigram index for {env}: {e}")
+                trigram_index = None
+            yield trigram_index
+
+
+def update_trigram_index(env: str, names: Iterable[str], stale_after: float):
+    """Brings the env's trigram index up to date with `names`
+
+    A small change from the names the index was built with is saved as a delta, which is cheap. The index is rebuilt
+    when there's no index yet or the delta would be too large.
+    """
+    names = set(names)
+    with open_trigram_index(env) as index:
+        if index is not None:
+            base_names = set(index.base_names())
+            added, removed = names - base_names, base_names - names
+            limit = max(DELTA_MAX_NAMES, len(base_names) * DELTA_MAX_RATIO)
+            if len(added) + len(removed) <= limit:
+                delta = {
+                    "build_id": index.build_id,
+                    "stale_after": stale_after,
+                    "added": sorted(added),
+                    "removed": sorted(removed),
+                }
+                write_json_cache(delta_cache_name(env), delta)
+                return
+    data, build_id = build_trigram_index(sorted(names), stale_after)
+    write_bytes_atomic(cache_path(trigram_index_path(env).name), data)
+    write_json_cache(
+        delta_cache_name(env), {"build_id": build_id, "added": [], "removed": []}
+    )
+    logging.debug(f"Built trigram index of {len(names)} names in {env}")
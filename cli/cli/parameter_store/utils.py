@@ -10,19 +10,19 @@ from cli.parameter_store.exceptions import (
     NonExistentParameterPathError,
     Permissions,
     StaleCredentialsError,
-    devCliException,
+    devCliError,
 )
 
 
 def get_bucket_name(env: str):
     if not env:
-        raise devCliException("Error: get_bucket_name called with no env")
+        raise devCliError("Error: get_bucket_name called with no env")
     return f"{env}-dev-useast2-dev-tools-param-requests"
 
 
 def get_queue_name(env: str):
     if not env:
-        raise devCliException("Error: get_queue_name called with no env")
+        raise devCliError("Error: get_queue_name called with no env")
     return f"{env}-dev-useast2-dev-tools-review"
 
 
@@ -43,14 +43,18 @@ def get_env(path):
     return env
 
 
+def nonexistent_parameter_error(env, path) -> NonExistentParameterPathError:
+    return NonExistentParameterPathError(
+        f'Parameter path "{path}" does not exist in {env}. The path should be created via'
+        + " terraform. Please submit an infra PR to create it before requesting its value be set"
+    )
+
+
 def transform_client_error(
     error: ClientError, env, path=None, action: Optional[Permissions] = None
 ):
     if error.response["Error"]["Code"] == "ParameterNotFound":
-        return NonExistentParameterPathError(
-            f'Parameter path "{path}" does not exist in {env}. The path should be created via'
-            + " terraform. Please submit an infra PR to create it before requesting its value be set"
-        )
+        return nonexistent_parameter_error(env=env, path=path)
     if error.response["Error"]["Code"] in [
         "ExpiredToken",
         "ExpiredTokenException",
@@ -66,7 +70,7 @@ def transform_client_error(
         return InsufficientPermissionException(
             f"You lack permission to {action} in {env}. Please contact the SRE team for assistance"
         )
-    return devCliException(f"{error}")
+    return devCliError(f"{error}")
 
 
 def iso_datetime(dt: Optional[datetime] = None):
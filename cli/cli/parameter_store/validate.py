@@ -1,20 +1,87 @@
 from re import fullmatch
+from threading import Lock
 
 from botocore.exceptions import ClientError
 
-from cli.parameter_store.exceptions import InvalidParameterPathError, Permissions
-from cli.parameter_store.utils import get_env, transform_client_error
-from cli.services.aws.clients_service import get_parameter
+from cli.parameter_store.constants import SSM_GET_PARAMETERS_MAX
+from cli.parameter_store.exceptions import (
+    InvalidParameterPathError,
+    NonExistentParameterPathError,
+    Permissions,
+)
+from cli.parameter_store.name_index import name_index
+from cli.parameter_store.utils import (
+    get_env,
+    nonexistent_parameter_error,
+    transform_client_error,
+)
+from cli.services.aws.clients_service import get_parameters
+
+# Whether (env, path) exists, for the rest of the session
+_PARAMETER_EXISTS: dict[tuple[str, str], bool] = {}
+_PARAMETER_EXISTS_LOCK = Lock()
 
 
 def validate_param_exists(env, path: str):
-    try:
-        get_parameter(env, path)
-    except ClientError as e:
-        raise transform_client_error(e, env=env, path=path, action=Permissions.READ_SSM)
+    missing = validate_params_exist(env, [path])
+    if path in missing:
+        raise missing[path]
     return True
 
 
+def _check_exist(env, paths: list[str]) -> set[str]:
+    """Which of `paths` exist, checked `SSM_GET_PARAMETERS_MAX` per call without reading values (so no KMS
+    decryption)"""
+    existing: set[str] = set()
+    for start in range(0, len(paths), SSM_GET_PARAMETERS_MAX):
+        end = start + SSM_GET_PARAMETERS_MAX
+        batch = paths[start:end]
+        try:
+            response = get_parameters(env, batch)
+        except ClientError as e:
+            raise transform_client_error(e, env=env, action=Permissions.READ_SSM)
+        invalid = set(response.get("InvalidParameters", []))
+        existing.update(path for path in batch if path not in invalid)
+        with _PARAMETER_EXISTS_LOCK:
+            for path in batch:
+                _PARAMETER_EXISTS[(env, path)] = path not in invalid
+    return existing
+
+
+def validate_params_exist(
+    env, paths: list[str]
+) -> dict[str, NonExistentParameterPathError]:
+    """An error for each of `paths` that doesn't exist in `env`
+
+    Paths in the env's parameter name index exist. The rest, which may have been created since the index was
+    refreshed, are checked with SSM. A stale index is still used here, and refreshed in the background. Results are
+    cached for the session. Raises the transformed `ClientError` if SSM can't be read for paths that aren't indexed, or
+    if a call fails for another reason (e.g., stale credentials).
+    """
+    with _PARAMETER_EXISTS_LOCK:
+        unchecked = [
+            path
+            for path in dict.fromkeys(paths)
+            if (env, path) not in _PARAMETER_EXISTS
+        ]
+    indexed = name_index(env).get(refresh=False) if unchecked else None
+    if indexed is not None:
+        with _PARAMETER_EXISTS_LOCK:
+            for path in unchecked:
+                if path in indexed:
+                    _PARAMETER_EXISTS[(env, path)] = True
+        unchecked = [path for path in unchecked if path not in indexed]
+    existing = _check_exist(env, unchecked)
+    if indexed is not None and existing:
+        name_index(env).add(existing)
+    with _PARAMETER_EXISTS_LOCK:
+        return {
+            path: nonexistent_parameter_error(env=env, path=path)
+            for path in dict.fromkeys(paths)
+            if not _PARAMETER_EXISTS.get((env, path), False)
+        }
+
+
 def validate_param_name(path: str):
     get_env(path)
     if len(path) < 1 or len(path) > 2048:
@@ -0,0 +1,71 @@
+import logging
+from threading import Lock
+from typing import NamedTuple
+
+import boto3
+from botocore.client import BaseClient
+from botocore.config import Config
+
+from cli.services.aws.constants import DEFAULT_CLIENT_CONFIG
+
+
+class ClientKey(NamedTuple):
+    env: str
+    profile: str
+    region: str
+    service: str
+
+
+class ClientRegistry:
+    """Pool of boto3 clients, one per (env, profile, region, service)
+
+    Clients are thread safe once created, so a client is shared by every caller with the same key. Creating clients
+    is not, so creation is serialized.
+    """
+
+    def __init__(self, **config_options):
+        self._clients: dict[ClientKey, BaseClient] = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.configure(**config_options)
+
+    def configure(self, **config_options):
+        """Sets botocore `Config` options (e.g., `max_pool_connections`) for clients created from now on"""
+        # Defaults the installed botocore doesn't know yet (e.g., `tcp_keepalive`) are left out
+        defaults = {
+            option: value
+            for option, value in DEFAULT_CLIENT_CONFIG.items()
+            if option in Config.OPTION_DEFAULTS
+        }
+        options = {**defaults, **config_options}
+        self.config = Config(**options)
+
+    def client(self, session: boto3.Session, key: ClientKey) -> BaseClient:
+        with self._lock:
+            if key in self._clients:
+                self.hits += 1
+                return self._clients[key]
+            self.misses += 1
+            logging.debug(f"Creating new client for {key.service} in {key.env}")
+            client = session.client(
+                key.service, region_name=key.region, config=self.config
+            )
+            self._clients[key] = client
+            return client
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "live_clients": len(self._clients),
+        }
+
+
+CLIENT_REGISTRY = ClientRegistry()
@@ -1,23 +1,40 @@
+import atexit
 import json
 import logging
 from abc import ABC
+from datetime import datetime
+from threading import Lock
+from typing import Iterator, Optional
 
-import boto3
 from botocore.client import BaseClient
 from botocore.exceptions import UnknownServiceError
 
 from cli.constants import AWS_DEFAULT_REGION, AWS_SSO_REGION_KEY, ENVIRONMENTS
+from cli.parameter_store.constants import SSM_DESCRIBE_PARAMETERS_MAX
 from cli.parameter_store.exceptions import (
     MalformedSQSMessageError,
     NoMessagesInReviewQueue,
 )
 from cli.parameter_store.types import RecordType
 from cli.parameter_store.utils import get_bucket_name, get_queue_url
+from cli.services.aws.client_registry import CLIENT_REGISTRY, ClientKey
 from cli.services.aws.config_service import AWS_CFG
+from cli.services.aws.constants import SUPPORTED_SERVICES
+from cli.services.aws.identity_cache import IDENTITY_CACHE
+from cli.services.aws.session_service import SESSIONS
+
+
+def get_caller_identity(env: str) -> dict[str, str]:
+    manager = aws[env]
+    return IDENTITY_CACHE.get(
+        manager.profile_name,
+        expiry=manager.credential_expiry(),
+        fetch=manager.sts.get_caller_identity,
+    )
 
 
 def get_user_for_env(env: str):
-    raw_user: str = aws[env].sts.get_caller_identity()["UserId"]
+    raw_user: str = get_caller_identity(env)["UserId"]
     _role, email = raw_user.split(":")
     return email
 
@@ -32,6 +49,26 @@ def restore_sqs_message(env, handle):
     return response
 
 
+def change_sqs_message_visibility_batch(
+    env, handles: dict[str, str], visibility_timeout: int
+) -> dict[str, str]:
+    """Sets the visibility timeout of each message in `handles` (message id to receipt handle), returning the error
+    code for each message whose timeout couldn't be set (e.g., `ReceiptHandleIsInvalid`)"""
+    queue_url = get_queue_url(env)
+    response = aws[env].sqs.change_message_visibility_batch(
+        QueueUrl=queue_url,
+        Entries=[
+            {
+                "Id": message_id,
+                "ReceiptHandle": handle,
+                "VisibilityTimeout": visibility_timeout,
+            }
+            for message_id, handle in handles.items()
+        ],
+    )
+    return {failed["Id"]: failed["Code"] for failed in response.get("Failed", [])}
+
+
 def delete_sqs_message(env, handle):
     queue_url = get_queue_url(env)
     response = aws[env].sqs.delete_message(
@@ -41,32 +78,53 @@ def delete_sqs_message(env, handle):
     return response
 
 
-def receive_sqs_message(env=None, queue_url=None):
+def receive_sqs_message(
+    env=None,
+    queue_url=None,
+    max_messages: int = 1,
+    wait_time_seconds: Optional[int] = None,
+    visibility_timeout: Optional[int] = None,
+):
+    """Up to `max_messages` messages, waiting up to `wait_time_seconds` for the first to arrive (long polling)
+
+    Without `wait_time_seconds` or `visibility_timeout`, the queue's own settings apply.
+    """
     queue_url = queue_url or get_queue_url(env)
-    return aws[env].sqs.receive_message(QueueUrl=queue_url)
+    options = {"MaxNumberOfMessages": max_messages}
+    if wait_time_seconds is not None:
+        options["WaitTimeSeconds"] = wait_time_seconds
+    if visibility_timeout is not None:
+        options["VisibilityTimeout"] = visibility_timeout
+    return aws[env].sqs.receive_message(QueueUrl=queue_url, **options)
 
 
-def process_sqs_message(env: str, message):
-    if "Messages" not in message:
-        print("No messages in queue")
-        logging.debug(message)
-        raise NoMessagesInReviewQueue()
+def sqs_message_records(message) -> list[RecordType]:
+    """Every record in the S3 event notification carried by a single SQS message"""
     try:
-        event = json.loads(message["Messages"][0]["Body"])
+        event = json.loads(message["Body"])
     except Exception as e:
         print("error loading event")
         raise MalformedSQSMessageError(
             message="Failed to parse SQS message body"
         ) from e
     try:
-        record: RecordType = event["Records"][0]
-    except (KeyError, IndexError) as e:
+        records: list[RecordType] = event["Records"]
+        records[0]
+    except (KeyError, IndexError, TypeError) as e:
         print("error loading record")
         raise MalformedSQSMessageError(
             message=f"SQS message was parsed but appears malformed: {e.__class__.__name__}: {e}",
             event=event,
         ) from e
-    return record
+    return records
+
+
+def process_sqs_message(env: str, message):
+    if "Messages" not in message:
+        print("No messages in queue")
+        logging.debug(message)
+        raise NoMessagesInReviewQueue()
+    return sqs_message_records(message["Messages"][0])[0]
 
 
 def send_sqs_message(env: str, message: str):
@@ -80,6 +138,24 @@ def get_parameter(env: str, path: str):
     return aws[env].ssm.get_parameter(Name=path)
 
 
+def get_parameters(env: str, paths: list[str]):
+    return aws[env].ssm.get_parameters(Names=paths, WithDecryption=False)
+
+
+def describe_parameter_names(env: str) -> Iterator[str]:
+    """Names of every parameter under `/{env}/`, read from parameter metadata rather than values"""
+    paginator = aws[env].ssm.get_paginator("describe_parameters")
+    pages = paginator.paginate(
+        ParameterFilters=[
+            {"Key": "Path", "Option": "Recursive", "Values": [f"/{env}"]}
+        ],
+        PaginationConfig={"PageSize": SSM_DESCRIBE_PARAMETERS_MAX},
+    )
+    for page in pages:
+        for parameter in page["Parameters"]:
+            yield parameter["Name"]
+
+
 def upload_s3_obj(obj, key, env, bucket=None):
     bucket = bucket or get_bucket_name(env=env)
     return aws[env].s3.upload_fileobj(obj, Bucket=bucket, Key=key)
@@ -110,43 +186,52 @@ class ClientInterface(ABC):
 
 
 class AWSClientManager(ClientInterface):
-    _clients: dict[str, BaseClient] = {}
-
-    def __init__(self, env):
+    def __init__(self, env, profile_section: Optional[str] = None):
+        """Clients for `env`, using the preferred profile for `env` unless `profile_section` is given"""
         self.env = env
-        self.profile_name = AWS_CFG.get_profile_name_for_env(env).split(" ").pop()
-        self.profile = AWS_CFG.profiles[AWS_CFG.get_profile_name_for_env(env)]
+        if profile_section is None:
+            profile_section = AWS_CFG.get_profile_name_for_env(env)
+        self.profile_name = profile_section.split(" ").pop()
+        self.profile = AWS_CFG.profiles[profile_section]
         self.region = self.profile.get(
             "region", self.profile.get(AWS_SSO_REGION_KEY, AWS_DEFAULT_REGION)
         )
-        self.session = boto3.Session(profile_name=self.profile_name)
+        self.session = SESSIONS.session(self.profile_name)
+
+    def credential_expiry(self) -> Optional[datetime]:
+        """Expiry of this profile's credentials, from the credentials file or the session's refreshable credentials"""
+        expiry = AWS_CFG.credential_expiry(self.profile_name)
+        if expiry is None:
+            credentials = self.session.get_credentials()
+            expiry = getattr(credentials, "_expiry_time", None)
+        return expiry
 
     def _new_client(self, service):
-        if service not in self._clients:
-            logging.debug(f"Creating new client for {service} in {self.env}")
-            region = self.profile.get("sso_region", self.profile.get("region"))
-            new_client = self.session.client(service, region_name=region)
-            self._clients[service] = new_client
-        else:
-            logging.debug(f"Client for {service} in {self.env} already exists")
-        return self._clients[service]
+        key = ClientKey(
+            env=self.env,
+            profile=self.profile_name,
+            region=self.region,
+            service=service,
+        )
+        return CLIENT_REGISTRY.client(self.session, key)
 
     def __getattribute__(self, name: str):
-        logging.debug(f"Getting AWSClientManager().{name}")
-        if name in boto3.Session().get_available_services():
+        if name in SUPPORTED_SERVICES:
+            logging.debug(f"Getting AWSClientManager().{name}")
             error_message = f"Could not get client for {name}."
             try:
-                object.__getattribute__(self, "_new_client")(name)
+                return object.__getattribute__(self, "_new_client")(name)
             except UnknownServiceError as e:
                 raise AttributeError(error_message + " Not a valid service.") from e
             except Exception as e:
                 raise AttributeError(error_message) from e
-            return object.__getattribute__(self, "_clients")[name]
         return object.__getattribute__(self, name)
 
 
 class EnvManager:
     _client_managers: dict[str, BaseClient] = {}
+    _profile_managers: dict[str, AWSClientManager] = {}
+    _profile_managers_lock = Lock()
 
     def _new_client_manager(self, env):
         if env not in self._client_managers:
@@ -165,5 +250,34 @@ class EnvManager:
             return self._new_client_manager(key)
         return self._client_managers[key]
 
+    def profile(self, profile_name: str) -> AWSClientManager:
+        """Client manager for a specific profile (without the `profile ` prefix), rather than an env's preferred one"""
+        profile_section = f"profile {profile_name}"
+        if profile_section not in AWS_CFG.profiles:
+            raise KeyError(f"`{profile_name}` is not a profile in your AWS config")
+        with self._profile_managers_lock:
+            if profile_name not in self._profile_managers:
+                logging.debug(f"Creating new client manager for profile {profile_name}")
+                self._profile_managers[profile_name] = AWSClientManager(
+                    env=profile_name, profile_section=profile_section
+                )
+            return self._profile_managers[profile_name]
+
+    @staticmethod
+    def stats() -> dict[str, int]:
+        """Number of boto3 sessions and clients created so far by this process, and client registry hits/misses"""
+        registry_stats = CLIENT_REGISTRY.stats()
+        return {
+            "sessions": SESSIONS.created,
+            "clients": registry_stats["misses"],
+            **registry_stats,
+        }
+
+
+def _log_client_stats():
+    logging.debug(f"AWS sessions/clients created: {EnvManager.stats()}")
+
+
+atexit.register(_log_client_stats)
 
 aws = EnvManager()
@@ -1,8 +1,10 @@
 import json
 import logging
+import shutil
 from collections import defaultdict
 from configparser import RawConfigParser
 from datetime import datetime, timezone
+from hashlib import sha256
 from pathlib import PosixPath
 from typing import Optional
 
@@ -11,12 +13,14 @@ from dateutil.parser import isoparse
 from cli.constants import (
     AWS_GOOGLE_ROLE_KEY,
     ENV_TO_AWS_ACCOUNT,
+    ENVIRONMENTS,
     PRIORITY_BY_ROLE,
     STAGE_ON_PROD_ACCOUNT,
 )
 from cli.services.aws.constants import (
     AWS_ACCESS_TOKEN_CACHE_DIR_PATH,
     AWS_CONFIG_FILE_PATH,
+    AWS_CREDENTIAL_FILE_PATH,
     AWS_SSO_ACCOUNT_ID_KEY,
     AWS_SSO_ROLE_KEY,
     BACKUP_SUFFIX,
@@ -30,107 +34,305 @@ from cli.services.aws.exceptions import (
     NoCachedTokens,
     NoValidProfileError,
 )
+from cli.services.aws.token_index import TokenIndex
+from cli.services.cache_service import (
+    cache_path,
+    file_lock,
+    read_json_cache,
+    write_bytes_atomic,
+    write_json_cache,
+)
 from cli.types import SimpleNestedDict
 
+CONFIG_INDEX_CACHE_NAME = "aws-config-index.json"
+CONFIG_INDEX_CACHE_VERSION = 2
+
 
 def load_config_from_file(file=AWS_CONFIG_FILE_PATH):
     config = RawConfigParser()
     config.clear()
-    config.read(AWS_CONFIG_FILE_PATH)
+    config.read(file)
     return config
 
 
+def load_credentials_from_file(file=AWS_CREDENTIAL_FILE_PATH):
+    credentials = RawConfigParser()
+    credentials.read(file)
+    return credentials
+
+
 def get_ttl(expiry):
     return expiry - datetime.now(tz=timezone.utc)
 
 
+def parse_expiration(value) -> Optional[datetime]:
+    """Parses `aws_session_expiration`, which is epoch milliseconds as returned by SSO or an ISO 8601 string"""
+    if value is None or value == "":
+        return None
+    try:
+        if str(value).isdigit():
+            return datetime.fromtimestamp(int(value) / 1000, tz=timezone.utc)
+        expiry = isoparse(str(value))
+    except ValueError:
+        logging.debug(f"Could not parse expiration {value}")
+        return None
+    if expiry.tzinfo is None:
+        expiry = expiry.replace(tzinfo=timezone.utc)
+    return expiry
+
+
+class ConfigIndex:
+    """Sections of one parsed config, split into profiles and front matter, plus lookups for resolving profiles
+
+    `by_account` maps account -> role priority -> profile names and `profile_for_env` is the resolved profile for each
+    env. `signature` is the config file's signature when it was read from the file.
+    """
+
+    def __init__(
+        self,
+        sections: SimpleNestedDict,
+        by_account: dict[str, dict[int, list[str]]],
+        profile_for_env: dict[str, str],
+        signature: Optional[tuple[int, int, int]] = None,
+    ):
+        self.signature = signature
+        self.sections = sections
+        self.front_matter: SimpleNestedDict = {}
+        self.profiles: SimpleNestedDict = {}
+        for name, section in sections.items():
+            if name.lower().startswith("profile"):
+                self.profiles[name] = section
+            elif not name == "DEFAULT":
+                self.front_matter[name] = section
+        self.by_account = by_account
+        self.profile_for_env = profile_for_env
+
+    @classmethod
+    def from_sections(
+        cls,
+        sections: SimpleNestedDict,
+        signature: Optional[tuple[int, int, int]] = None,
+    ):
+        by_account: dict[str, dict[int, list[str]]] = defaultdict(
+            lambda: defaultdict(list)
+        )
+        for profile_name, profile in sections.items():
+            if not profile_name.lower().startswith("profile"):
+                continue
+            account_id = AWSConfigService._account_of_profile(profile)
+            if not account_id:
+                continue
+            try:
+                priority = AWSConfigService._priority_of_profile(profile)
+            except (InvalidProfile, KeyError):
+                logging.debug(f"Not indexing {profile_name}, its role is not known")
+                continue
+            by_account[account_id][priority].append(profile_name)
+        by_account = {
+            account_id: dict(by_priority)
+            for account_id, by_priority in by_account.items()
+        }
+        profile_for_env: dict[str, str] = {}
+        for env in ENVIRONMENTS:
+            by_priority = by_account.get(account_for_env(env), {})
+            if by_priority:
+                profile_for_env[env] = by_priority[min(by_priority)][0]
+        return cls(sections, by_account, profile_for_env, signature=signature)
+
+    @classmethod
+    def from_config(
+        cls,
+        config: RawConfigParser,
+        signature: Optional[tuple[int, int, int]] = None,
+    ):
+        sections = {section: dict(config[section].items()) for section in config}
+        return cls.from_sections(sections, signature=signature)
+
+    def to_dict(self) -> dict:
+        """The index as plain data for `from_dict`, which doesn't depend on this class's layout"""
+        return {
+            "sections": self.sections,
+            # JSON object keys are strings
+            "by_account": {
+                account_id: {
+                    str(priority): names for priority, names in by_priority.items()
+                }
+                for account_id, by_priority in self.by_account.items()
+            },
+            "profile_for_env": self.profile_for_env,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, signature: Optional[tuple[int, int, int]] = None):
+        by_account = {
+            account_id: {
+                int(priority): names for priority, names in by_priority.items()
+            }
+            for account_id, by_priority in data["by_account"].items()
+        }
+        return cls(
+            data["sections"], by_account, data["profile_for_env"], signature=signature
+        )
+
+
+def account_for_env(env: str) -> str:
+    env = env.lower()
+    if STAGE_ON_PROD_ACCOUNT:
+        if env == "stage":
+            env = "prod"
+    return ENV_TO_AWS_ACCOUNT[env]
+
+
+def file_signature(file: PosixPath) -> Optional[tuple[int, int, int]]:
+    """(mtime, size, inode) of `file`, which changes whenever the file is rewritten, or None if it doesn't exist"""
+    try:
+        stat = file.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def index_inputs_digest() -> str:
+    """Digest of the constants `ConfigIndex` resolves profiles with, so a cached index isn't used once they change"""
+    inputs = [ENV_TO_AWS_ACCOUNT, PRIORITY_BY_ROLE, STAGE_ON_PROD_ACCOUNT]
+    return sha256(json.dumps(inputs, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def load_cached_index(
+    signature: tuple[int, int, int], file: PosixPath
+) -> Optional[ConfigIndex]:
+    """The index cached by `store_cached_index`, if neither `file` nor the constants it was built with have changed
+
+    An unchanged signature is trusted; otherwise the file's digest is compared, since e.g. `touch` changes the mtime
+    without changing the content.
+    """
+    cached = read_json_cache(CONFIG_INDEX_CACHE_NAME)
+    if (
+        not isinstance(cached, dict)
+        or cached.get("version") != CONFIG_INDEX_CACHE_VERSION
+        or cached.get("inputs") != index_inputs_digest()
+    ):
+        return None
+    try:
+        index = ConfigIndex.from_dict(cached["index"], signature=signature)
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        logging.debug(f"Ignoring unreadable config index cache: {e}")
+        return None
+    if tuple(cached.get("signature") or ()) != signature:
+        if cached.get("digest") != file_digest(file):
+            return None
+        store_cached_index(index, cached["digest"])
+    logging.debug(f"Using cached index of {file}")
+    return index
+
+
+def store_cached_index(index: ConfigIndex, digest: Optional[str]):
+    data = {
+        "version": CONFIG_INDEX_CACHE_VERSION,
+        "inputs": index_inputs_digest(),
+        "digest": digest,
+        "signature": index.signature,
+        "index": index.to_dict(),
+    }
+    try:
+        write_json_cache(CONFIG_INDEX_CACHE_NAME, data)
+    except OSError as e:
+        logging.debug(f"Could not cache config index: {e}")
+
+
+def file_digest(file: PosixPath) -> Optional[str]:
+    try:
+        return sha256(file.read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
 class AWSConfigService:
-    _config: Optional[RawConfigParser] = None
-    _front: dict[int, SimpleNestedDict] = {}
-    _profiles: dict[int, SimpleNestedDict] = {}
+    _credentials: Optional[SimpleNestedDict] = None
+    _index: Optional[ConfigIndex] = None
 
     def _reset(self):
-        self._config = None
-        self._front: dict[int, SimpleNestedDict] = {}
-        self._profiles: dict[int, SimpleNestedDict] = {}
-
-    @property
-    def _aws_config(self):
-        if not self._config:
-            self._config = load_config_from_file()
-        return self._config
+        self._credentials = None
+        self._index = None
 
     @property
-    def _aws_config_hash(self):
-        items = {
-            f"{profile_name}:{k}:{v}"
-            for profile_name, profile in self._aws_config.items()
-            for k, v in profile.items()
-        }
-        return hash(frozenset(items))
+    def _config_index(self) -> ConfigIndex:
+        signature = file_signature(AWS_CONFIG_FILE_PATH)
+        if self._index is not None and self._index.signature == signature:
+            return self._index
+        if signature is None:
+            # Nothing to cache, but the parser still decides what an empty or missing config looks like
+            self._index = ConfigIndex.from_config(load_config_from_file())
+            return self._index
+        self._index = load_cached_index(signature, file=AWS_CONFIG_FILE_PATH)
+        if self._index is None:
+            logging.debug(f"Parsing {AWS_CONFIG_FILE_PATH}")
+            digest = file_digest(AWS_CONFIG_FILE_PATH)
+            self._index = ConfigIndex.from_config(
+                load_config_from_file(), signature=signature
+            )
+            store_cached_index(self._index, digest)
+        return self._index
 
     @property
     def front_matter(self):
-        key = self._aws_config_hash
-        if key not in self._front:
-            self._front[key] = {
-                section: {k: v for k, v in self._aws_config[section].items()}
-                for section in self._aws_config
-                if not section.lower().startswith("profile")
-                and not section == "DEFAULT"
-            }
-        return self._front[key]
+        return self._config_index.front_matter
 
     @property
     def profiles(self):
-        key = self._aws_config_hash
-        if key not in self._profiles:
-            self._profiles[key] = {
-                section: {k: v for k, v in self._aws_config[section].items()}
-                for section in self._aws_config
-                if section.lower().startswith("profile")
+        return self._config_index.profiles
+
+    @property
+    def credentials(self) -> SimpleNestedDict:
+        """Sections of the shared credentials file, keyed by profile name (without the `profile ` prefix)"""
+        if self._credentials is None:
+            credentials = load_credentials_from_file()
+            self._credentials = {
+                section: dict(credentials[section].items())
+                for section in credentials.sections()
             }
-        return self._profiles[key]
+        return self._credentials
+
+    def credential_expiry(self, profile_name: str) -> Optional[datetime]:
+        return parse_expiration(
+            self.credentials.get(profile_name, {}).get("aws_session_expiration")
+        )
 
     @staticmethod
-    def _sso_cache():
-        return set(AWS_ACCESS_TOKEN_CACHE_DIR_PATH.glob("*.json"))
+    def _sso_cache(index: TokenIndex) -> set[PosixPath]:
+        return index.paths()
 
     @staticmethod
     def backup_file(file: PosixPath):
-        backup_path = file.with_suffix(
-            BACKUP_SUFFIX.format(timestamp=str(int(datetime.utcnow().timestamp())))
+        timestamp = str(int(datetime.utcnow().timestamp()))
+        backup_path = file.with_name(
+            f"{file.name}.{BACKUP_SUFFIX.format(timestamp=timestamp)}"
         )
-        file.rename(backup_path)
+        # Copied rather than renamed, so there's never a moment without the file
+        shutil.copy2(file, backup_path)
         logging.info(
             f"Saved backup: {file.parent}/{{{file.name} -> {backup_path.name}}}"
         )
 
     @staticmethod
     def cleanup_older_backups(file: PosixPath):
-        backups = file.parent.glob(BACKUP_SUFFIX.format(timestamp="*"))
-        by_mtime = {f.stat().st_mtime: f for f in backups}
-        mtimes = sorted(by_mtime.keys())
-        to_delete = max(len(mtimes) - MAX_BACKUPS, 0)
-        for i in range(to_delete):
-            mtime = mtimes[i]
-            by_mtime[mtime].unlink()
-        print(f"Removed {to_delete} older backups of {file}")
+        backups = file.parent.glob(f"{file.name}.{BACKUP_SUFFIX.format(timestamp='*')}")
+        # The timestamps in the names have the same number of digits, so they sort by age
+        by_age = sorted(backups)
+        to_delete = by_age[: max(len(by_age) - MAX_BACKUPS, 0)]
+        for backup in to_delete:
+            backup.unlink(missing_ok=True)
+        if to_delete:
+            logging.info(f"Removed {len(to_delete)} older backups of {file}")
 
     @staticmethod
     def write_sections_to_file(
         sections: SimpleNestedDict,
         file: WriteableFiles,
         overwrite=False,
+        backup=True,
     ):
         _file = file.value
-        if _file.exists():
-            if not overwrite:
-                raise FileExistsError()
-            else:
-                AWSConfigService.backup_file(_file)
-
-        total_bytes_written = 0
         front = []
         profiles = []
         for name in sections:
@@ -141,62 +343,78 @@ class AWSConfigService:
         front = sorted(front)
         profiles = sorted(profiles)
         sections_sorted = front + profiles
-        with _file.open(mode="w+") as f:
-            for name in sections_sorted:
-                section = sections[name]
-                total_bytes_written += f.write(f"[{name}]\n")
-                for key, value in section.items():
-                    f.write(f"{key} = {value}\n")
-                total_bytes_written += f.write("\n")
-        return total_bytes_written
+        lines = []
+        for name in sections_sorted:
+            section = sections[name]
+            lines.append(f"[{name}]\n")
+            for key, value in section.items():
+                lines.append(f"{key} = {value}\n")
+            lines.append("\n")
+        data = "".join(lines).encode("utf-8")
+
+        # Concurrent `dev` processes take turns, so backups don't race and each write replaces a complete file
+        with file_lock(cache_path(f"{_file.name}.lock")):
+            if _file.exists():
+                if not overwrite:
+                    raise FileExistsError()
+                elif backup:
+                    AWSConfigService.backup_file(_file)
+                    AWSConfigService.cleanup_older_backups(_file)
+            # Readers (e.g., other processes using the credentials) never see a partially written file
+            write_bytes_atomic(_file, data)
+        return len(data)
 
     @classmethod
     def get_latest_token(cls, files: set[PosixPath] = None) -> str:
-        if files is None:
-            _files: set[PosixPath] = cls._sso_cache()
-        else:
-            _files = files
-        newest_ts = 0.0
-        newest_file_path: Optional[PosixPath] = None
-        for file in _files:
-            if file.stat().st_mtime > newest_ts:
-                newest_ts = file.stat().st_mtime
-                newest_file_path = file
-        if not newest_file_path:
-            raise NoCachedTokens(
-                "No valid tokens were found. Please run dev sso login."
+        """Access token from the newest SSO cache file whose token doesn't expire within `MIN_TTL`"""
+        token, _expiry = cls.latest_token(files)
+        return token
+
+    @classmethod
+    def latest_token(cls, files: set[PosixPath] = None) -> tuple[str, datetime]:
+        """Like `get_latest_token`, but also returns when the token expires"""
+        index = TokenIndex(AWS_ACCESS_TOKEN_CACHE_DIR_PATH)
+        entries = index.update(cls._sso_cache(index) if files is None else files)
+        index.save()
+        newest_valid: Optional[tuple[int, PosixPath]] = None
+        newest_expiry: Optional[tuple[int, datetime]] = None
+        for file, entry in entries.items():
+            if not entry.has_access_token or not entry.expires_at:
+                logging.debug(f"File does not contain accessToken, skipping ({file})")
+                continue
+            expiry = isoparse(entry.expires_at)
+            if get_ttl(expiry) < MIN_TTL:
+                if newest_expiry is None or entry.mtime_ns > newest_expiry[0]:
+                    newest_expiry = (entry.mtime_ns, expiry)
+                continue
+            if newest_valid is None or entry.mtime_ns > newest_valid[0]:
+                newest_valid = (entry.mtime_ns, file)
+        if newest_valid is None:
+            if newest_expiry is None:
+                raise NoCachedTokens(
+                    "No valid tokens were found. Please run dev sso login."
+                )
+            _mtime, expiry = newest_expiry
+            message = (
+                f"Token expired or expiring soon ({expiry.isoformat(timespec='minutes')}). Please login again with"
+                + " `dev sso login`"
             )
-        with newest_file_path.open() as f:
+            raise ExpiredCredentials(message, expires=expiry)
+        _mtime, file = newest_valid
+        with file.open() as f:
             token_data = json.load(f)
-        if "accessToken" not in token_data:
-            logging.debug(
-                f"File does not contain accessToken, getting next newest file ({newest_file_path})"
-            )
-            _files.remove(newest_file_path)
-            return cls.get_latest_token(files=_files)
         expiry = isoparse(token_data["expiresAt"])
-        ttl = get_ttl(expiry)
-        logging.debug(f"Token TTL: {ttl}")
-        if ttl < MIN_TTL:
-            if len(list(_files)) <= 1:
-                message = (
-                    f"Token expired or expiring soon ({expiry.isoformat(timespec='minutes')}). Please login again with"
-                    + " `dev sso login`"
-                )
-                raise ExpiredCredentials(message, expires=expiry)
-            else:
-                _files.remove(newest_file_path)
-                return cls.get_latest_token(files=_files)
-        return token_data["accessToken"]
+        logging.debug(f"Token TTL: {get_ttl(expiry)}")
+        return token_data["accessToken"], expiry
 
     @staticmethod
-    def _profile_matches_account(profile: SimpleNestedDict, account_id):
-        profile_matches_sso: bool = (
-            AWS_SSO_ACCOUNT_ID_KEY in profile
-            and account_id == profile[AWS_SSO_ACCOUNT_ID_KEY]
-        )
-        profile_matches_google = account_id in profile.get(AWS_GOOGLE_ROLE_KEY, {})
-        return profile_matches_sso or profile_matches_google
+    def _account_of_profile(profile: dict[str, str]) -> Optional[str]:
+        if AWS_SSO_ACCOUNT_ID_KEY in profile:
+            return profile[AWS_SSO_ACCOUNT_ID_KEY]
+        if AWS_GOOGLE_ROLE_KEY in profile:
+            # arn:aws:iam::{account_id}:role/{role}
+            return profile[AWS_GOOGLE_ROLE_KEY].split(":")[-2]
+        return None
 
     @staticmethod
     def _priority_of_profile(profile):
@@ -214,18 +432,12 @@ class AWSConfigService:
     def get_profile_name_for_env(self, env: str, skip_priorities: set[int] = None):
         skip_priorities = skip_priorities or set()
         env = env.lower()
-        if STAGE_ON_PROD_ACCOUNT:
-            if env == "stage":
-                env = "prod"
-        account_id = ENV_TO_AWS_ACCOUNT[env]
-        profiles_for_account = defaultdict(list)
-        for profile_name, profile in self.profiles.items():
-            if self._profile_matches_account(profile=profile, account_id=account_id):
-                profiles_for_account[self._priority_of_profile(profile)].append(
-                    profile_name
-                )
+        if not skip_priorities and env in self._config_index.profile_for_env:
+            return self._config_index.profile_for_env[env]
+        account_id = account_for_env(env)
+        profiles_for_account = self._config_index.by_account.get(account_id, {})
         for priorty in sorted(profiles_for_account.keys()):
-            if priorty not in skip_priorities and priorty in profiles_for_account:
+            if priorty not in skip_priorities:
                 return profiles_for_account[priorty][0]
         raise NoValidProfileError(
             f"Could not find any valid profiles for {env} in your config."
@@ -234,8 +446,8 @@ class AWSConfigService:
 
     def as_dict(self):
         return {
-            section: {k: v for k, v in self._aws_config[section].items()}
-            for section in self._aws_config
+            section: dict(values)
+            for section, values in self._config_index.sections.items()
         }
 
 
@@ -9,6 +9,18 @@ AWS_SSO_ROLE_KEY = "sso_role_name"
 
 BACKUP_SUFFIX = "dev-cli-backup-{timestamp}"
 
+# Services that AWSClientManager exposes as attributes, e.g., `aws["qa"].ssm`
+SUPPORTED_SERVICES = frozenset({"s3", "sqs", "ssm", "sso", "sts"})
+
+# botocore `Config` options for every client in the registry; see ClientRegistry.configure to override
+DEFAULT_CLIENT_CONFIG = {
+    "max_pool_connections": 20,
+    "tcp_keepalive": True,
+    "connect_timeout": 5,
+    "read_timeout": 30,
+    "retries": {"mode": "adaptive", "max_attempts": 5},
+}
+
 GOOGLE_TO_AZURE_CONFIG_UPDATE_MAP: dict[str, dict[str, Union[str, list[str]]]] = {
     "admin": {
         "GOOGLE_ROLE": "GGL-Administrators",
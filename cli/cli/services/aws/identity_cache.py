@@ -0,0 +1,75 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Callable, Optional
+
+from cli.services.aws.config_service import get_ttl
+from cli.services.cache_service import read_json_cache, write_json_cache
+
+IDENTITY_CACHE_NAME = "identities.json"
+IDENTITY_FIELDS = ("UserId", "Account", "Arn")
+
+
+class IdentityCache:
+    """Caches `sts.get_caller_identity` results by profile and credential expiry
+
+    Results are kept in memory for the life of the process and, when the credential expiry is known, on disk until the
+    credentials expire. New credentials (i.e., a new expiry) always miss the cache.
+    """
+
+    def __init__(self, cache_name: str = IDENTITY_CACHE_NAME):
+        self.cache_name = cache_name
+        self._memory: dict[str, dict[str, str]] = {}
+        self._locks: defaultdict[str, Lock] = defaultdict(Lock)
+        self._locks_lock = Lock()
+
+    @staticmethod
+    def key(profile_name: str, expiry: Optional[datetime]):
+        return f"{profile_name}|{expiry.isoformat() if expiry else 'unknown'}"
+
+    def _lock_for(self, key: str) -> Lock:
+        with self._locks_lock:
+            return self._locks[key]
+
+    def get(
+        self,
+        profile_name: str,
+        expiry: Optional[datetime],
+        fetch: Callable[[], dict],
+    ) -> dict[str, str]:
+        key = self.key(profile_name, expiry)
+        with self._lock_for(key):
+            if key in self._memory:
+                return self._memory[key]
+            unexpired = expiry is not None and get_ttl(expiry) > timedelta(0)
+            if unexpired:
+                cached = read_json_cache(self.cache_name, default={}).get(key)
+                if cached:
+                    logging.debug(f"Using cached identity for {profile_name}")
+                    self._memory[key] = cached["identity"]
+                    return cached["identity"]
+            response = fetch()
+            identity = {field: response[field] for field in IDENTITY_FIELDS}
+            self._memory[key] = identity
+            if unexpired:
+                self._persist(key, identity, expiry)
+            return identity
+
+    def _persist(self, key: str, identity: dict[str, str], expiry: datetime):
+        entries = {
+            k: v
+            for k, v in read_json_cache(self.cache_name, default={}).items()
+            if get_ttl(datetime.fromisoformat(v["expires"])) > timedelta(0)
+        }
+        entries[key] = {"identity": identity, "expires": expiry.isoformat()}
+        try:
+            write_json_cache(self.cache_name, entries)
+        except OSError as e:
+            logging.debug(f"Could not persist identity cache: {e}")
+
+    def clear(self):
+        self._memory.clear()
+
+
+IDENTITY_CACHE = IdentityCache()
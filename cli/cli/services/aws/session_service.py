@@ -0,0 +1,64 @@
+import logging
+from threading import Lock
+from typing import Optional
+
+import boto3
+import botocore.session
+from botocore.configloader import build_profile_map
+
+from cli.services.aws.config_service import AWS_CFG
+
+
+class SessionFactory:
+    """Builds one boto3 session per profile from the config AWS_CFG has already parsed
+
+    Left to itself, every `boto3.Session(profile_name=...)` re-reads and re-parses the config files and loads its own
+    copy of botocore's data files. Sessions made here are cached per profile, seeded with one profile map built from
+    AWS_CFG, and share one botocore data loader (and therefore its cache of service models and endpoint data).
+    Credentials are left to botocore's provider chain, so SSO and other refreshable credentials are renewed for as
+    long as a session is cached.
+    """
+
+    def __init__(self):
+        self._sessions: dict[str, boto3.Session] = {}
+        self._data_loader = None
+        self._full_config: Optional[dict] = None
+        self._lock = Lock()
+        self.created = 0
+
+    def _botocore_config(self) -> dict:
+        """The equivalent of botocore's `Session.full_config`, built from AWS_CFG without the credentials"""
+        if self._full_config is None:
+            full_config = build_profile_map(AWS_CFG.as_dict())
+            # botocore rejects profiles missing from its config, but a profile may only be in the credentials file
+            for profile_name in AWS_CFG.credentials:
+                full_config["profiles"].setdefault(profile_name, {})
+            self._full_config = full_config
+        return self._full_config
+
+    def session(self, profile_name: str) -> boto3.Session:
+        with self._lock:
+            if profile_name not in self._sessions:
+                self._sessions[profile_name] = self._new_session(profile_name)
+            return self._sessions[profile_name]
+
+    def _new_session(self, profile_name: str) -> boto3.Session:
+        logging.debug(f"Creating new session for {profile_name}")
+        core = botocore.session.Session(profile=profile_name)
+        # Not a public interface, but botocore only reads the config files to fill this in
+        core._config = self._botocore_config()
+        if self._data_loader is None:
+            self._data_loader = core.get_component("data_loader")
+        else:
+            core.register_component("data_loader", self._data_loader)
+        self.created += 1
+        return boto3.Session(botocore_session=core)
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+            self._full_config = None
+            self.created = 0
+
+
+SESSIONS = SessionFactory()
@@ -0,0 +1,117 @@
+import json
+import logging
+from os import stat_result
+from pathlib import PosixPath
+from typing import NamedTuple, Optional
+
+from cli.services.cache_service import read_json_cache, write_json_cache
+
+TOKEN_INDEX_CACHE_NAME = "sso-token-index.json"
+TOKEN_INDEX_CACHE_VERSION = 1
+
+
+class TokenEntry(NamedTuple):
+    mtime_ns: int
+    size: int
+    expires_at: Optional[str]
+    has_access_token: bool
+
+
+def read_token_entry(file: PosixPath, stat: stat_result) -> TokenEntry:
+    try:
+        with file.open() as f:
+            token_data = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.debug(f"Ignoring unreadable token cache file {file}: {e}")
+        token_data = {}
+    if not isinstance(token_data, dict):
+        token_data = {}
+    return TokenEntry(
+        mtime_ns=stat.st_mtime_ns,
+        size=stat.st_size,
+        expires_at=token_data.get("expiresAt"),
+        has_access_token="accessToken" in token_data,
+    )
+
+
+class TokenIndex:
+    """Index of an SSO token cache directory: modification time, `expiresAt` and whether there is an `accessToken`
+    for each file
+
+    The file listing is reused while the directory's mtime is unchanged. A file is only read again when its own mtime
+    or size changes, since the AWS CLI rewrites token files in place, which doesn't touch the directory. Tokens
+    themselves are never stored in the index.
+    """
+
+    def __init__(self, directory: PosixPath):
+        self.directory = directory
+        cached = read_json_cache(TOKEN_INDEX_CACHE_NAME, default={})
+        if (
+            not isinstance(cached, dict)
+            or cached.get("version") != TOKEN_INDEX_CACHE_VERSION
+            or cached.get("directory") != str(directory)
+        ):
+            cached = {}
+        self.directory_mtime_ns: Optional[int] = cached.get("directory_mtime_ns")
+        self.entries: dict[str, TokenEntry] = {
+            path: TokenEntry(*entry)
+            for path, entry in cached.get("entries", {}).items()
+        }
+        self._changed = False
+
+    def paths(self) -> set[PosixPath]:
+        try:
+            mtime_ns = self.directory.stat().st_mtime_ns
+        except FileNotFoundError:
+            return set()
+        if mtime_ns == self.directory_mtime_ns:
+            return {PosixPath(path) for path in self.entries}
+        logging.debug(f"{self.directory} changed, listing token files")
+        self.directory_mtime_ns = mtime_ns
+        self._changed = True
+        files = set(self.directory.glob("*.json"))
+        # Forget files that were removed; new ones are indexed by `update`
+        listed = {str(file) for file in files}
+        self.entries = {
+            path: entry for path, entry in self.entries.items() if path in listed
+        }
+        return files
+
+    def update(self, files: set[PosixPath]) -> dict[PosixPath, TokenEntry]:
+        """Entries for `files`, reading only the files that are new or changed since they were last indexed
+
+        The entries are merged into the index, so indexing a subset of the directory keeps the other files' entries.
+        """
+        indexed: dict[PosixPath, TokenEntry] = {}
+        for file in files:
+            try:
+                stat = file.stat()
+            except FileNotFoundError:
+                if self.entries.pop(str(file), None) is not None:
+                    self._changed = True
+                continue
+            entry = self.entries.get(str(file))
+            if entry is None or (entry.mtime_ns, entry.size) != (
+                stat.st_mtime_ns,
+                stat.st_size,
+            ):
+                entry = read_token_entry(file, stat)
+                self.entries[str(file)] = entry
+                self._changed = True
+            indexed[file] = entry
+        return indexed
+
+    def save(self):
+        if not self._changed:
+            return
+        data = {
+            "version": TOKEN_INDEX_CACHE_VERSION,
+            "directory": str(self.directory),
+            "directory_mtime_ns": self.directory_mtime_ns,
+            "entries": {path: list(entry) for path, entry in self.entries.items()},
+        }
+        try:
+            write_json_cache(TOKEN_INDEX_CACHE_NAME, data)
+        except OSError as e:
+            logging.debug(f"Could not cache token index: {e}")
+        self._changed = False
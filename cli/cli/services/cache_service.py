@@ -0,0 +1,57 @@
+import fcntl
+import json
+import logging
+import os
+from contextlib import contextmanager
+from pathlib import PosixPath
+from tempfile import NamedTemporaryFile
+from typing import Any
+
+CACHE_DIR_PATH = (
+    PosixPath(os.environ.get("XDG_CACHE_HOME", "~/.cache")).expanduser() / "dev-cli"
+)
+
+
+def cache_path(name: str) -> PosixPath:
+    """Path of `name` in the dev-cli cache directory, which is created if it doesn't exist"""
+    CACHE_DIR_PATH.mkdir(mode=0o700, parents=True, exist_ok=True)
+    return CACHE_DIR_PATH / name
+
+
+def write_bytes_atomic(path: PosixPath, data: bytes):
+    """Writes `data` to a temp file next to `path`, then renames it over `path`, so readers never see a partial file"""
+    with NamedTemporaryFile(
+        mode="wb", dir=path.parent, prefix=f".{path.name}.", delete=False
+    ) as f:
+        f.write(data)
+        tmp_path = PosixPath(f.name)
+    os.chmod(tmp_path, 0o600)
+    os.replace(tmp_path, path)
+
+
+def read_json_cache(name: str, default: Any = None) -> Any:
+    path = cache_path(name)
+    try:
+        with path.open() as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except (OSError, ValueError) as e:
+        logging.debug(f"Ignoring unreadable cache file {path}: {e}")
+        return default
+
+
+def write_json_cache(name: str, data: Any):
+    write_bytes_atomic(cache_path(name), json.dumps(data).encode("utf-8"))
+
+
+@contextmanager
+def file_lock(path: PosixPath):
+    """Exclusive lock on `path` (created if needed), held until the block exits, including by other processes"""
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    with path.open("a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
@@ -1,5 +1,25 @@
+from datetime import timedelta
 from enum import Enum
 
+MAX_CREDENTIAL_WORKERS = 8
+LOGIN_LOCK_NAME = "sso-login.lock"
+DEFAULT_CREDENTIAL_SERVER_PORT = 9911
+CREDENTIAL_REFRESH_INTERVAL_SECONDS = 60
+# `dev sso login --watch` refreshes credentials this long before their TTL drops below MIN_TTL
+REFRESH_LEAD = timedelta(minutes=1)
+# AWS SDKs refresh credentials from a process or container endpoint once they have less than 15 minutes left, so
+# credentials handed to them need more than that (with room for the serve-credentials refresh interval)
+SDK_MIN_TTL = timedelta(minutes=20)
+REFRESH_BACKOFF_MIN = timedelta(seconds=30)
+REFRESH_BACKOFF_MAX = timedelta(minutes=15)
+DISCOVERY_CACHE_TTL = timedelta(days=1)
+OIDC_CLIENT_NAME = "dev-cli"
+OIDC_CLIENT_TYPE = "public"
+# IAM Identity Center only issues refresh tokens to clients registered with this scope
+OIDC_CLIENT_SCOPES = ["sso:account:access"]
+OIDC_DEVICE_GRANT = "urn:ietf:params:oauth:grant-type:device_code"
+OIDC_REFRESH_GRANT = "refresh_token"
+
 
 class OutputFormats(str, Enum):
     JSON = "json"
@@ -0,0 +1,95 @@
+import logging
+from typing import Optional
+
+from cli.services.aws.config_service import AWS_CFG, get_ttl, parse_expiration
+from cli.services.aws.exceptions import NoSuchProfile
+from cli.services.cache_service import (
+    cache_path,
+    file_lock,
+    read_json_cache,
+    write_json_cache,
+)
+from cli.sso.constants import SDK_MIN_TTL
+
+CREDENTIAL_CACHE_NAME = "role-credentials.json"
+
+_CREDENTIALS: dict[str, dict[str, str]] = {}
+
+
+def profile_section_name(profile_name: str) -> str:
+    return profile_name if profile_name == "default" else f"profile {profile_name}"
+
+
+def is_fresh(credential: Optional[dict]) -> bool:
+    if not credential:
+        return False
+    expiry = parse_expiration(credential.get("aws_session_expiration"))
+    return expiry is not None and get_ttl(expiry) >= SDK_MIN_TTL
+
+
+def cached_credentials(profile_name: str) -> Optional[dict[str, str]]:
+    """Credentials for `profile_name` with at least `SDK_MIN_TTL` left, from memory, the role credentials cache or the
+    credentials file"""
+    if is_fresh(_CREDENTIALS.get(profile_name)):
+        return _CREDENTIALS[profile_name]
+    for source in (
+        read_json_cache(CREDENTIAL_CACHE_NAME, default={}),
+        AWS_CFG.credentials,
+    ):
+        credential = source.get(profile_name)
+        if is_fresh(credential):
+            _CREDENTIALS[profile_name] = credential
+            return credential
+    return None
+
+
+def store_credentials(profile_name: str, credential: dict[str, str]):
+    _CREDENTIALS[profile_name] = credential
+    try:
+        # Other profiles may be stored at the same time, by this process or another one
+        with file_lock(cache_path(f"{CREDENTIAL_CACHE_NAME}.lock")):
+            cached = read_json_cache(CREDENTIAL_CACHE_NAME, default={})
+            cached = {name: c for name, c in cached.items() if is_fresh(c)}
+            cached[profile_name] = credential
+            write_json_cache(CREDENTIAL_CACHE_NAME, cached)
+    except OSError as e:
+        logging.debug(f"Could not cache credentials for {profile_name}: {e}")
+
+
+def get_credentials(profile_name: str) -> dict[str, str]:
+    """Credentials for `profile_name`, fetched from AWS SSO only when no cached credentials have `SDK_MIN_TTL` left
+
+    Raises `NeedAuth` if there's no valid SSO token.
+    """
+    credential = cached_credentials(profile_name)
+    if credential is not None:
+        logging.debug(f"Using cached credentials for {profile_name}")
+        return credential
+    section_name = profile_section_name(profile_name)
+    if section_name not in AWS_CFG.profiles:
+        raise NoSuchProfile(f"Profile {profile_name} does not exist")
+    # boto3 is only needed on a cache miss
+    from cli.sso.device_auth import with_renewal
+    from cli.sso.utils import get_role_credentials
+
+    _credential_name, credential = get_role_credentials(
+        profile=AWS_CFG.profiles[section_name],
+        token=with_renewal(AWS_CFG.get_latest_token),
+        profile_name=section_name,
+    )
+    store_credentials(profile_name, credential)
+    return credential
+
+
+def to_credential_process_output(credential: dict[str, str]) -> dict:
+    """`credential` in the format AWS SDKs expect from a `credential_process`"""
+    output = {
+        "Version": 1,
+        "AccessKeyId": credential["aws_access_key_id"],
+        "SecretAccessKey": credential["aws_secret_access_key"],
+        "SessionToken": credential["aws_session_token"],
+    }
+    expiry = parse_expiration(credential.get("aws_session_expiration"))
+    if expiry is not None:
+        output["Expiration"] = expiry.isoformat()
+    return output
@@ -0,0 +1,144 @@
+import json
+import logging
+import secrets
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Event, Lock, Thread
+from typing import Callable, Optional
+from urllib.parse import unquote, urlparse
+
+from cli.services.aws.config_service import parse_expiration
+from cli.services.aws.exceptions import NeedAuth, NoSuchProfile
+from cli.sso.constants import CREDENTIAL_REFRESH_INTERVAL_SECONDS
+from cli.sso.credential_process import get_credentials
+
+
+def to_container_credentials(credential: dict[str, str]) -> dict[str, str]:
+    """`credential` in the format AWS SDKs expect from `AWS_CONTAINER_CREDENTIALS_FULL_URI`"""
+    output = {
+        "AccessKeyId": credential["aws_access_key_id"],
+        "SecretAccessKey": credential["aws_secret_access_key"],
+        "Token": credential["aws_session_token"],
+    }
+    expiry = parse_expiration(credential.get("aws_session_expiration"))
+    if expiry is not None:
+        output["Expiration"] = expiry.isoformat()
+    return output
+
+
+class CredentialProvider:
+    """Credentials for each profile that has been requested, refreshed by `refresh`
+
+    Served credentials have at least `SDK_MIN_TTL` left, and `refresh` renews them before they drop below it. So SDKs
+    in containers don't reach their own refresh window (15 minutes before expiry) and call back on every request.
+    """
+
+    def __init__(self, fetch: Callable[[str], dict[str, str]] = get_credentials):
+        self._fetch = fetch
+        self._lock = Lock()
+        self._profile_locks: dict[str, Lock] = {}
+        self.profiles: set[str] = set()
+
+    def _profile_lock(self, profile_name: str) -> Lock:
+        with self._lock:
+            return self._profile_locks.setdefault(profile_name, Lock())
+
+    def get(self, profile_name: str) -> dict[str, str]:
+        # One fetch at a time per profile, so concurrent requests for the same profile don't each call AWS SSO, and a
+        # slow one doesn't hold up the others
+        with self._profile_lock(profile_name):
+            credential = self._fetch(profile_name)
+        with self._lock:
+            self.profiles.add(profile_name)
+        return credential
+
+    def refresh(self):
+        with self._lock:
+            profile_names = sorted(self.profiles)
+        for profile_name in profile_names:
+            try:
+                self.get(profile_name)
+            except Exception as e:
+                # Keep refreshing the other profiles, and this one again on the next pass
+                logging.warning(
+                    f"Could not refresh credentials for {profile_name}: {e}"
+                )
+
+
+class CredentialServer(ThreadingHTTPServer):
+    """Serves credentials at `/{profile}`, compatible with `AWS_CONTAINER_CREDENTIALS_FULL_URI`
+
+    Requests must have `auth_token` in their `Authorization` header, which SDKs send from
+    `AWS_CONTAINER_AUTHORIZATION_TOKEN`.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        provider: CredentialProvider,
+        auth_token: Optional[str] = None,
+    ):
+        super().__init__(address, CredentialRequestHandler)
+        self.provider = provider
+        self.auth_token = auth_token or secrets.token_urlsafe(32)
+        self._stop_refreshing = Event()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def refresh_until_shutdown(
+        self, interval: float = CREDENTIAL_REFRESH_INTERVAL_SECONDS
+    ):
+        while not self._stop_refreshing.wait(interval):
+            self.provider.refresh()
+
+    def serve_forever(self, poll_interval: float = 0.5):
+        refresher = Thread(target=self.refresh_until_shutdown, daemon=True)
+        refresher.start()
+        try:
+            super().serve_forever(poll_interval)
+        finally:
+            self._stop_refreshing.set()
+
+
+class CredentialRequestHandler(BaseHTTPRequestHandler):
+    server: CredentialServer
+
+    def do_GET(self):
+        if not secrets.compare_digest(
+            self.headers.get("Authorization", ""), self.server.auth_token
+        ):
+            return self._respond(HTTPStatus.UNAUTHORIZED, {"message": "Unauthorized"})
+        profile_name = unquote(urlparse(self.path).path.strip("/"))
+        if not profile_name:
+            return self._respond(
+                HTTPStatus.NOT_FOUND, {"message": "Request /{profile name}"}
+            )
+        try:
+            credential = self.server.provider.get(profile_name)
+        except NoSuchProfile as e:
+            return self._respond(HTTPStatus.NOT_FOUND, {"message": str(e)})
+        except NeedAuth as e:
+            return self._respond(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                {"message": f"AWS SSO login needed, run `dev sso login`: {e}"},
+            )
+        except Exception as e:
+            logging.warning(f"Could not get credentials for {profile_name}: {e}")
+            return self._respond(HTTPStatus.BAD_GATEWAY, {"message": str(e)})
+        self._respond(HTTPStatus.OK, to_container_credentials(credential))
+
+    def _respond(self, status: HTTPStatus, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args):
+        logging.debug(f"{self.address_string()} {format % args}")
@@ -0,0 +1,241 @@
+import json
+import logging
+import time
+import webbrowser
+from datetime import datetime, timedelta, timezone
+from hashlib import sha1
+from pathlib import PosixPath
+from typing import Callable, Optional, TypeVar
+
+from botocore.exceptions import ClientError
+from dateutil.parser import isoparse
+
+from cli.constants import AWS_DEFAULT_REGION, AWS_SSO_REGION_KEY, AWS_SSO_START_URL
+from cli.services.aws.config_service import AWS_CFG
+from cli.services.aws.constants import AWS_ACCESS_TOKEN_CACHE_DIR_PATH, MIN_TTL
+from cli.services.aws.exceptions import NeedAuth
+from cli.services.cache_service import (
+    cache_path,
+    file_lock,
+    read_json_cache,
+    write_bytes_atomic,
+    write_json_cache,
+)
+from cli.sso.constants import (
+    OIDC_CLIENT_NAME,
+    OIDC_CLIENT_SCOPES,
+    OIDC_CLIENT_TYPE,
+    OIDC_DEVICE_GRANT,
+    OIDC_REFRESH_GRANT,
+)
+from cli.sso.exceptions import DeviceAuthorizationFailed
+from cli.sso.types import OIDCClientType
+from cli.sso.utils import sso_client
+
+OIDC_CLIENT_CACHE_NAME = "sso-oidc-clients.json"
+TOKEN_RENEWAL_LOCK_NAME = "sso-token-renewal.lock"
+
+T = TypeVar("T")
+
+
+def now() -> datetime:
+    return datetime.now(tz=timezone.utc)
+
+
+def from_epoch(seconds: int) -> datetime:
+    return datetime.fromtimestamp(seconds, tz=timezone.utc)
+
+
+def to_timestamp(value: datetime) -> str:
+    # The format the AWS CLI writes, which `get_latest_token` (and AWS SDKs) read
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def sso_session() -> tuple[str, str]:
+    """Start URL and region of the first profile configured for AWS SSO"""
+    for profile in AWS_CFG.profiles.values():
+        if "sso_start_url" in profile:
+            return profile["sso_start_url"], profile.get(
+                AWS_SSO_REGION_KEY, AWS_DEFAULT_REGION
+            )
+    return AWS_SSO_START_URL, AWS_DEFAULT_REGION
+
+
+def token_cache_path(start_url: str) -> PosixPath:
+    # Same file name as the AWS CLI uses, so either can reuse the other's token
+    return (
+        AWS_ACCESS_TOKEN_CACHE_DIR_PATH
+        / f"{sha1(start_url.encode('utf-8')).hexdigest()}.json"
+    )
+
+
+def registered_client(region: str) -> OIDCClientType:
+    """An OIDC client registration for `region`, reused from the cache until it's about to expire"""
+    clients = read_json_cache(OIDC_CLIENT_CACHE_NAME, default={})
+    # Keyed by scopes too, so clients registered before (or without) a scope aren't reused
+    key = " ".join([region, *OIDC_CLIENT_SCOPES])
+    client: Optional[OIDCClientType] = clients.get(key)
+    if client and from_epoch(client["clientSecretExpiresAt"]) - now() > MIN_TTL:
+        return client
+    logging.debug(f"Registering OIDC client in {region}")
+    r = sso_client(region, service="sso-oidc").register_client(
+        clientName=OIDC_CLIENT_NAME,
+        clientType=OIDC_CLIENT_TYPE,
+        scopes=OIDC_CLIENT_SCOPES,
+    )
+    client = OIDCClientType(
+        clientId=r["clientId"],
+        clientSecret=r["clientSecret"],
+        clientSecretExpiresAt=r["clientSecretExpiresAt"],
+    )
+    clients[key] = client
+    write_json_cache(OIDC_CLIENT_CACHE_NAME, clients)
+    return client
+
+
+def save_token(
+    start_url: str, region: str, client: OIDCClientType, token: dict
+) -> PosixPath:
+    data = {
+        "startUrl": start_url,
+        "region": region,
+        "accessToken": token["accessToken"],
+        "expiresAt": to_timestamp(now() + timedelta(seconds=token["expiresIn"])),
+        "clientId": client["clientId"],
+        "clientSecret": client["clientSecret"],
+        "registrationExpiresAt": to_timestamp(
+            from_epoch(client["clientSecretExpiresAt"])
+        ),
+    }
+    if token.get("refreshToken"):
+        data["refreshToken"] = token["refreshToken"]
+    else:
+        logging.debug("No refresh token was issued, the token can't be renewed")
+    path = token_cache_path(start_url)
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    write_bytes_atomic(path, json.dumps(data).encode("utf-8"))
+    return path
+
+
+def device_authorization(
+    start_url: Optional[str] = None,
+    region: Optional[str] = None,
+    open_browser: Callable[[str], bool] = webbrowser.open,
+    sleep: Callable[[float], None] = time.sleep,
+) -> PosixPath:
+    """Signs in to AWS SSO with the OIDC device authorization flow, then saves the token where
+    `get_latest_token` finds it"""
+    if start_url is None or region is None:
+        start_url, region = sso_session()
+    client = registered_client(region)
+    oidc = sso_client(region, service="sso-oidc")
+    authorization = oidc.start_device_authorization(
+        clientId=client["clientId"],
+        clientSecret=client["clientSecret"],
+        startUrl=start_url,
+    )
+    url = authorization["verificationUriComplete"]
+    print(f"Attempting to open your browser. If it doesn't open, visit {url}")
+    print(f"and check that the code matches: {authorization['userCode']}")
+    open_browser(url)
+
+    interval = authorization.get("interval") or 5
+    deadline = now() + timedelta(seconds=authorization["expiresIn"])
+    while now() < deadline:
+        sleep(interval)
+        try:
+            token = oidc.create_token(
+                clientId=client["clientId"],
+                clientSecret=client["clientSecret"],
+                grantType=OIDC_DEVICE_GRANT,
+                deviceCode=authorization["deviceCode"],
+            )
+        except ClientError as e:
+            code = e.response["Error"]["Code"]
+            if code == "AuthorizationPendingException":
+                continue
+            if code == "SlowDownException":
+                interval += 5
+                continue
+            raise DeviceAuthorizationFailed(code) from e
+        return save_token(start_url, region, client, token)
+    raise DeviceAuthorizationFailed("The sign in request expired")
+
+
+def renewable_token() -> Optional[dict]:
+    """The newest cached token that has a refresh token and a client registration that hasn't expired"""
+    newest: Optional[tuple[float, dict]] = None
+    for file in AWS_ACCESS_TOKEN_CACHE_DIR_PATH.glob("*.json"):
+        try:
+            mtime = file.stat().st_mtime
+            with file.open() as f:
+                token_data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if not all(
+            token_data.get(key)
+            for key in (
+                "refreshToken",
+                "clientId",
+                "clientSecret",
+                "registrationExpiresAt",
+                "startUrl",
+            )
+        ):
+            continue
+        if isoparse(token_data["registrationExpiresAt"]) <= now():
+            continue
+        if newest is None or mtime > newest[0]:
+            newest = (mtime, token_data)
+    return newest[1] if newest else None
+
+
+def renew_token() -> bool:
+    """Renews the newest cached SSO token with its refresh token, without user interaction
+
+    Single flight: concurrent `dev` processes wait for the first one to renew the token, then use its token.
+    """
+    with file_lock(cache_path(TOKEN_RENEWAL_LOCK_NAME)):
+        try:
+            AWS_CFG.get_latest_token()
+            logging.debug("Token was renewed by another process")
+            return True
+        except NeedAuth:
+            pass
+        cached = renewable_token()
+        if cached is None:
+            logging.debug("No token can be renewed")
+            return False
+        region = cached.get("region") or AWS_DEFAULT_REGION
+        try:
+            token = sso_client(region, service="sso-oidc").create_token(
+                clientId=cached["clientId"],
+                clientSecret=cached["clientSecret"],
+                grantType=OIDC_REFRESH_GRANT,
+                refreshToken=cached["refreshToken"],
+            )
+        except ClientError as e:
+            logging.info(f"Could not renew AWS SSO token: {e}")
+            return False
+        client = OIDCClientType(
+            clientId=cached["clientId"],
+            clientSecret=cached["clientSecret"],
+            clientSecretExpiresAt=int(
+                isoparse(cached["registrationExpiresAt"]).timestamp()
+            ),
+        )
+        # The refresh token may or may not be rotated
+        token = {"refreshToken": cached["refreshToken"], **token}
+        save_token(cached["startUrl"], region, client, token)
+        logging.info("Renewed AWS SSO token")
+        return True
+
+
+def with_renewal(get_token: Callable[[], T]) -> T:
+    """`get_token()`, renewing the SSO token first if it raises `NeedAuth`"""
+    try:
+        return get_token()
+    except NeedAuth:
+        if not renew_token():
+            raise
+    return get_token()
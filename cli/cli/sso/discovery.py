@@ -0,0 +1,122 @@
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from cli.constants import AWS_ACCOUNT_TO_ENV
+from cli.services.aws.constants import AWS_SSO_ACCOUNT_ID_KEY, AWS_SSO_ROLE_KEY
+from cli.services.cache_service import read_json_cache, write_json_cache
+from cli.sso.constants import DISCOVERY_CACHE_TTL, MAX_CREDENTIAL_WORKERS
+from cli.sso.utils import get_arbitrary_suffix, sso_client
+from cli.types import SimpleNestedDict
+
+DISCOVERY_CACHE_NAME = "sso-discovery.json"
+
+
+class DiscoveredRole(NamedTuple):
+    account_id: str
+    account_name: str
+    role_name: str
+
+
+def list_accounts(client, token: str) -> list[dict[str, str]]:
+    paginator = client.get_paginator("list_accounts")
+    return [
+        account
+        for page in paginator.paginate(accessToken=token)
+        for account in page["accountList"]
+    ]
+
+
+def list_account_roles(
+    client, token: str, account: dict[str, str]
+) -> list[DiscoveredRole]:
+    paginator = client.get_paginator("list_account_roles")
+    return [
+        DiscoveredRole(
+            account["accountId"], account.get("accountName", ""), role["roleName"]
+        )
+        for page in paginator.paginate(
+            accessToken=token, accountId=account["accountId"]
+        )
+        for role in page["roleList"]
+    ]
+
+
+def discover_roles(
+    token: str,
+    region: str,
+    start_url: str,
+    max_workers: int = MAX_CREDENTIAL_WORKERS,
+    use_cache: bool = True,
+) -> list[DiscoveredRole]:
+    """Every account and role the signed in user can access through AWS SSO
+
+    Roles are listed for several accounts at once. Results are cached per start URL for `DISCOVERY_CACHE_TTL`.
+    """
+    cached = read_json_cache(DISCOVERY_CACHE_NAME, default={}).get(start_url)
+    if use_cache and cached:
+        discovered_at = datetime.fromisoformat(cached["discovered_at"])
+        if datetime.now(tz=timezone.utc) - discovered_at < DISCOVERY_CACHE_TTL:
+            logging.debug(f"Using roles discovered at {discovered_at}")
+            return [DiscoveredRole(*role) for role in cached["roles"]]
+
+    client = sso_client(region)
+    accounts = list_accounts(client, token)
+    workers = max(1, min(max_workers, len(accounts)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        roles_by_account = pool.map(
+            lambda account: list_account_roles(client, token, account), accounts
+        )
+        roles = sorted(
+            role for account_roles in roles_by_account for role in account_roles
+        )
+
+    cache = read_json_cache(DISCOVERY_CACHE_NAME, default={})
+    cache[start_url] = {
+        "discovered_at": datetime.now(tz=timezone.utc).isoformat(),
+        "roles": [list(role) for role in roles],
+    }
+    try:
+        write_json_cache(DISCOVERY_CACHE_NAME, cache)
+    except OSError as e:
+        logging.debug(f"Could not cache discovered roles: {e}")
+    return roles
+
+
+def slug(value: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", value.lower()).strip("-")
+
+
+def discovered_profile_name(role: DiscoveredRole) -> str:
+    """`dev-{env or account name}-{role}`, e.g., dev-qa-developer for QA-Developer
+
+    On an account shared by several envs, a role named for one of them (e.g., Dev-Developer) is that env's.
+    """
+    role_slug = slug(role.role_name)
+    envs = AWS_ACCOUNT_TO_ENV.get(role.account_id, [])
+    env = next((env for env in envs if role_slug.startswith(f"{env}-")), None)
+    if env is not None:
+        return f"dev-{env}-{role_slug.removeprefix(f'{env}-')}"
+    account = envs[0] if envs else slug(role.account_name) or role.account_id
+    return f"dev-{account}-{role_slug}"
+
+
+def new_profile_names(
+    roles: list[DiscoveredRole], existing_profiles: SimpleNestedDict
+) -> dict[str, DiscoveredRole]:
+    """A profile name for each role that none of `existing_profiles` is for already"""
+    existing_roles = {
+        (profile.get(AWS_SSO_ACCOUNT_ID_KEY), profile.get(AWS_SSO_ROLE_KEY))
+        for profile in existing_profiles.values()
+    }
+    names: dict[str, DiscoveredRole] = {}
+    for role in roles:
+        if (role.account_id, role.role_name) in existing_roles:
+            continue
+        name = discovered_profile_name(role)
+        while f"profile {name}" in existing_profiles or f"profile {name}" in names:
+            name += f"-{get_arbitrary_suffix(name)}"
+        names[f"profile {name}"] = role
+    return names
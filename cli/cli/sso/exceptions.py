@@ -8,3 +8,11 @@ class GoogleRoleUsedWithSSOCommand(SSOConfigException):
 
 class BadEnvInRole(SSOConfigException):
     pass
+
+
+class SSOLoginException(Exception):
+    pass
+
+
+class DeviceAuthorizationFailed(SSOLoginException):
+    pass
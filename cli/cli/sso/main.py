@@ -1,17 +1,42 @@
+import json
+
 import typer
 
-from cli.sso.manage_config import app as config_app
-from cli.sso.utils import generate_credentials_file
+from cli.lazy import LazySubcommand, lazy_group
+from cli.services.aws.exceptions import NeedAuth, NoSuchProfile
+from cli.sso.constants import DEFAULT_CREDENTIAL_SERVER_PORT
 
-app = typer.Typer()
+SUBCOMMANDS = {
+    "config": LazySubcommand(
+        "cli.sso.manage_config:app", help="Manage your AWS SSO configuration"
+    ),
+}
 
-app.add_typer(config_app, name="config", help="Manage your AWS SSO configuration")
+app = typer.Typer(cls=lazy_group(SUBCOMMANDS, name="SSOCommandGroup"))
 
 
 @app.command()
-def login():
+def login(
+    refresh: bool = typer.Option(
+        False,
+        "--refresh",
+        help="Only fetch credentials that are missing or about to expire, and keep the rest",
+    ),
+    watch: bool = typer.Option(
+        False,
+        "--watch",
+        help="Keep running and refresh credentials before they expire (see `dev sso status`)",
+    ),
+):
     """Authenticate with AWS SSO and generate a credentials file (used automatically in many docker containers)"""
-    bytes_written, credentials, errors = generate_credentials_file()
+    from cli.sso.utils import generate_credentials_file
+
+    bytes_written, credentials, errors = generate_credentials_file(refresh=refresh)
+    if refresh and not credentials and not errors:
+        print("All credentials are still valid; nothing to refresh")
+        if watch:
+            watch_credentials()
+        return
     profile_names = [p for p in credentials]
     if len(profile_names) > 1:
         profile_names[-1] = f"and {profile_names[-1]}"
@@ -23,3 +48,143 @@ def login():
         raise typer.Exit("No valid profiles")
     for profile, error in errors.items():
         print(f"Could not get credentials for {profile}: {error}")
+    if watch:
+        watch_credentials()
+
+
+def watch_credentials():
+    from threading import Event
+
+    from cli.sso.refresher import CredentialRefresher
+
+    print("Refreshing credentials before they expire; press Ctrl+C to stop")
+    try:
+        CredentialRefresher().run(Event())
+    except KeyboardInterrupt:
+        pass
+
+
+@app.command()
+def status():
+    """Show when `dev sso login --watch` will next refresh each profile's credentials"""
+    from rich import print
+    from rich.table import Table
+
+    from cli.sso.refresher import is_running, read_status
+
+    refresher = read_status()
+    if not refresher:
+        print("`dev sso login --watch` has never run")
+        raise typer.Exit(1)
+    running = is_running(refresher.get("pid"))
+    table = Table(
+        title=f"Credential refresher ({'running' if running else 'not running'})",
+        caption=f"Updated {refresher.get('updated')}; SSO token expires {refresher.get('token_expires')}",
+    )
+    for column in ["Profile", "Expires", "Next refresh", "Failures", "Last error"]:
+        table.add_column(column)
+    for name, profile in sorted(refresher.get("profiles", {}).items()):
+        table.add_row(
+            name,
+            profile.get("expires") or "-",
+            (profile.get("next_refresh") or "-") if running else "-",
+            str(profile.get("failures", 0)),
+            profile.get("last_error") or "",
+        )
+    print(table)
+    if refresher.get("last_error"):
+        print(f"Last error: {refresher['last_error']}")
+
+
+@app.command("credential-process")
+def credential_process(
+    profile: str = typer.Option(..., "--profile", help="Name of the AWS profile"),
+):
+    """Print credentials for a profile as JSON, for use as `credential_process` in your AWS config
+
+    e.g., `credential_process = dev sso credential-process --profile dev-qa`
+    """
+    from cli.sso.credential_process import get_credentials, to_credential_process_output
+
+    try:
+        credential = get_credentials(profile)
+    except (NeedAuth, NoSuchProfile) as e:
+        typer.echo(
+            f"Could not get credentials for {profile}: {e} (run `dev sso login` to authenticate)",
+            err=True,
+        )
+        raise typer.Exit(1)
+    print(json.dumps(to_credential_process_output(credential)))
+
+
+@app.command("serve-credentials")
+def serve_credentials(
+    host: str = typer.Option(
+        "127.0.0.1",
+        help="Loopback address to listen on; any other address would serve credentials to your network",
+    ),
+    port: int = typer.Option(DEFAULT_CREDENTIAL_SERVER_PORT),
+    auth_token: str = typer.Option(
+        None,
+        envvar="AWS_CONTAINER_AUTHORIZATION_TOKEN",
+        help="Token that requests must send (generated if not set)",
+    ),
+):
+    """Serve credentials for containers over HTTP, refreshing them before they expire
+
+    In containers, set `AWS_CONTAINER_CREDENTIALS_FULL_URI` to `{url}/{profile}` and set
+    `AWS_CONTAINER_AUTHORIZATION_TOKEN`. SDKs only accept a loopback host in an http credentials URI, so run
+    containers with `--network host`, or (e.g., on Docker Desktop) forward the port on the container's loopback to
+    `host.docker.internal`, e.g., `socat TCP-LISTEN:{port},fork TCP:host.docker.internal:{port}`.
+    """
+    from cli.sso.credential_server import CredentialProvider, CredentialServer
+
+    server = CredentialServer((host, port), CredentialProvider(), auth_token=auth_token)
+    print(f"Serving credentials at {server.url}/{{profile}}, e.g.:")
+    print(f"  AWS_CONTAINER_CREDENTIALS_FULL_URI={server.url}/dev")
+    print(f"  AWS_CONTAINER_AUTHORIZATION_TOKEN={server.auth_token}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+@app.command()
+def whoami(
+    all_profiles: bool = typer.Option(
+        False,
+        "--all",
+        help="Check every profile in your AWS config, not only the one each env uses",
+    ),
+    timeout: float = typer.Option(5.0, help="Seconds to wait for each profile"),
+    json_output: bool = typer.Option(
+        False, "--json", help="Print JSON instead of a table"
+    ),
+):
+    """Check which profiles have working credentials, and who they sign you in as"""
+    from rich import print
+    from rich.table import Table
+
+    from cli.sso.whoami import all_profile_names, check_identities, env_profile_names
+
+    profile_names = all_profile_names() if all_profiles else env_profile_names()
+    checks = check_identities(profile_names, timeout=timeout)
+    if json_output:
+        typer.echo(json.dumps([check._asdict() for check in checks], indent=2))
+    else:
+        table = Table()
+        for column in ["Profile", "Account", "Identity", "Expires", "Latency (ms)"]:
+            table.add_column(column)
+        for check in checks:
+            table.add_row(
+                check.profile,
+                check.account or "-",
+                check.arn or f"[red]{check.error}[/]",
+                check.expires or "-",
+                f"{check.latency_ms:.0f}" if check.latency_ms is not None else "-",
+            )
+        print(table)
+    if any(check.error for check in checks):
+        raise typer.Exit(1)
@@ -7,6 +7,7 @@ from cli.constants import (
     AWS_DEFAULT_REGION,
     AWS_GOOGLE_CONFIG_ROLE_PREFIX,
     AWS_GOOGLE_CONFIG_ROLE_SEPARATOR,
+    AWS_SSO_REGION_KEY,
     DEFAULT_ROLE,
     CoreEnv,
 )
@@ -63,7 +64,7 @@ def update(output_format: OutputFormats = OutputFormats.YAML.value):  # type: ig
         info = find_info(google_role)
 
         for azure_role in info["PERMISSION_SETS"]:
-            raw_env, _ = azure_role.split("-")
+            raw_env, _ = azure_role.split("-", 1)
             env = raw_env.lower()
             nickname = find_shortname(azure_role, key="AZURE_ROLE")
             azure_profile_name = f"profile dev-{env}-{nickname}"
@@ -272,3 +273,47 @@ def make_primary(profile_name: str, env: CoreEnv = CoreEnv.PROD.value):  # type:
     ]
     profiles[-1] = f"and {profiles[-1]}"
     print(f"Your profiles: {', '.join(profiles)}")
+
+
+@app.command()
+def discover(
+    output_format: OutputFormats = OutputFormats.YAML.value,  # type: ignore[assignment]
+    refresh_cache: bool = typer.Option(
+        False, help="List accounts and roles again even if they were listed recently"
+    ),
+    dry_run: bool = typer.Option(
+        False, help="Show the profiles that would be added without changing your config"
+    ),
+):
+    """Add a profile for each AWS account and role that you can access with AWS SSO but have no profile for yet"""
+    from cli.services.aws.exceptions import NeedAuth
+    from cli.sso.device_auth import sso_session, with_renewal
+    from cli.sso.discovery import discover_roles, new_profile_names
+
+    try:
+        token = with_renewal(AWS_CFG.get_latest_token)
+    except NeedAuth:
+        print("AWS SSO login needed, run `dev sso login` first")
+        raise typer.Exit(1)
+    start_url, region = sso_session()
+    roles = discover_roles(token, region, start_url, use_cache=not refresh_cache)
+    config = AWS_CFG.as_dict()
+    new_profiles = new_profile_names(roles, existing_profiles=AWS_CFG.profiles)
+    if not new_profiles:
+        print(f"You already have profiles for all {len(roles)} roles you can access")
+        return
+    for profile_name, role in new_profiles.items():
+        base_profile = new_profile_from_base(output=output_format)
+        base_profile["sso_start_url"] = start_url
+        base_profile[AWS_SSO_REGION_KEY] = region
+        config[profile_name] = make_profile(
+            role.role_name, existing=base_profile, account_id=role.account_id
+        )
+        print(
+            f"[green]{'Would add' if dry_run else 'Added'} [b]{profile_name.removeprefix('profile ')}[/] for"
+            + f" {role.role_name} in {role.account_name or role.account_id}[/green]"
+        )
+    if not dry_run:
+        AWS_CFG.write_sections_to_file(
+            sections=config, file=WriteableFiles.CONFIG, overwrite=True
+        )
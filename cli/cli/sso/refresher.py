@@ -0,0 +1,151 @@
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from threading import Event
+from typing import Optional
+
+from cli.services.aws.config_service import AWS_CFG
+from cli.services.aws.constants import MIN_TTL
+from cli.services.aws.exceptions import NeedAuth
+from cli.services.cache_service import read_json_cache, write_json_cache
+from cli.sso.constants import REFRESH_BACKOFF_MAX, REFRESH_BACKOFF_MIN, REFRESH_LEAD
+from cli.sso.device_auth import with_renewal
+from cli.sso.utils import generate_credentials_file
+
+REFRESHER_STATUS_CACHE_NAME = "credential-refresher.json"
+# Credentials are refreshed once their TTL drops below this, `REFRESH_LEAD` before it would drop below `MIN_TTL`
+REFRESH_THRESHOLD = MIN_TTL + REFRESH_LEAD
+
+
+def now() -> datetime:
+    return datetime.now(tz=timezone.utc)
+
+
+def backoff(failures: int) -> timedelta:
+    return min(REFRESH_BACKOFF_MIN * 2 ** max(failures - 1, 0), REFRESH_BACKOFF_MAX)
+
+
+def read_status() -> dict:
+    return read_json_cache(REFRESHER_STATUS_CACHE_NAME, default={})
+
+
+def is_running(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class CredentialRefresher:
+    """Refreshes each profile's credentials before their TTL drops below `MIN_TTL`
+
+    Profiles are refetched once their TTL drops below `REFRESH_THRESHOLD`, and the refresher wakes up when the next
+    one will. Profiles that fail to refresh are retried with exponential backoff. Progress is saved for
+    `dev sso status`.
+    """
+
+    def __init__(self):
+        self.profiles: dict[str, dict] = {}
+        self.token_expires: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+
+    def _profile_names(self) -> list[str]:
+        return [name.rpartition(" ")[2] for name in AWS_CFG.profiles]
+
+    def _failed(self, profile_name: str, error: Exception, at: datetime):
+        status = self.profiles.setdefault(profile_name, {"failures": 0})
+        status["failures"] += 1
+        status["last_error"] = str(error) or type(error).__name__
+        status["next_refresh"] = at + backoff(status["failures"])
+
+    def _scheduled(self, profile_name: str, at: datetime):
+        """Schedules the next refresh for when the profile's TTL will drop below `REFRESH_THRESHOLD`"""
+        status = self.profiles.setdefault(profile_name, {"failures": 0})
+        expiry = AWS_CFG.credential_expiry(profile_name)
+        status.update(
+            expires=expiry,
+            next_refresh=max(
+                at + REFRESH_BACKOFF_MIN,
+                expiry - REFRESH_THRESHOLD if expiry else at,
+            ),
+        )
+
+    def _refreshed(self, profile_name: str, at: datetime):
+        self._scheduled(profile_name, at)
+        self.profiles[profile_name].update(failures=0, last_error=None)
+
+    def run_once(self) -> datetime:
+        """Refreshes expiring credentials, then returns when the next refresh is due"""
+        at = now()
+        # Someone may have run `dev sso login` since the last refresh
+        AWS_CFG._credentials = None
+        try:
+            _token, self.token_expires = with_renewal(AWS_CFG.latest_token)
+            _bytes, credentials, errors = generate_credentials_file(
+                refresh=True, interactive=False, min_ttl=REFRESH_THRESHOLD
+            )
+            self.last_error = None
+        except NeedAuth as e:
+            self.last_error = f"AWS SSO login needed, run `dev sso login`: {e}"
+            errors = {f"profile {name}": e for name in self._profile_names()}
+            credentials = {}
+        except Exception as e:
+            logging.exception("Could not refresh credentials")
+            self.last_error = str(e)
+            errors = {f"profile {name}": e for name in self._profile_names()}
+            credentials = {}
+
+        failed = {name.rpartition(" ")[2]: error for name, error in errors.items()}
+        for profile_name in self._profile_names():
+            if profile_name in failed:
+                self._failed(profile_name, failed[profile_name], at)
+            elif profile_name in credentials:
+                self._refreshed(profile_name, at)
+            else:
+                self._scheduled(profile_name, at)
+        if self.token_expires and self.token_expires - REFRESH_THRESHOLD < at:
+            logging.warning(
+                f"AWS SSO token expires at {self.token_expires.isoformat(timespec='minutes')};"
+                + " run `dev sso login` to keep refreshing credentials"
+            )
+        self.save()
+        next_refreshes = [status["next_refresh"] for status in self.profiles.values()]
+        return min(next_refreshes, default=at + REFRESH_BACKOFF_MAX)
+
+    def run(self, stop: Event):
+        while True:
+            next_refresh = self.run_once()
+            logging.info(
+                f"Next refresh at {next_refresh.isoformat(timespec='seconds')}"
+            )
+            if stop.wait(max((next_refresh - now()).total_seconds(), 0)):
+                return
+
+    def save(self):
+        def isoformat(value: Optional[datetime]) -> Optional[str]:
+            return value.isoformat() if value else None
+
+        status = {
+            "pid": os.getpid(),
+            "updated": now().isoformat(),
+            "token_expires": isoformat(self.token_expires),
+            "last_error": self.last_error,
+            "profiles": {
+                name: {
+                    "expires": isoformat(profile.get("expires")),
+                    "next_refresh": isoformat(profile.get("next_refresh")),
+                    "failures": profile.get("failures", 0),
+                    "last_error": profile.get("last_error"),
+                }
+                for name, profile in self.profiles.items()
+            },
+        }
+        try:
+            write_json_cache(REFRESHER_STATUS_CACHE_NAME, status)
+        except OSError as e:
+            logging.debug(f"Could not save refresher status: {e}")
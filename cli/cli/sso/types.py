@@ -0,0 +1,7 @@
+from typing import TypedDict
+
+
+class OIDCClientType(TypedDict):
+    clientId: str
+    clientSecret: str
+    clientSecretExpiresAt: int
@@ -1,9 +1,12 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from random import choice
-from subprocess import run
-from typing import Optional
+from threading import Lock
+from typing import Hashable, Optional
 
 import boto3
+from botocore.client import BaseClient
 from botocore.exceptions import ClientError
 
 from cli.constants import (
@@ -13,39 +16,56 @@ from cli.constants import (
     AWS_SSO_REGION_KEY,
     DEFAULT_PROFILE_BASE,
     ENV_TO_AWS_ACCOUNT,
+    ENVIRONMENTS,
 )
-from cli.services.aws.config_service import AWS_CFG
+from cli.services.aws.config_service import AWS_CFG, file_signature, get_ttl
 from cli.services.aws.constants import (
     AWS_SSO_ACCOUNT_ID_KEY,
     AWS_SSO_ROLE_KEY,
     GOOGLE_TO_AZURE_CONFIG_UPDATE_MAP,
+    MIN_TTL,
     WriteableFiles,
 )
 from cli.services.aws.exceptions import InvalidProfile, NeedAuth, NoSuchProfile
-from cli.sso.constants import OutputFormats
+from cli.services.cache_service import cache_path, file_lock
+from cli.sso.constants import LOGIN_LOCK_NAME, MAX_CREDENTIAL_WORKERS, OutputFormats
 from cli.sso.exceptions import BadEnvInRole
 from cli.sso.words import WORDS
 from cli.types import SimpleNestedDict
 
 
 def authenticate():
+    from cli.sso.device_auth import device_authorization
+
     code: Optional[int] = None
     while code != 0:
         try:
-            proc = run(["aws", "sso", "login"])
-            code = proc.returncode
-            if code == 0:
-                break
+            device_authorization()
+            code = 0
+            break
         except Exception as e:
-            logging.error("Error running `aws sso login` as subprocess")
+            code = 1
+            logging.error("Error signing in to AWS SSO")
             logging.error(e)
         if input("Try again? (defaults to yes; enter 'no' to exit) ").lower() == "no":
             break
     return code
 
 
-def get_role_credentials(profile: SimpleNestedDict, token: str, profile_name: str):
-    client = boto3.client("sso", region_name=profile[AWS_SSO_REGION_KEY])
+_SSO_CLIENTS: dict[tuple[str, str], BaseClient] = {}
+_SSO_CLIENTS_LOCK = Lock()
+
+
+def sso_client(region: str, service: str = "sso") -> BaseClient:
+    """One `sso` (or `sso-oidc`) client per region; creating clients isn't thread safe but using them is"""
+    with _SSO_CLIENTS_LOCK:
+        if (service, region) not in _SSO_CLIENTS:
+            _SSO_CLIENTS[service, region] = boto3.client(service, region_name=region)
+        return _SSO_CLIENTS[service, region]
+
+
+def get_role_credentials(profile: dict[str, str], token: str, profile_name: str):
+    client = sso_client(profile[AWS_SSO_REGION_KEY])
     r = client.get_role_credentials(
         roleName=profile[AWS_SSO_ROLE_KEY],
         accountId=profile[AWS_SSO_ACCOUNT_ID_KEY],
@@ -57,45 +77,148 @@ def get_role_credentials(profile: SimpleNestedDict, token: str, profile_name: st
         "aws_access_key_id": r["roleCredentials"]["accessKeyId"],
         "aws_secret_access_key": r["roleCredentials"]["secretAccessKey"],
         "aws_session_token": r["roleCredentials"]["sessionToken"],
-        "aws_session_expiration": r["roleCredentials"]["expiration"],
+        # Epoch milliseconds, as a string like everything read back from the credentials file
+        "aws_session_expiration": str(r["roleCredentials"]["expiration"]),
     }
 
 
-def generate_credentials_file() -> tuple[int, dict[str, str], dict[str, Exception]]:
+def role_key(profile_name: str, profile: dict[str, str]) -> Hashable:
+    """Profiles for the same account and role get the same credentials, so they only need to be fetched once"""
+    if AWS_SSO_ACCOUNT_ID_KEY in profile and AWS_SSO_ROLE_KEY in profile:
+        return profile[AWS_SSO_ACCOUNT_ID_KEY], profile[AWS_SSO_ROLE_KEY]
+    return profile_name
+
+
+def fetch_role_credentials(
+    profiles: SimpleNestedDict, token: str
+) -> tuple[dict[str, dict[str, str]], dict[str, Exception]]:
+    """Fetches credentials for each distinct (account, role) in `profiles` concurrently
+
+    Returns credentials by credential name and errors by profile name, both in the order of `profiles`.
+    """
+    by_role: dict[Hashable, list[str]] = {}
+    for profile_name, profile_data in profiles.items():
+        by_role.setdefault(role_key(profile_name, profile_data), []).append(
+            profile_name
+        )
+
+    def fetch(profile_name: str):
+        try:
+            return get_role_credentials(
+                profile=profiles[profile_name], token=token, profile_name=profile_name
+            )
+        except ClientError as exc:
+            return exc
+
+    workers = max(1, min(MAX_CREDENTIAL_WORKERS, len(by_role)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = dict(
+            zip(
+                by_role,
+                pool.map(fetch, [names[0] for names in by_role.values()]),
+            )
+        )
+
+    credentials: dict[str, dict[str, str]] = {}
+    errors: dict[str, Exception] = {}
+    for profile_name, profile_data in profiles.items():
+        result = results[role_key(profile_name, profile_data)]
+        if isinstance(result, Exception):
+            errors[profile_name] = result
+            continue
+        _credential_name, credential = result
+        _prefix, _separator, credential_name = profile_name.rpartition(" ")
+        credentials[credential_name] = dict(credential)
+    return credentials, errors
+
+
+def profiles_needing_refresh(
+    profiles: SimpleNestedDict, min_ttl: timedelta = MIN_TTL
+) -> SimpleNestedDict:
+    """Profiles without credentials in the credentials file, or whose credentials expire within `min_ttl`"""
+    stale = {}
+    for profile_name, profile_data in profiles.items():
+        _prefix, _separator, credential_name = profile_name.rpartition(" ")
+        expiry = AWS_CFG.credential_expiry(credential_name)
+        if expiry is None or get_ttl(expiry) < min_ttl:
+            stale[profile_name] = profile_data
+    return stale
+
+
+def generate_credentials_file(
+    refresh: bool = False,
+    interactive: bool = True,
+    min_ttl: timedelta = MIN_TTL,
+) -> tuple[int, dict[str, dict[str, str]], dict[str, Exception]]:
+    """Fetches role credentials for each profile and writes them to the credentials file
+
+    With `refresh`, only profiles that are missing or expire within `min_ttl` are fetched and merged into the existing
+    file, which isn't touched at all if nothing changed. Unless `interactive`, `NeedAuth` is raised instead of running
+    the device authorization sign in. Returns bytes written, the fetched credentials and errors.
+
+    Single flight: concurrent `dev` processes wait for the first one to finish, then only fetch what it didn't.
+    """
+    signature = file_signature(WriteableFiles.CREDS.value)
+    with file_lock(cache_path(LOGIN_LOCK_NAME)):
+        if file_signature(WriteableFiles.CREDS.value) != signature:
+            logging.info("Credentials were just written by another dev process")
+            AWS_CFG._credentials = None
+            refresh = True
+        return _generate_credentials_file(
+            refresh=refresh, interactive=interactive, min_ttl=min_ttl
+        )
+
+
+def _generate_credentials_file(
+    refresh: bool, interactive: bool, min_ttl: timedelta = MIN_TTL
+) -> tuple[int, dict[str, dict[str, str]], dict[str, Exception]]:
+    profiles = AWS_CFG.profiles
+    if refresh:
+        profiles = profiles_needing_refresh(profiles, min_ttl=min_ttl)
+        if not profiles:
+            logging.debug("All credentials are still valid, nothing to refresh")
+            return 0, {}, {}
+    from cli.sso.device_auth import with_renewal
+
     try:
-        token = AWS_CFG.get_latest_token()
+        token = with_renewal(AWS_CFG.get_latest_token)
     except NeedAuth:
+        if not interactive:
+            raise
         logging.warning("AWS SSO login needed")
         code = authenticate()
         if code != 0:
             logging.error("AWS SSO login failed. Exiting")
             return exit()
         else:
-            return generate_credentials_file()
-    profiles = AWS_CFG.profiles
-    credentials = {}
-    errors: dict[str, Exception] = {}
-    for profile_name, profile_data in profiles.items():
-        try:
-            credential_name, credential = get_role_credentials(
-                profile=profile_data, token=token, profile_name=profile_name
+            return _generate_credentials_file(
+                refresh=refresh, interactive=interactive, min_ttl=min_ttl
             )
-            credentials[credential_name] = credential
-        except ClientError as exc:
-            errors[profile_name] = exc
-    return (
-        AWS_CFG.write_sections_to_file(
-            sections=credentials, file=WriteableFiles.CREDS, overwrite=True
-        ),
-        credentials,
-        errors,
+    credentials, errors = fetch_role_credentials(profiles, token)
+    sections = credentials
+    if refresh:
+        existing = AWS_CFG.credentials
+        sections = {**existing, **credentials}
+        if sections == existing:
+            return 0, {}, errors
+    # Backups are for manual logins; refreshing in the background would soon rotate them all away
+    bytes_written = AWS_CFG.write_sections_to_file(
+        sections=sections,
+        file=WriteableFiles.CREDS,
+        overwrite=True,
+        backup=interactive,
     )
+    AWS_CFG._credentials = None
+    return bytes_written, credentials, errors
 
 
-def make_profile(role: str, existing: dict[str, str]):
-    env, _ = role.split("-")
+def make_profile(role: str, existing: dict[str, str], account_id: Optional[str] = None):
+    """Adds the SSO account and role to `existing`; the account is looked up by the env in `role` unless given"""
+    if account_id is None:
+        env, _ = role.split("-", 1)
+        account_id = ENV_TO_AWS_ACCOUNT[env.lower()]
     new_fields = {
-        AWS_SSO_ACCOUNT_ID_KEY: ENV_TO_AWS_ACCOUNT[env.lower()],
+        AWS_SSO_ACCOUNT_ID_KEY: account_id,
         AWS_SSO_ROLE_KEY: role,
     }
     existing.update(new_fields)
@@ -117,7 +240,7 @@ def new_profile_from_base(output: OutputFormats = OutputFormats.YAML):
 
 
 def expand_envs_from_role(role):
-    env, role = role.split("-")
+    env, role = role.split("-", 1)
     if env == "all":
         envs = ALL_CORE_ENVS
     else:
@@ -137,8 +260,13 @@ def get_arbitrary_suffix(name):
 def specify_profile_name(previous_name, profiles):
     profile = profiles[previous_name]
     if AWS_SSO_ROLE_KEY in profile:
-        env, role = profile[AWS_SSO_ROLE_KEY].split("-")
-        nickname = find_shortname(role, key="AZURE_ROLE")
+        env, _separator, role = profile[AWS_SSO_ROLE_KEY].partition("-")
+        if env.lower() not in ENVIRONMENTS:
+            # e.g., a discovered role like AdministratorAccess
+            account_envs = AWS_ACCOUNT_TO_ENV.get(profile.get(AWS_SSO_ACCOUNT_ID_KEY))
+            env = account_envs[0] if account_envs else env
+            role = profile[AWS_SSO_ROLE_KEY]
+        nickname = find_shortname(role, key="AZURE_ROLE") or role.lower()
     elif AWS_GOOGLE_ROLE_KEY in profile:
         role_parts = profile[AWS_GOOGLE_ROLE_KEY].split(":")
         account_id = role_parts[-2]
@@ -0,0 +1,126 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import NamedTuple, Optional
+
+from botocore.config import Config
+
+from cli.constants import ENVIRONMENTS
+from cli.services.aws.client_registry import CLIENT_REGISTRY
+from cli.services.aws.clients_service import aws
+from cli.services.aws.config_service import AWS_CFG
+from cli.services.aws.exceptions import DevAWSConfigServiceException
+from cli.sso.constants import MAX_CREDENTIAL_WORKERS
+
+
+class IdentityCheck(NamedTuple):
+    profile: str
+    account: Optional[str] = None
+    arn: Optional[str] = None
+    expires: Optional[str] = None
+    latency_ms: Optional[float] = None
+    error: Optional[str] = None
+
+
+def env_profile_names() -> list[str]:
+    """The profile each env uses, without duplicates"""
+    names = []
+    for env in ENVIRONMENTS:
+        try:
+            name = AWS_CFG.get_profile_name_for_env(env).rpartition(" ")[2]
+        except DevAWSConfigServiceException:
+            continue
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def all_profile_names() -> list[str]:
+    return [name.rpartition(" ")[2] for name in AWS_CFG.profiles]
+
+
+def check_identity(profile_name: str, timeout: float) -> IdentityCheck:
+    """Who `profile_name`'s credentials belong to according to STS, or why that couldn't be found out"""
+    start = time.perf_counter()
+    try:
+        manager = aws.profile(profile_name)
+        expiry = manager.credential_expiry()
+        # A client of its own, so a slow profile is given up on after `timeout` instead of being retried
+        sts = manager.session.client(
+            "sts",
+            region_name=manager.region,
+            config=CLIENT_REGISTRY.config.merge(
+                Config(
+                    connect_timeout=timeout,
+                    read_timeout=timeout,
+                    retries={"max_attempts": 1},
+                )
+            ),
+        )
+        identity = sts.get_caller_identity()
+    except Exception as e:
+        logging.debug(f"Could not get caller identity for {profile_name}: {e}")
+        return IdentityCheck(
+            profile_name,
+            latency_ms=(time.perf_counter() - start) * 1000,
+            error=str(e) or type(e).__name__,
+        )
+    return IdentityCheck(
+        profile_name,
+        account=identity["Account"],
+        arn=identity["Arn"],
+        expires=expiry.isoformat() if expiry else None,
+        latency_ms=(time.perf_counter() - start) * 1000,
+    )
+
+
+def check_identities(
+    profile_names: list[str],
+    timeout: float,
+    max_workers: int = MAX_CREDENTIAL_WORKERS,
+) -> list[IdentityCheck]:
+    """`check_identity` for each profile concurrently, in the order of `profile_names`
+
+    Profiles that haven't answered `timeout` seconds after their check started are reported as timed out, as are
+    profiles still waiting for a worker once every batch of checks could have timed out.
+    """
+    if not profile_names:
+        return []
+    timed_out = {
+        name: IdentityCheck(name, error=f"Timed out after {timeout}s")
+        for name in profile_names
+    }
+    started: dict[str, float] = {}
+
+    def run(name: str) -> IdentityCheck:
+        started[name] = time.monotonic()
+        check = check_identity(name, timeout)
+        return timed_out[name] if time.monotonic() - started[name] > timeout else check
+
+    workers = max(1, min(max_workers, len(profile_names)))
+    pool = ThreadPoolExecutor(max_workers=workers)
+    futures = {name: pool.submit(run, name) for name in profile_names}
+    batches = -(-len(profile_names) // workers)
+    give_up = time.monotonic() + timeout * batches
+    while True:
+        now = time.monotonic()
+        deadlines = {
+            name: started[name] + timeout if name in started else give_up
+            for name, future in futures.items()
+            if not future.done()
+        }
+        waiting = {
+            name: deadline for name, deadline in deadlines.items() if deadline > now
+        }
+        if not waiting:
+            break
+        wait(
+            [futures[name] for name in waiting],
+            timeout=min(waiting.values()) - now,
+            return_when=FIRST_COMPLETED,
+        )
+    pool.shutdown(wait=False, cancel_futures=True)
+    return [
+        future.result() if future.done() and not future.cancelled() else timed_out[name]
+        for name, future in futures.items()
+    ]
@@ -5,16 +5,14 @@ from pathlib import PosixPath
 
 import boto3
 import pytest
+from botocore.exceptions import ClientError
 from moto import mock_s3, mock_sqs, mock_ssm, mock_sts
 from pytest_mock import MockerFixture
 
 from cli.constants import AWS_DEFAULT_REGION
-from cli.parameter_store.utils import (
-    filename_from_obj,
-    get_bucket_name,
-    get_queue_name,
-    get_queue_url,
-)
+from cli.parameter_store.utils import filename_from_obj, get_bucket_name, get_queue_name
+from cli.services.aws.config_service import AWS_CFG
+from cli.services.aws.session_service import SessionFactory
 
 
 @pytest.fixture(autouse=True, scope="session")
@@ -51,7 +49,7 @@ def mock_ssm_client():
 
 
 @pytest.fixture(autouse=True)
-def mock_aws_config(mocker: MockerFixture):
+def mock_aws_config(mocker: MockerFixture, tmp_path):
     dummy_config_data = {
         "default": {"region": "us-east-2"},
         "dev": {"region": "us-east-2"},
@@ -73,12 +71,88 @@ def mock_aws_config(mocker: MockerFixture):
     dummy_config = configparser.RawConfigParser(default_section="default")
     dummy_config.clear()
     dummy_config.read_dict(dummy_config_data)
+    # No config file, so AWS_CFG indexes whatever the returned config is; set `return_value` to change it
+    mocker.patch(
+        "cli.services.aws.config_service.AWS_CONFIG_FILE_PATH",
+        tmp_path / "aws-config",
+    )
+    AWS_CFG._reset()
     return mocker.patch(
         "cli.services.aws.config_service.load_config_from_file",
         return_value=dummy_config,
     )
 
 
+@pytest.fixture(autouse=True)
+def mock_aws_credentials(mocker: MockerFixture):
+    return mocker.patch(
+        "cli.services.aws.config_service.load_credentials_from_file",
+        return_value=configparser.RawConfigParser(),
+    )
+
+
+@pytest.fixture
+def mock_aws_files(mocker: MockerFixture, monkeypatch, tmp_path):
+    """Write AWS_CFG's credentials where botocore will read them, and hide SSO settings from botocore
+
+    Without SSO settings, botocore resolves the static test credentials rather than an SSO token.
+    """
+    botocore_config = SessionFactory._botocore_config
+
+    def without_sso(factory):
+        full_config = botocore_config(factory)
+        return {
+            **full_config,
+            "profiles": {
+                name: {k: v for k, v in profile.items() if not k.startswith("sso_")}
+                for name, profile in full_config["profiles"].items()
+            },
+        }
+
+    mocker.patch.object(SessionFactory, "_botocore_config", without_sso)
+    credentials = configparser.RawConfigParser()
+    credentials.read_dict(AWS_CFG.credentials)
+    path = tmp_path / "credentials"
+    with open(path, "w") as file:
+        credentials.write(file)
+    monkeypatch.setenv("AWS_SHARED_CREDENTIALS_FILE", str(path))
+
+
+@pytest.fixture(autouse=True)
+def mock_cache_dir(mocker: MockerFixture, tmp_path):
+    return mocker.patch(
+        "cli.services.cache_service.CACHE_DIR_PATH", tmp_path / "dev-cli"
+    )
+
+
+@pytest.fixture(autouse=True)
+def mock_renewable_sso_cache(mocker: MockerFixture, tmp_path):
+    return mocker.patch(
+        "cli.sso.device_auth.AWS_ACCESS_TOKEN_CACHE_DIR_PATH", tmp_path / "sso-cache"
+    )
+
+
+@pytest.fixture(autouse=True)
+def clear_parameter_exists_cache(mocker: MockerFixture):
+    return mocker.patch.dict(
+        "cli.parameter_store.validate._PARAMETER_EXISTS", clear=True
+    )
+
+
+@pytest.fixture(autouse=True)
+def mock_name_index(mocker: MockerFixture):
+    """No parameter name index unless a test builds one"""
+    mocker.patch.dict("cli.parameter_store.name_index._NAME_INDEXES", clear=True)
+    mocker.patch("cli.parameter_store.name_index.refresh_in_background")
+    return mocker.patch(
+        "cli.parameter_store.name_index.describe_parameter_names",
+        side_effect=ClientError(
+            error_response={"Error": {"Code": "AccessDeniedException"}},
+            operation_name="DescribeParameters",
+        ),
+    )
+
+
 @pytest.fixture(autouse=True, scope="session")
 def mock_aws_sso_cache(session_mocker: MockerFixture):
     dummy_cache = PosixPath(__file__).parent / "services/aws/mock_sso_cache"
@@ -227,9 +301,20 @@ def mock_delete_s3_obj(mock_s3_client):
 
 @pytest.fixture
 def mock_receive_sqs_message(mock_sqs_client):
-    def _mock_receive_sqs_message(env, queue_url=None):
-        queue_url = queue_url or get_queue_url(env)
-        return mock_sqs_client.receive_message(QueueUrl=queue_url)
+    def _mock_receive_sqs_message(
+        env,
+        queue_url=None,
+        max_messages=1,
+        wait_time_seconds=None,
+        visibility_timeout=None,
+    ):
+        # The queue in moto's account, rather than the env's, and without waiting for messages
+        queue_name = get_queue_name(getattr(env, "value", env))
+        queue_url = mock_sqs_client.create_queue(QueueName=queue_name)["QueueUrl"]
+        options = {"MaxNumberOfMessages": max_messages}
+        if visibility_timeout is not None:
+            options["VisibilityTimeout"] = visibility_timeout
+        return mock_sqs_client.receive_message(QueueUrl=queue_url, **options)
 
     return _mock_receive_sqs_message
 
@@ -247,7 +332,10 @@ def mock_all_aws(
         "cli.services.aws.clients_service.get_user_for_env",
         return_value="TEST@testing.com",
     )
-    mocker.patch("cli.parameter_store.validate.get_parameter")
+    mocker.patch(
+        "cli.parameter_store.validate.get_parameters",
+        return_value={"Parameters": [], "InvalidParameters": []},
+    )
     mocker.patch(
         "cli.parameter_store.requests_client.upload_s3_obj", mock_upload_s3_obj
     )
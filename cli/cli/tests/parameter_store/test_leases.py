@@ -0,0 +1,183 @@
+import time
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+from pytest_mock import MockerFixture
+from typer.testing import CliRunner
+
+from cli.main import app
+from cli.parameter_store import leases as leases_module
+from cli.parameter_store import requests_client
+from cli.parameter_store.constants import SQS_BATCH_MAX
+from cli.parameter_store.leases import VisibilityLeases
+from cli.parameter_store.requests_client import ReviewSession
+from cli.services.aws import clients_service
+
+ENV = "qa"
+
+
+def message(n):
+    return {"MessageId": f"message-{n}", "ReceiptHandle": f"handle-{n}"}
+
+
+@pytest.fixture
+def mock_extend(mocker: MockerFixture):
+    return mocker.patch.object(
+        leases_module, "change_sqs_message_visibility_batch", return_value={}
+    )
+
+
+@pytest.fixture
+def leases(mock_extend):
+    # A heartbeat that doesn't run on its own, so tests can run it
+    with VisibilityLeases(ENV, visibility_timeout=60, heartbeat_seconds=3600) as held:
+        yield held
+
+
+def test_visibility_leases__heartbeat_extends_in_batches(leases, mock_extend):
+    for n in range(SQS_BATCH_MAX + 2):
+        leases.hold(message(n))
+    leases.heartbeat()
+
+    assert mock_extend.call_count == 2
+    first, second = (call.kwargs for call in mock_extend.call_args_list)
+    assert len(first["handles"]) == SQS_BATCH_MAX
+    assert second["handles"] == {
+        f"message-{n}": f"handle-{n}" for n in range(SQS_BATCH_MAX, SQS_BATCH_MAX + 2)
+    }
+    assert first["visibility_timeout"] == 60
+    assert leases.lost("message-0") is None
+
+
+def test_visibility_leases__invalid_receipt_handle_loses_lease(leases, mock_extend):
+    leases.hold(message(0))
+    leases.hold(message(1))
+    mock_extend.return_value = {"message-1": "ReceiptHandleIsInvalid"}
+    leases.heartbeat()
+
+    assert leases.lost("message-0") is None
+    assert leases.lost("message-1") == "ReceiptHandleIsInvalid"
+    mock_extend.reset_mock()
+    leases.heartbeat()
+    assert mock_extend.call_args.kwargs["handles"] == {"message-0": "handle-0"}
+
+
+def test_visibility_leases__failed_extend_loses_lease_once_it_runs_out(
+    leases, mock_extend, mocker: MockerFixture
+):
+    leases.hold(message(0))
+    mock_extend.side_effect = ConnectionError("offline")
+    leases.heartbeat()
+    assert leases.lost("message-0") is None
+
+    mocker.patch.object(
+        leases_module.time, "monotonic", return_value=time.monotonic() + 61
+    )
+    mock_extend.reset_mock()
+    leases.heartbeat()
+    assert (
+        leases.lost("message-0") == "visibility timeout ran out before it was extended"
+    )
+    mock_extend.assert_not_called()
+
+
+def test_visibility_leases__dropped_leases_are_not_extended(leases, mock_extend):
+    leases.hold(message(0))
+    assert leases.drop("message-0").handle == "handle-0"
+    leases.heartbeat()
+    mock_extend.assert_not_called()
+
+
+def test_visibility_leases__heartbeat_runs_in_background(mock_extend):
+    with VisibilityLeases(ENV, heartbeat_seconds=0.01) as leases:
+        leases.hold(message(0))
+        deadline = time.monotonic() + 5
+        while not mock_extend.called and time.monotonic() < deadline:
+            time.sleep(0.01)
+    mock_extend.assert_called_with(
+        env=ENV, handles={"message-0": "handle-0"}, visibility_timeout=120
+    )
+
+
+def test_change_sqs_message_visibility_batch(mocker: MockerFixture):
+    queue_url = "https://sqs.us-east-2.amazonaws.com/012345678902/leases"
+    sqs = boto3.client("sqs", region_name="us-east-2")
+    mocker.patch.object(clients_service, "get_queue_url", return_value=queue_url)
+    mocker.patch.object(
+        clients_service.EnvManager,
+        "__getitem__",
+        return_value=mocker.Mock(sqs=sqs),
+    )
+    handles = {"message-1": "handle-1", "gone": "not-a-handle"}
+    with Stubber(sqs) as stubber:
+        stubber.add_response(
+            "change_message_visibility_batch",
+            {
+                "Successful": [{"Id": "message-1"}],
+                "Failed": [
+                    {
+                        "Id": "gone",
+                        "SenderFault": True,
+                        "Code": "ReceiptHandleIsInvalid",
+                    }
+                ],
+            },
+            {
+                "QueueUrl": queue_url,
+                "Entries": [
+                    {"Id": message_id, "ReceiptHandle": handle, "VisibilityTimeout": 60}
+                    for message_id, handle in handles.items()
+                ],
+            },
+        )
+        failed = clients_service.change_sqs_message_visibility_batch(
+            ENV, handles, visibility_timeout=60
+        )
+        stubber.assert_no_pending_responses()
+    assert failed == {"gone": "ReceiptHandleIsInvalid"}
+
+
+def test_review_session__lost_lease_is_not_deleted_or_restored(
+    mocker: MockerFixture, mock_all_aws, mock_extend, mock_s3_notification_message
+):
+    mocker.patch.object(
+        requests_client.RequestsClient,
+        "fetch_s3_object_from_record",
+        return_value=({"id": "request"}, "key"),
+    )
+    mock_s3_notification_message(ENV, "a.json")
+    mock_s3_notification_message(ENV, "b.json")
+    with ReviewSession(env=ENV) as session:
+        first, second = session.receive()
+        mock_extend.return_value = {first.message_id: "ReceiptHandleIsInvalid"}
+        session.leases.heartbeat()
+        assert session.lease_lost(first) == "ReceiptHandleIsInvalid"
+        assert session.lease_lost(second) is None
+        session.done(first)
+    requests_client.delete_sqs_message.assert_not_called()
+    requests_client.restore_sqs_message.assert_called_once_with(
+        env=ENV, handle=second.message["ReceiptHandle"]
+    )
+
+
+def test_param_review__skips_request_whose_lease_was_lost(
+    mocker: MockerFixture, mock_all_aws, mock_s3_notification_message
+):
+    mocker.patch.object(
+        requests_client.RequestsClient,
+        "fetch_s3_object_from_record",
+        return_value=({"id": "request", "touches": 0}, "key"),
+    )
+    mocker.patch.object(
+        requests_client.VisibilityLeases, "lost", return_value="ReceiptHandleIsInvalid"
+    )
+    mock_do = mocker.patch("cli.parameter_store.main.do")
+    mock_s3_notification_message(ENV, "a.json")
+    runner = CliRunner()
+    result = runner.invoke(app, ["params", "review", ENV])
+
+    assert result.exit_code == 0, result.output
+    assert "another reviewer may have it now" in result.output
+    mock_do.assert_not_called()
+    requests_client.delete_sqs_message.assert_not_called()
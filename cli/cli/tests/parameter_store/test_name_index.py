@@ -0,0 +1,162 @@
+from datetime import datetime, timedelta
+
+import pytest
+from botocore.exceptions import ClientError
+from pytest_mock import MockerFixture
+from typer.testing import CliRunner
+
+from cli.main import app
+from cli.parameter_store import name_index as name_index_module
+from cli.parameter_store.exceptions import InsufficientPermissionException
+from cli.parameter_store.name_index import NameIndex, name_index
+from cli.parameter_store.validate import validate_param_exists, validate_params_exist
+from cli.services.aws import clients_service
+
+ACCESS_DENIED = ClientError(
+    error_response={"Error": {"Code": "AccessDeniedException"}},
+    operation_name="GetParameters",
+)
+
+
+@pytest.fixture
+def mock_ssm_parameters(mocker: MockerFixture, mock_ssm_client, mock_name_index):
+    for name in ("/qa/a", "/qa/b/c", "/dev/a"):
+        mock_ssm_client.put_parameter(Name=name, Value="secret", Type="SecureString")
+    mocker.patch.object(
+        clients_service.EnvManager,
+        "__getitem__",
+        return_value=mocker.Mock(ssm=mock_ssm_client),
+    )
+    mock_name_index.side_effect = clients_service.describe_parameter_names
+    return mock_ssm_client
+
+
+def test_name_index__refresh(mock_ssm_parameters):
+    assert NameIndex("qa").refresh() == 2
+    index = NameIndex("qa")
+    index.load()
+    assert index.names == {"/qa/a", "/qa/b/c"}
+    assert index.is_fresh()
+
+
+def test_validate_params_exist__uses_name_index(
+    mocker: MockerFixture, mock_ssm_parameters
+):
+    name_index("qa").refresh()
+    get_parameters = mocker.patch(
+        "cli.parameter_store.validate.get_parameters",
+        return_value={"Parameters": [], "InvalidParameters": ["/qa/new"]},
+    )
+    assert validate_param_exists("qa", "/qa/a") is True
+    get_parameters.assert_not_called()
+
+    # Names that aren't indexed may be newer than the index, so they're checked live
+    assert list(validate_params_exist("qa", ["/qa/b/c", "/qa/new"])) == ["/qa/new"]
+    get_parameters.assert_called_once_with("qa", ["/qa/new"])
+
+
+def test_validate_params_exist__adds_confirmed_names(
+    mocker: MockerFixture, mock_ssm_parameters
+):
+    name_index("qa").refresh()
+    mock_ssm_parameters.put_parameter(Name="/qa/new", Value="new", Type="String")
+    mocker.patch(
+        "cli.parameter_store.validate.get_parameters",
+        return_value={"Parameters": [{"Name": "/qa/new"}], "InvalidParameters": []},
+    )
+    assert validate_params_exist("qa", ["/qa/new"]) == {}
+    index = NameIndex("qa")
+    index.load()
+    assert "/qa/new" in index.names
+
+
+def test_validate_params_exist__without_ssm_read_access(
+    mocker: MockerFixture, mock_ssm_parameters
+):
+    name_index("qa").refresh()
+    mocker.patch(
+        "cli.parameter_store.validate.get_parameters", side_effect=ACCESS_DENIED
+    )
+    assert validate_param_exists("qa", "/qa/a") is True
+    # May have been created since the index was refreshed, so the caller decides whether to go ahead
+    with pytest.raises(InsufficientPermissionException):
+        validate_param_exists("qa", "/qa/nope")
+
+
+def test_validate_params_exist__without_ssm_access_or_index(mocker: MockerFixture):
+    mocker.patch(
+        "cli.parameter_store.validate.get_parameters", side_effect=ACCESS_DENIED
+    )
+    with pytest.raises(InsufficientPermissionException):
+        validate_param_exists("qa", "/qa/a")
+
+
+def test_name_index__refreshes_stale_index(mocker: MockerFixture, mock_ssm_parameters):
+    NameIndex("qa").refresh()
+    mock_ssm_parameters.put_parameter(Name="/qa/new", Value="new", Type="String")
+    index = NameIndex("qa")
+    assert "/qa/new" not in index.get()
+
+    later = datetime.now(tz=name_index_module.timezone.utc) + timedelta(hours=5)
+    mocker.patch.object(name_index_module, "now", return_value=later)
+    assert "/qa/new" in index.get()
+    assert index.refreshed_at == later
+
+
+def test_validate_params_exist__refreshes_stale_index_in_background(
+    mocker: MockerFixture, mock_ssm_parameters
+):
+    NameIndex("qa").refresh()
+    get_parameters = mocker.patch(
+        "cli.parameter_store.validate.get_parameters",
+        return_value={"Parameters": [], "InvalidParameters": []},
+    )
+    describe_parameter_names = mocker.spy(name_index_module, "describe_parameter_names")
+    refresh_in_background = mocker.patch.object(
+        name_index_module, "refresh_in_background"
+    )
+    later = datetime.now(tz=name_index_module.timezone.utc) + timedelta(hours=5)
+    mocker.patch.object(name_index_module, "now", return_value=later)
+    assert validate_param_exists("qa", "/qa/a") is True
+    get_parameters.assert_not_called()
+    describe_parameter_names.assert_not_called()
+    refresh_in_background.assert_called_once_with("qa")
+
+
+def test_name_index__uses_stale_index_when_refresh_fails(
+    mocker: MockerFixture, mock_ssm_parameters, mock_name_index
+):
+    NameIndex("qa").refresh()
+    mock_name_index.side_effect = ACCESS_DENIED
+    later = datetime.now(tz=name_index_module.timezone.utc) + timedelta(hours=5)
+    mocker.patch.object(name_index_module, "now", return_value=later)
+    index = NameIndex("qa")
+    assert index.get() == {"/qa/a", "/qa/b/c"}
+    assert not index.is_fresh()
+
+
+def test_refresh_index__invoke(mock_ssm_parameters):
+    result = CliRunner().invoke(
+        app, ["params", "refresh-index", "--env", "qa", "--env", "dev"]
+    )
+    assert result.exit_code == 0
+    assert "qa: indexed 2 parameter names" in result.stdout
+    assert "dev: indexed 1 parameter names" in result.stdout
+
+
+def test_refresh_index__access_denied(mock_name_index):
+    result = CliRunner().invoke(app, ["params", "refresh-index", "--env", "qa"])
+    assert result.exit_code == 1
+    assert "qa: You lack permission to" in result.stdout
+
+
+def test_refresh_index__every_env(mock_ssm_parameters):
+    result = CliRunner().invoke(app, ["params", "refresh-index"])
+    assert result.exit_code == 0
+    assert "management: indexed 0 parameter names" in result.stdout
+
+
+def test_refresh_index__unknown_env():
+    result = CliRunner().invoke(app, ["params", "refresh-index", "--env", "nope"])
+    assert result.exit_code == 2
+    assert "Unknown env(s): nope" in result.stdout
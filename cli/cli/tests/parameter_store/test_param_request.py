@@ -1,9 +1,9 @@
 import pytest
-from botocore.exceptions import ClientError
 from pytest_mock import MockerFixture
 from typer.testing import CliRunner
 
 from cli.main import app
+from cli.parameter_store import batch
 from cli.parameter_store.utils import get_bucket_name
 
 REQUEST_CMD = ["params", "request"]
@@ -20,11 +20,8 @@ def test__param_request_create_cli_integration__param_not_found(
     mocker: MockerFixture, args, mock_all_aws
 ):
     mocker.patch(
-        "cli.parameter_store.validate.get_parameter",
-        side_effect=ClientError(
-            error_response={"Error": {"Code": "ParameterNotFound", "Status": 404}},
-            operation_name="TEST",
-        ),
+        "cli.parameter_store.validate.get_parameters",
+        return_value={"Parameters": [], "InvalidParameters": ["/qa/abc"]},
     )
 
     runner = CliRunner()
@@ -66,3 +63,102 @@ def test__param_request_create__invoke__success(
     assert len(obj["Contents"]) == 1
     assert obj["Contents"][0]["Key"].startswith("requested/")
     assert result.exit_code == 0
+
+
+@pytest.fixture
+def mock_get_parameters(mocker: MockerFixture, mock_ssm_client):
+    calls = []
+
+    def _mock_get_parameters(env, paths):
+        calls.append(paths)
+        return mock_ssm_client.get_parameters(Names=paths, WithDecryption=False)
+
+    mocker.patch("cli.parameter_store.validate.get_parameters", _mock_get_parameters)
+    mocker.patch(
+        "cli.parameter_store.actions.get_user_for_env",
+        return_value="TEST@testing.com",
+    )
+    return calls
+
+
+@pytest.mark.parametrize(
+    "suffix,content",
+    [
+        (
+            ".csv",
+            "path,value,encrypt\n/qa/a,1,false\n/qa/missing,2,\n/qa/b c,3,\n/qa/b,4,yes\n",
+        ),
+        (
+            ".jsonl",
+            '{"path": "/qa/a", "value": 1, "encrypt": false}\n{"path": "/qa/missing", "value": "2"}\n'
+            + '{"path": "/qa/b c", "value": "3"}\n\n{"path": "/qa/b", "value": "4"}\n',
+        ),
+        (
+            ".yaml",
+            "- {path: /qa/a, value: 1, encrypt: false}\n- {path: /qa/missing, value: '2'}\n"
+            + "- {path: /qa/b c, value: '3'}\n- {path: /qa/b, value: '4'}\n",
+        ),
+    ],
+)
+def test__param_request_from_file__reports_failures_per_row(
+    mocker: MockerFixture,
+    tmp_path,
+    suffix,
+    content,
+    mock_s3_client,
+    mock_ssm_client,
+    mock_all_aws,
+    mock_get_parameters,
+):
+    mock_s3_client.create_bucket(
+        Bucket=get_bucket_name(env="qa"),
+        CreateBucketConfiguration={"LocationConstraint": "us-east-2"},
+    )
+    for name in ("/qa/a", "/qa/b"):
+        mock_ssm_client.put_parameter(Name=name, Value="initial")
+    make_request = mocker.spy(batch, "make_request")
+    requests_file = tmp_path / f"requests{suffix}"
+    requests_file.write_text(content)
+
+    result = CliRunner().invoke(
+        app, REQUEST_CMD + ["--from", str(requests_file)], env={"COLUMNS": "200"}
+    )
+
+    assert result.exit_code == 1
+    assert "Submitted 2 of 4 requests" in result.stdout
+    assert '"/qa/missing" does not exist in qa' in result.stdout
+    assert "Parameter name can only contain" in result.stdout
+    assert mock_get_parameters == [["/qa/a", "/qa/missing", "/qa/b"]]
+    objects = mock_s3_client.list_objects(Bucket=get_bucket_name(env="qa"))
+    assert len(objects["Contents"]) == 2
+    requested = [call.kwargs for call in make_request.call_args_list]
+    assert sorted((r["path"], r["value"], r["encrypt"]) for r in requested) == [
+        ("/qa/a", "1", False),
+        ("/qa/b", "4", True),
+    ]
+
+
+def test__param_request_from_stdin__checks_existence_in_batches(
+    mock_s3_client, mock_ssm_client, mock_all_aws, mock_get_parameters
+):
+    mock_s3_client.create_bucket(
+        Bucket=get_bucket_name(env="qa"),
+        CreateBucketConfiguration={"LocationConstraint": "us-east-2"},
+    )
+    names = [f"/qa/param-{i}" for i in range(25)]
+    for name in names:
+        mock_ssm_client.put_parameter(Name=name, Value="initial")
+    stdin = "".join(f'{{"path": "{name}", "value": "new"}}\n' for name in names)
+
+    result = CliRunner().invoke(app, REQUEST_CMD + ["--from", "-"], input=stdin)
+
+    assert result.exit_code == 0
+    assert "Submitted 25 of 25 requests" in result.stdout
+    assert [len(batch) for batch in mock_get_parameters] == [10, 10, 5]
+    objects = mock_s3_client.list_objects(Bucket=get_bucket_name(env="qa"))
+    assert len(objects["Contents"]) == 25
+
+
+def test__param_request__from_with_path__exits():
+    result = CliRunner().invoke(app, REQUEST_CMD + ["/qa/abc", "def", "--from", "-"])
+    assert result.exit_code == 2
@@ -0,0 +1,195 @@
+import json
+from concurrent.futures import wait
+
+import pytest
+from pytest_mock import MockerFixture
+from typer.testing import CliRunner
+
+from cli.main import app
+from cli.parameter_store import requests_client
+from cli.parameter_store.constants import REVIEW_WAIT_TIME_SECONDS, SQS_RECEIVE_MAX
+from cli.parameter_store.exceptions import (
+    MalformedS3ObjectError,
+    MalformedSQSMessageError,
+)
+from cli.parameter_store.requests_client import RequestsClient, ReviewSession
+from cli.parameter_store.utils import get_queue_name
+
+ENV = "qa"
+
+
+def fetched_request(env, record):
+    key = record["s3"]["object"]["key"]
+    request = {
+        "path": "/qa/abc",
+        "encrypt": False,
+        "value": "def",
+        "notes": [],
+        "requester": "someone@testing.com",
+        "id": key,
+        "requested_at": "20220801-170539",
+        "touches": 0,
+        "reviewed_at": "",
+    }
+    return request, key
+
+
+@pytest.fixture
+def mock_fetch(mocker: MockerFixture):
+    return mocker.patch.object(
+        RequestsClient, "fetch_s3_object_from_record", side_effect=fetched_request
+    )
+
+
+@pytest.fixture
+def mock_receive(mocker: MockerFixture, mock_all_aws):
+    return mocker.patch(
+        "cli.parameter_store.requests_client.receive_sqs_message",
+        side_effect=requests_client.receive_sqs_message,
+    )
+
+
+@pytest.fixture
+def queue_requests(mock_s3_notification_message):
+    def _queue_requests(count):
+        keys = [f"requested/{n:02}.json" for n in range(count)]
+        for key in keys:
+            mock_s3_notification_message(ENV, key)
+        return keys
+
+    return _queue_requests
+
+
+def test_review_session__receives_batches(mock_receive, mock_fetch, queue_requests):
+    keys = queue_requests(SQS_RECEIVE_MAX + 2)
+    with ReviewSession(env=ENV) as session:
+        items = list(session)
+        assert sorted(item.request()[1] for item in items) == keys
+    assert mock_receive.call_count == 3
+    for call in mock_receive.call_args_list:
+        assert call.kwargs["max_messages"] == SQS_RECEIVE_MAX
+        assert call.kwargs["wait_time_seconds"] == REVIEW_WAIT_TIME_SECONDS
+
+
+def test_review_session__prefetches_batch(mock_receive, mock_fetch, queue_requests):
+    keys = queue_requests(3)
+    with ReviewSession(env=ENV) as session:
+        items = session.receive()
+        wait([item.fetched for item in items], timeout=5)
+        assert mock_fetch.call_count == 3
+        assert sorted(item.request()[1] for item in items) == keys
+
+
+def test_review_session__done_deletes_and_exit_restores(
+    mock_receive, mock_fetch, queue_requests
+):
+    queue_requests(2)
+    with ReviewSession(env=ENV) as session:
+        first, second = session.receive()
+        session.done(first)
+    requests_client.delete_sqs_message.assert_called_once_with(
+        env=ENV, handle=first.message["ReceiptHandle"]
+    )
+    requests_client.restore_sqs_message.assert_called_once_with(
+        env=ENV, handle=second.message["ReceiptHandle"]
+    )
+
+
+def test_review_session__deletes_message_after_its_last_record(
+    mock_receive, mock_fetch, mock_sqs_client
+):
+    queue_url = mock_sqs_client.create_queue(QueueName=get_queue_name(ENV))["QueueUrl"]
+    records = [{"s3": {"object": {"key": key}}} for key in ("a.json", "b.json")]
+    mock_sqs_client.send_message(
+        QueueUrl=queue_url, MessageBody=json.dumps({"Records": records})
+    )
+    with ReviewSession(env=ENV) as session:
+        first, second = session.receive()
+        assert [first.request()[1], second.request()[1]] == ["a.json", "b.json"]
+        session.done(first)
+        requests_client.delete_sqs_message.assert_not_called()
+        session.done(second)
+        requests_client.delete_sqs_message.assert_called_once()
+    requests_client.restore_sqs_message.assert_not_called()
+
+
+def test_review_session__discards_bad_messages(
+    mock_receive, mock_fetch, mock_sqs_client, mocker: MockerFixture
+):
+    mock_delete_request = mocker.patch.object(RequestsClient, "delete_request")
+    queue_url = mock_sqs_client.create_queue(QueueName=get_queue_name(ENV))["QueueUrl"]
+    mock_sqs_client.send_message(QueueUrl=queue_url, MessageBody="not json")
+    with ReviewSession(env=ENV) as session:
+        (item,) = session.receive()
+        with pytest.raises(MalformedSQSMessageError) as e:
+            item.request()
+        session.discard(item, e.value)
+        requests_client.delete_sqs_message.assert_called_once()
+        mock_delete_request.assert_not_called()
+
+        record = {"s3": {"object": {"key": "bad.json"}}}
+        session.discard(item, MalformedS3ObjectError("bad", record=record))
+        mock_delete_request.assert_called_once_with(env=ENV, key="bad.json")
+    requests_client.restore_sqs_message.assert_not_called()
+
+
+def test_param_review__reviews_until_queue_is_empty(
+    mocker: MockerFixture, mock_receive, mock_fetch, queue_requests
+):
+    mocker.patch(
+        "cli.parameter_store.main.update_request_on_review",
+        side_effect=lambda **kw: kw["request"],
+    )
+    mocker.patch("cli.parameter_store.main.typer.prompt", return_value="approve")
+    mocker.patch("cli.parameter_store.main.typer.confirm", return_value=True)
+    mock_do = mocker.patch("cli.parameter_store.main.do")
+    keys = queue_requests(SQS_RECEIVE_MAX + 1)
+    runner = CliRunner()
+    result = runner.invoke(app, ["params", "review", ENV])
+
+    assert result.exit_code == 0, result.output
+    assert (
+        sorted(call.kwargs["original_key"] for call in mock_do.call_args_list) == keys
+    )
+    assert requests_client.delete_sqs_message.call_count == len(keys)
+    requests_client.restore_sqs_message.assert_not_called()
+    assert f"Reviewed {len(keys)} request(s)" in result.output
+
+
+def test_param_review__skips_requests_deferred_in_session(
+    mocker: MockerFixture, mock_receive, mock_fetch, queue_requests
+):
+    mocker.patch("cli.parameter_store.main.typer.prompt", return_value="defer")
+    mock_do = mocker.patch("cli.parameter_store.main.do")
+    queue_requests(1)
+    # The deferred request's new S3 object is queued again
+    mock_do.side_effect = lambda **kw: queue_requests(1)
+    runner = CliRunner()
+    result = runner.invoke(app, ["params", "review", ENV])
+
+    assert result.exit_code == 0, result.output
+    mock_do.assert_called_once()
+    requests_client.delete_sqs_message.assert_called_once()
+    requests_client.restore_sqs_message.assert_called_once()
+
+
+def test_param_review__deletes_duplicates_of_decided_requests(
+    mocker: MockerFixture, mock_receive, mock_fetch, queue_requests
+):
+    mocker.patch(
+        "cli.parameter_store.main.update_request_on_review",
+        side_effect=lambda **kw: kw["request"],
+    )
+    mocker.patch("cli.parameter_store.main.typer.prompt", return_value="approve")
+    mocker.patch("cli.parameter_store.main.typer.confirm", return_value=True)
+    mock_do = mocker.patch("cli.parameter_store.main.do")
+    queue_requests(1)
+    # The same request is delivered again
+    mock_do.side_effect = lambda **kw: queue_requests(1)
+    runner = CliRunner()
+    result = runner.invoke(app, ["params", "review", ENV])
+
+    assert result.exit_code == 0, result.output
+    mock_do.assert_called_once()
+    assert requests_client.delete_sqs_message.call_count == 2
+    requests_client.restore_sqs_message.assert_not_called()
@@ -0,0 +1,141 @@
+import time
+from datetime import datetime, timezone
+
+import pytest
+from pytest_mock import MockerFixture
+from typer.testing import CliRunner
+
+from cli.main import app
+from cli.parameter_store.name_index import (
+    NAME_INDEX_CACHE_VERSION,
+    name_index_cache_name,
+    search_names,
+)
+from cli.parameter_store.search import (
+    open_trigram_index,
+    search_index,
+    update_trigram_index,
+)
+from cli.services.aws import clients_service
+from cli.services.cache_service import write_json_cache
+
+NAMES = [
+    "/qa/api/db/password",
+    "/qa/api/db/user",
+    "/qa/api/key",
+    "/qa/billing/stripe-secret-key",
+    "/qa/service/database-url",
+]
+
+
+def search(query: str, env: str = "qa") -> list[str]:
+    with open_trigram_index(env) as index:
+        results = sorted(search_index(index, query), reverse=True)
+    return [result.path for result in results]
+
+
+@pytest.fixture
+def trigram_index():
+    update_trigram_index("qa", NAMES, stale_after=time.time() + 3600)
+
+
+@pytest.mark.parametrize(
+    "query,expected",
+    [
+        ("db pass", ["/qa/api/db/password"]),
+        ("pasword", ["/qa/api/db/password"]),
+        ("SECRET", ["/qa/billing/stripe-secret-key"]),
+        ("key", ["/qa/api/key", "/qa/billing/stripe-secret-key"]),
+        ("database", ["/qa/service/database-url"]),
+        ("db", ["/qa/api/db/user", "/qa/api/db/password"]),
+        ("nothing like it", []),
+    ],
+)
+def test_search_index(trigram_index, query, expected):
+    assert search(query)[: len(expected) or None] == expected
+
+
+def test_update_trigram_index__small_changes_are_a_delta(trigram_index):
+    with open_trigram_index("qa") as index:
+        build_id = index.build_id
+
+    update_trigram_index(
+        "qa", NAMES[1:] + ["/qa/api/db/password-v2"], stale_after=time.time() + 3600
+    )
+
+    with open_trigram_index("qa") as index:
+        assert index.build_id == build_id
+        assert index.added == ["/qa/api/db/password-v2"]
+        assert index.removed == {"/qa/api/db/password"}
+    assert search("password") == ["/qa/api/db/password-v2"]
+
+
+def test_update_trigram_index__large_changes_rebuild(trigram_index):
+    with open_trigram_index("qa") as index:
+        build_id = index.build_id
+    names = [f"/qa/generated/param-{i}" for i in range(600)]
+
+    update_trigram_index("qa", names, stale_after=time.time() + 3600)
+
+    with open_trigram_index("qa") as index:
+        assert index.build_id != build_id
+        assert index.name_count == 600
+        assert index.added == []
+    assert search("param-599")[0] == "/qa/generated/param-599"
+
+
+@pytest.fixture
+def mock_ssm_parameters(mocker: MockerFixture, mock_ssm_client, mock_name_index):
+    for name in ("/qa/api/db/password", "/qa/api/key", "/dev/api/db/password"):
+        mock_ssm_client.put_parameter(Name=name, Value="secret", Type="SecureString")
+    mocker.patch.object(
+        clients_service.EnvManager,
+        "__getitem__",
+        return_value=mocker.Mock(ssm=mock_ssm_client),
+    )
+    mock_name_index.side_effect = clients_service.describe_parameter_names
+    return mock_name_index
+
+
+def test_search_names__builds_missing_indexes(mock_ssm_parameters):
+    results = search_names("db password", ["qa", "dev"])
+    assert [result.path for result in results] == [
+        "/qa/api/db/password",
+        "/dev/api/db/password",
+    ]
+    # Fresh indexes are searched without SSM
+    mock_ssm_parameters.reset_mock()
+    assert len(search_names("password", ["qa", "dev"])) == 2
+    mock_ssm_parameters.assert_not_called()
+
+
+def test_search_names__indexes_saved_names(mock_name_index):
+    # A name index saved before there were trigram indexes
+    write_json_cache(
+        name_index_cache_name("qa"),
+        {
+            "version": NAME_INDEX_CACHE_VERSION,
+            "env": "qa",
+            "refreshed_at": datetime.now(tz=timezone.utc).isoformat(),
+            "names": ["/qa/api/db/password"],
+        },
+    )
+    results = search_names("password", ["qa"])
+    assert [result.path for result in results] == ["/qa/api/db/password"]
+    mock_name_index.assert_not_called()
+
+
+def test_search__invoke(mock_ssm_parameters):
+    result = CliRunner().invoke(app, ["params", "search", "db pass", "--env", "qa"])
+    assert result.exit_code == 0
+    assert result.stdout.splitlines() == ["/qa/api/db/password"]
+
+
+def test_search__no_matches(mock_ssm_parameters):
+    result = CliRunner().invoke(app, ["params", "search", "zzzzzz", "--env", "qa"])
+    assert result.exit_code == 1
+
+
+def test_search__unknown_env():
+    result = CliRunner().invoke(app, ["params", "search", "db", "--env", "nope"])
+    assert result.exit_code == 2
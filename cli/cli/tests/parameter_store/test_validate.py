@@ -1,6 +1,5 @@
 import pytest
 from botocore.exceptions import ClientError
-from moto import mock_ssm
 from pytest_mock import MockerFixture
 
 from cli.parameter_store.exceptions import (
@@ -9,28 +8,72 @@ from cli.parameter_store.exceptions import (
     NonExistentParameterPathError,
     StaleCredentialsError,
 )
-from cli.parameter_store.validate import validate_param_exists, validate_param_name
+from cli.parameter_store.validate import (
+    validate_param_exists,
+    validate_param_name,
+    validate_params_exist,
+)
 
 
-@mock_ssm
 def test_validate_param_not_exists__raises(mocker):
     mocker.patch(
-        "cli.parameter_store.validate.get_parameter",
-        side_effect=ClientError(
-            error_response={"Error": {"Code": "ParameterNotFound", "Status": 404}},
-            operation_name="TEST",
-        ),
+        "cli.parameter_store.validate.get_parameters",
+        return_value={"Parameters": [], "InvalidParameters": ["qa/abc"]},
     )
     with pytest.raises(NonExistentParameterPathError):
         validate_param_exists("qa", "qa/abc")
 
 
-@mock_ssm
 def test_validate_param_exists__True(mocker):
-    mocker.patch("cli.parameter_store.validate.get_parameter")
+    mocker.patch(
+        "cli.parameter_store.validate.get_parameters",
+        return_value={"Parameters": [{"Name": "qa/abc"}], "InvalidParameters": []},
+    )
     assert validate_param_exists(env="qa", path="qa/abc") is True
 
 
+def test_validate_params_exist__batches_without_decryption(
+    mocker: MockerFixture, mock_ssm_client
+):
+    names = [f"/qa/param-{i}" for i in range(12)]
+    for name in names[:11]:
+        mock_ssm_client.put_parameter(Name=name, Value="secret", Type="SecureString")
+    get_parameters = mocker.patch.object(
+        mock_ssm_client, "get_parameters", wraps=mock_ssm_client.get_parameters
+    )
+    mocker.patch(
+        "cli.services.aws.clients_service.EnvManager.__getitem__",
+        return_value=mocker.Mock(ssm=mock_ssm_client),
+    )
+
+    missing = validate_params_exist("qa", names)
+
+    assert list(missing) == ["/qa/param-11"]
+    assert isinstance(missing["/qa/param-11"], NonExistentParameterPathError)
+    assert [len(call.kwargs["Names"]) for call in get_parameters.call_args_list] == [
+        10,
+        2,
+    ]
+    assert all(
+        call.kwargs["WithDecryption"] is False for call in get_parameters.call_args_list
+    )
+
+
+def test_validate_params_exist__caches_results(mocker: MockerFixture):
+    get_parameters = mocker.patch(
+        "cli.parameter_store.validate.get_parameters",
+        return_value={
+            "Parameters": [{"Name": "/qa/a"}],
+            "InvalidParameters": ["/qa/b"],
+        },
+    )
+    assert list(validate_params_exist("qa", ["/qa/a", "/qa/b"])) == ["/qa/b"]
+    assert list(validate_params_exist("qa", ["/qa/b", "/qa/a"])) == ["/qa/b"]
+    with pytest.raises(NonExistentParameterPathError):
+        validate_param_exists("qa", "/qa/b")
+    get_parameters.assert_called_once_with("qa", ["/qa/a", "/qa/b"])
+
+
 @pytest.mark.parametrize(
     "client_error,raised_exception",
     [
@@ -57,7 +100,9 @@ def test_validate_param_exists__True(mocker):
 def test_validate_param_exists__raises(
     mocker: MockerFixture, client_error, raised_exception
 ):
-    mocker.patch("cli.parameter_store.validate.get_parameter", side_effect=client_error)
+    mocker.patch(
+        "cli.parameter_store.validate.get_parameters", side_effect=client_error
+    )
     with pytest.raises(raised_exception):
         validate_param_exists("qa", "abc")
 
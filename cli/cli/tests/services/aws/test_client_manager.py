@@ -0,0 +1,156 @@
+import configparser
+
+import pytest
+from botocore.config import Config
+from pytest_mock import MockerFixture
+
+from cli.constants import ENV_TO_AWS_ACCOUNT
+from cli.services.aws import clients_service
+from cli.services.aws.client_registry import ClientKey, ClientRegistry
+from cli.services.aws.clients_service import AWSClientManager, EnvManager
+from cli.services.aws.config_service import AWS_CFG
+from cli.services.aws.session_service import SessionFactory
+
+
+@pytest.fixture
+def mock_env_config(mocker: MockerFixture, mock_aws_config):
+    config = configparser.RawConfigParser(default_section="default")
+    config.read_dict(
+        {
+            "default": {"region": "us-east-2"},
+            "profile dev": {
+                "sso_region": "us-east-2",
+                "sso_account_id": ENV_TO_AWS_ACCOUNT["prod"],
+                "sso_role_name": "Prod-Developer",
+            },
+            "profile dev-qa": {
+                "sso_region": "us-east-2",
+                "sso_account_id": ENV_TO_AWS_ACCOUNT["qa"],
+                "sso_role_name": "QA-Developer",
+            },
+        }
+    )
+    AWS_CFG._reset()
+    mock_aws_config.return_value = config
+    return config
+
+
+@pytest.fixture
+def mock_boto3_session(mocker: MockerFixture, mock_env_config, mock_aws_files):
+    mocker.patch.object(clients_service, "CLIENT_REGISTRY", ClientRegistry())
+    mocker.patch.object(clients_service, "SESSIONS", SessionFactory())
+    return mocker.patch("cli.services.aws.session_service.boto3.Session")
+
+
+def test_client_manager__plain_attributes_skip_botocore(
+    mock_env_config, mock_boto3_session
+):
+    manager = AWSClientManager("qa")
+    assert manager.env == "qa"
+    assert manager.profile_name == "dev-qa"
+    mock_boto3_session.assert_called_once()
+    mock_boto3_session.return_value.get_available_services.assert_not_called()
+    assert EnvManager.stats()["sessions"] == 1
+    assert EnvManager.stats()["clients"] == 0
+
+
+def test_client_manager__service_attribute_returns_cached_client(
+    mock_env_config, mock_boto3_session
+):
+    manager = AWSClientManager("qa")
+    assert manager.ssm is manager.ssm
+    mock_boto3_session.return_value.client.assert_called_once_with(
+        "ssm", region_name="us-east-2", config=clients_service.CLIENT_REGISTRY.config
+    )
+    assert EnvManager.stats() == {
+        "sessions": 1,
+        "clients": 1,
+        "hits": 1,
+        "misses": 1,
+        "live_clients": 1,
+    }
+
+
+def test_client_manager__clients_are_scoped_to_env(mock_env_config, mock_boto3_session):
+    mock_boto3_session.return_value.client.side_effect = (
+        lambda *args, **kwargs: object()
+    )
+    qa_s3 = AWSClientManager("qa").s3
+    prod_s3 = AWSClientManager("prod").s3
+    assert qa_s3 is not prod_s3
+    assert clients_service.CLIENT_REGISTRY.stats()["live_clients"] == 2
+
+
+def test_client_manager__unsupported_service(mock_env_config, mock_boto3_session):
+    manager = AWSClientManager("qa")
+    with pytest.raises(AttributeError):
+        manager.dynamodb
+    mock_boto3_session.return_value.client.assert_not_called()
+
+
+def test_client_registry__config(mocker: MockerFixture):
+    registry = ClientRegistry(max_pool_connections=50, read_timeout=10)
+    assert registry.config.max_pool_connections == 50
+    assert registry.config.read_timeout == 10
+    assert registry.config.tcp_keepalive is True
+    assert registry.config.retries["mode"] == "adaptive"
+
+    session = mocker.MagicMock()
+    key = ClientKey(env="qa", profile="dev-qa", region="us-east-2", service="sts")
+    registry.client(session, key)
+    registry.client(session, key._replace(region="us-west-2"))
+    registry.client(session, key)
+    assert registry.stats() == {"hits": 1, "misses": 2, "live_clients": 2}
+    registry.clear()
+    assert registry.stats() == {"hits": 0, "misses": 0, "live_clients": 0}
+
+
+def test_client_registry__skips_unsupported_defaults(mocker: MockerFixture):
+    option_defaults = dict(Config.OPTION_DEFAULTS)
+    del option_defaults["tcp_keepalive"]
+    mocker.patch.object(Config, "OPTION_DEFAULTS", option_defaults)
+    registry = ClientRegistry()
+    assert registry.config.max_pool_connections == 20
+    assert not hasattr(registry.config, "tcp_keepalive")
+
+
+def test_session_factory__seeds_config_and_shares_data_loader(
+    mocker: MockerFixture, tmp_path, monkeypatch, mock_aws_config
+):
+    config = configparser.RawConfigParser(default_section="default")
+    config.read_dict(
+        {
+            "profile dev": {"region": "us-east-2"},
+            "profile dev-qa": {"region": "us-east-2"},
+        }
+    )
+    mock_aws_config.return_value = config
+    credentials_file = tmp_path / "credentials"
+    credentials_file.write_text(
+        "[dev-qa]\naws_access_key_id = accessKeyId\n"
+        + "aws_secret_access_key = secretAccessKey\naws_session_token = sessionToken\n"
+    )
+    monkeypatch.setenv("AWS_CONFIG_FILE", str(tmp_path / "config"))
+    monkeypatch.setenv("AWS_SHARED_CREDENTIALS_FILE", str(credentials_file))
+    credentials_sections = configparser.RawConfigParser()
+    credentials_sections.read_dict({"only-credentials": {}})
+    mocker.patch(
+        "cli.services.aws.config_service.load_credentials_from_file",
+        return_value=credentials_sections,
+    )
+    factory = SessionFactory()
+    qa = factory.session("dev-qa")
+    assert factory.session("dev-qa") is qa
+    prod = factory.session("dev")
+    assert factory.created == 2
+
+    credentials = qa.get_credentials()
+    assert credentials.access_key == "accessKeyId"
+    assert credentials.token == "sessionToken"
+    assert qa.region_name == "us-east-2"
+    assert prod.profile_name == "dev"
+    assert qa._session.get_component("data_loader") is prod._session.get_component(
+        "data_loader"
+    )
+    assert qa._session.full_config is prod._session.full_config
+    assert factory.session("only-credentials").profile_name == "only-credentials"
@@ -34,6 +34,7 @@ def test_request_client__next_sqs_message__success(
     mocker,
     mock_put_request,
     mock_all_aws,
+    mock_aws_config,
 ):
     dummy_config_data = {
         "default": {"region": "us-east-2"},
@@ -56,7 +57,7 @@ def test_request_client__next_sqs_message__success(
     dummy_config = configparser.RawConfigParser(default_section="default")
     dummy_config.read_dict(dummy_config_data)
     AWS_CFG._reset()
-    mocker.patch.object(AWS_CFG, "_config", dummy_config)
+    mock_aws_config.return_value = dummy_config
 
     mock_put_request("qa")
 
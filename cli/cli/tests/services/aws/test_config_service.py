@@ -9,12 +9,13 @@ from unittest.mock import MagicMock, mock_open
 import pytest
 from pytest_mock import MockerFixture
 
-from cli.services.aws.config_service import AWS_CFG
+from cli.constants import ENV_TO_AWS_ACCOUNT
+from cli.services.aws.config_service import AWS_CFG, load_config_from_file
 from cli.services.aws.exceptions import ExpiredCredentials, NoCachedTokens
 
 
 @pytest.mark.freeze_time("2022-08-24")
-def test_AWS_CFG(mocker):
+def test_AWS_CFG(mocker, mock_aws_config):
     dummy_config_data = {
         "default": {"region": "us-east-2"},
         "dev": {"region": "us-east-2"},
@@ -38,7 +39,7 @@ def test_AWS_CFG(mocker):
     dummy_config = configparser.RawConfigParser(default_section="default")
     dummy_config.read_dict(dummy_config_data)
     AWS_CFG._reset()
-    mocker.patch.object(AWS_CFG, "_config", dummy_config)
+    mock_aws_config.return_value = dummy_config
 
     assert AWS_CFG.front_matter == {
         "default": {"region": "us-east-2"},
@@ -73,7 +74,14 @@ def get_mock_file_path(data, st_mtime=None):
     path = MagicMock(
         spec=PosixPath,
         open=mock_open(read_data=json.dumps(data)),
-        stat=MagicMock(return_value=MagicMock(spec=stat_result, st_mtime=st_mtime)),
+        stat=MagicMock(
+            return_value=MagicMock(
+                spec=stat_result,
+                st_mtime=st_mtime,
+                st_mtime_ns=int(st_mtime * 1e9),
+                st_size=len(json.dumps(data)),
+            )
+        ),
     )
     return path
 
@@ -264,3 +272,165 @@ def test_get_latest_token(
     )
     with expected_to_raise:
         assert AWS_CFG.get_latest_token() == expected_result
+
+
+def write_config(path, sections: dict):
+    config = configparser.RawConfigParser()
+    config.read_dict(sections)
+    with path.open("w") as f:
+        config.write(f)
+
+
+def test_AWS_CFG__reloads_when_file_changes(mocker: MockerFixture, tmp_path):
+    config_path = tmp_path / "config"
+    mocker.patch("cli.services.aws.config_service.AWS_CONFIG_FILE_PATH", config_path)
+    mocker.patch(
+        "cli.services.aws.config_service.load_config_from_file",
+        side_effect=lambda: load_config_from_file(config_path),
+    )
+    qa = {
+        "sso_account_id": ENV_TO_AWS_ACCOUNT["qa"],
+        "sso_role_name": "QA-Developer",
+    }
+    write_config(config_path, {"profile dev-qa": qa})
+    AWS_CFG._reset()
+    assert AWS_CFG.get_profile_name_for_env("qa") == "profile dev-qa"
+    assert AWS_CFG.get_profile_name_for_env("qa") == "profile dev-qa"
+
+    write_config(
+        config_path,
+        {
+            "profile dev-qa": qa,
+            "profile dev-qa-admin": {**qa, "sso_role_name": "QA-Administrator"},
+        },
+    )
+    assert AWS_CFG.get_profile_name_for_env("qa") == "profile dev-qa-admin"
+    AWS_CFG._reset()
+
+
+def test_AWS_CFG__index_skips_unknown_roles(mocker: MockerFixture, mock_aws_config):
+    dummy_config = configparser.RawConfigParser(default_section="default")
+    dummy_config.read_dict(
+        {
+            "profile dev-qa-secops": {
+                "sso_account_id": ENV_TO_AWS_ACCOUNT["qa"],
+                "sso_role_name": "QA-SecOps",
+            },
+            "profile dev-qa": {
+                "sso_account_id": ENV_TO_AWS_ACCOUNT["qa"],
+                "sso_role_name": "QA-Developer",
+            },
+            "profile dev-qa-google": {
+                "google_config.role_arn": f"arn:aws:iam::{ENV_TO_AWS_ACCOUNT['qa']}:role/Analyst",
+            },
+        }
+    )
+    AWS_CFG._reset()
+    mock_aws_config.return_value = dummy_config
+    assert AWS_CFG.get_profile_name_for_env("qa") == "profile dev-qa"
+    assert (
+        AWS_CFG.get_profile_name_for_env("qa", skip_priorities={3})
+        == "profile dev-qa-google"
+    )
+
+
+def test_AWS_CFG__warm_start_skips_parsing(mocker: MockerFixture, tmp_path):
+    config_path = tmp_path / "config"
+    mocker.patch("cli.services.aws.config_service.AWS_CONFIG_FILE_PATH", config_path)
+    mock_load = mocker.patch(
+        "cli.services.aws.config_service.load_config_from_file",
+        side_effect=lambda: load_config_from_file(config_path),
+    )
+    qa = {
+        "sso_account_id": ENV_TO_AWS_ACCOUNT["qa"],
+        "sso_role_name": "QA-Developer",
+    }
+    write_config(
+        config_path, {"default": {"region": "us-east-2"}, "profile dev-qa": qa}
+    )
+    AWS_CFG._reset()
+    assert AWS_CFG.get_profile_name_for_env("qa") == "profile dev-qa"
+    assert mock_load.call_count == 1
+
+    # a new process with an unchanged config file
+    AWS_CFG._reset()
+    assert AWS_CFG.get_profile_name_for_env("qa") == "profile dev-qa"
+    assert AWS_CFG.front_matter == {"default": {"region": "us-east-2"}}
+    assert mock_load.call_count == 1
+
+    # the same content with a new mtime is still a cache hit
+    config_path.touch()
+    AWS_CFG._reset()
+    assert AWS_CFG.profiles == {"profile dev-qa": qa}
+    assert mock_load.call_count == 1
+
+    write_config(
+        config_path,
+        {"profile dev-qa-admin": {**qa, "sso_role_name": "QA-Administrator"}},
+    )
+    AWS_CFG._reset()
+    assert AWS_CFG.get_profile_name_for_env("qa") == "profile dev-qa-admin"
+    assert mock_load.call_count == 2
+    AWS_CFG._reset()
+
+
+def test_AWS_CFG__warm_start_rebuilds_when_roles_change(
+    mocker: MockerFixture, tmp_path
+):
+    config_path = tmp_path / "config"
+    mocker.patch("cli.services.aws.config_service.AWS_CONFIG_FILE_PATH", config_path)
+    mock_load = mocker.patch(
+        "cli.services.aws.config_service.load_config_from_file",
+        side_effect=lambda: load_config_from_file(config_path),
+    )
+    qa = {"sso_account_id": ENV_TO_AWS_ACCOUNT["qa"]}
+    write_config(
+        config_path,
+        {
+            "profile dev-qa": {**qa, "sso_role_name": "QA-Developer"},
+            "profile dev-qa-admin": {**qa, "sso_role_name": "QA-Administrator"},
+        },
+    )
+    AWS_CFG._reset()
+    assert AWS_CFG.get_profile_name_for_env("qa") == "profile dev-qa-admin"
+
+    # a new release that prefers Developer roles, with an unchanged config file
+    mocker.patch(
+        "cli.services.aws.config_service.PRIORITY_BY_ROLE",
+        {"Developer": 0, "Administrator": 1},
+    )
+    AWS_CFG._reset()
+    assert AWS_CFG.get_profile_name_for_env("qa") == "profile dev-qa"
+    assert mock_load.call_count == 2
+    AWS_CFG._reset()
+
+
+def test_write_sections_to_file__backs_up_and_replaces_atomically(
+    mocker: MockerFixture, tmp_path
+):
+    credentials = tmp_path / "credentials"
+    credentials.write_text("[old]\n")
+    writeable_file = MagicMock(value=credentials)
+    timestamps = iter(range(1661299200, 1661299300))
+    mocker.patch(
+        "cli.services.aws.config_service.datetime",
+        MagicMock(utcnow=lambda: MagicMock(timestamp=lambda: next(timestamps))),
+    )
+    for i in range(5):
+        bytes_written = AWS_CFG.write_sections_to_file(
+            sections={f"profile-{i}": {"key": "value"}},
+            file=writeable_file,
+            overwrite=True,
+        )
+    assert credentials.read_text() == "[profile-4]\nkey = value\n\n"
+    assert bytes_written == len(credentials.read_bytes())
+    backups = sorted(p.name for p in tmp_path.glob("credentials.dev-cli-backup-*"))
+    assert backups == [
+        "credentials.dev-cli-backup-1661299202",
+        "credentials.dev-cli-backup-1661299203",
+        "credentials.dev-cli-backup-1661299204",
+    ]
+    assert not list(tmp_path.glob(".credentials.*"))
+
+    with pytest.raises(FileExistsError):
+        AWS_CFG.write_sections_to_file(sections={}, file=writeable_file)
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+from pytest_mock import MockerFixture
+
+from cli.parameter_store.actions import make_request
+from cli.services.aws import clients_service
+from cli.services.aws.identity_cache import IdentityCache
+
+IDENTITY = {
+    "UserId": "AROAEXAMPLE:someone@testing.com",
+    "Account": "012345678902",
+    "Arn": "arn:aws:sts::012345678902:assumed-role/QA-Developer/someone@testing.com",
+    "ResponseMetadata": {},
+}
+
+
+def in_hours(hours):
+    return datetime.now(tz=timezone.utc) + timedelta(hours=hours)
+
+
+def test_identity_cache__memory_hit():
+    fetch = MagicMock(return_value=IDENTITY)
+    cache = IdentityCache()
+    expiry = in_hours(1)
+    assert cache.get("dev-qa", expiry, fetch)["UserId"] == IDENTITY["UserId"]
+    assert cache.get("dev-qa", expiry, fetch)["UserId"] == IDENTITY["UserId"]
+    fetch.assert_called_once()
+
+
+def test_identity_cache__persisted_across_processes():
+    fetch = MagicMock(return_value=IDENTITY)
+    expiry = in_hours(1)
+    IdentityCache().get("dev-qa", expiry, fetch)
+    assert IdentityCache().get("dev-qa", expiry, fetch) == {
+        k: IDENTITY[k] for k in ("UserId", "Account", "Arn")
+    }
+    fetch.assert_called_once()
+
+
+@pytest.mark.parametrize("expiry", [None, in_hours(-1)])
+def test_identity_cache__unknown_or_expired_credentials_not_persisted(expiry):
+    fetch = MagicMock(return_value=IDENTITY)
+    IdentityCache().get("dev-qa", expiry, fetch)
+    IdentityCache().get("dev-qa", expiry, fetch)
+    assert fetch.call_count == 2
+
+
+def test_identity_cache__new_credentials_miss():
+    fetch = MagicMock(return_value=IDENTITY)
+    cache = IdentityCache()
+    cache.get("dev-qa", in_hours(1), fetch)
+    cache.get("dev-qa", in_hours(2), fetch)
+    assert fetch.call_count == 2
+
+
+def test_make_request__one_sts_call(mocker: MockerFixture):
+    manager = MagicMock(profile_name="dev-qa")
+    manager.credential_expiry.return_value = in_hours(1)
+    manager.sts.get_caller_identity.return_value = IDENTITY
+    mocker.patch.object(clients_service, "aws", {"qa": manager})
+    mocker.patch.object(clients_service, "IDENTITY_CACHE", IdentityCache())
+    request = make_request(
+        env="qa", path="/qa/abc", value="def", encrypt=True, note=None
+    )
+    assert request["requester"] == "someone@testing.com"
+    assert request["notes"][0]["author"] == "someone@testing.com"
+    manager.sts.get_caller_identity.assert_called_once()
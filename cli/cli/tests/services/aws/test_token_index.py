@@ -0,0 +1,99 @@
+import json
+import os
+
+import pytest
+from pytest_mock import MockerFixture
+
+from cli.services.aws import token_index
+from cli.services.aws.config_service import AWS_CFG, AWSConfigService
+from cli.services.aws.token_index import TokenIndex
+
+
+def write_token(path, access_token, expires_at, mtime):
+    data = {"region": "us-east-2", "expiresAt": expires_at}
+    if access_token:
+        data["accessToken"] = access_token
+    path.write_text(json.dumps(data))
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def token_dir(tmp_path):
+    directory = tmp_path / "sso" / "cache"
+    directory.mkdir(parents=True)
+    write_token(directory / "a.json", "TOKEN_A", "2022-08-26T20:10:10Z", 1661203375)
+    write_token(directory / "b.json", "TOKEN_B", "2022-08-26T20:10:10Z", 1661203385)
+    write_token(directory / "c.json", None, "2022-08-26T20:10:10Z", 1661203395)
+    return directory
+
+
+def test_token_index__reads_each_file_once(mocker: MockerFixture, token_dir):
+    spy = mocker.spy(token_index, "read_token_entry")
+    index = TokenIndex(token_dir)
+    entries = index.update(index.paths())
+    index.save()
+    assert spy.call_count == 3
+    assert entries[token_dir / "b.json"].has_access_token
+    assert not entries[token_dir / "c.json"].has_access_token
+
+    mock_glob = mocker.spy(type(token_dir), "glob")
+    index = TokenIndex(token_dir)
+    assert index.update(index.paths()) == entries
+    assert spy.call_count == 3
+    mock_glob.assert_not_called()
+
+
+def test_token_index__rereads_file_rewritten_in_place(mocker: MockerFixture, token_dir):
+    index = TokenIndex(token_dir)
+    index.update(index.paths())
+    index.save()
+    directory_mtime = token_dir.stat().st_mtime_ns
+    write_token(token_dir / "c.json", "TOKEN_C", "2022-08-27T20:10:10Z", 1661203405)
+    os.utime(token_dir, ns=(directory_mtime, directory_mtime))
+
+    index = TokenIndex(token_dir)
+    entries = index.update(index.paths())
+    assert entries[token_dir / "c.json"].has_access_token
+    assert entries[token_dir / "c.json"].expires_at == "2022-08-27T20:10:10Z"
+
+
+def test_token_index__update_with_subset_keeps_other_entries(token_dir):
+    index = TokenIndex(token_dir)
+    index.update(index.paths())
+    index.save()
+
+    index = TokenIndex(token_dir)
+    index.update({token_dir / "a.json"})
+    index.save()
+
+    index = TokenIndex(token_dir)
+    assert index.paths() == {
+        token_dir / name for name in ("a.json", "b.json", "c.json")
+    }
+
+
+def test_token_index__forgets_removed_files(token_dir):
+    index = TokenIndex(token_dir)
+    index.update(index.paths())
+    index.save()
+    (token_dir / "b.json").unlink()
+
+    index = TokenIndex(token_dir)
+    assert set(index.update(index.paths())) == {
+        token_dir / "a.json",
+        token_dir / "c.json",
+    }
+    assert set(index.entries) == {str(token_dir / "a.json"), str(token_dir / "c.json")}
+
+
+@pytest.mark.freeze_time("2022-08-24")
+def test_get_latest_token__newest_valid_token(mocker: MockerFixture, token_dir):
+    mocker.patch(
+        "cli.services.aws.config_service.AWS_ACCESS_TOKEN_CACHE_DIR_PATH", token_dir
+    )
+    mocker.patch.object(
+        AWSConfigService, "_sso_cache", staticmethod(lambda index: index.paths())
+    )
+    assert AWS_CFG.get_latest_token() == "TOKEN_B"
+    write_token(token_dir / "b.json", "TOKEN_B", "2022-08-23T20:10:10Z", 1661203415)
+    assert AWS_CFG.get_latest_token() == "TOKEN_A"
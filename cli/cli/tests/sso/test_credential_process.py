@@ -0,0 +1,110 @@
+import json
+
+import pytest
+from pytest_mock import MockerFixture
+from typer.testing import CliRunner
+
+from cli.main import app
+from cli.services.aws.exceptions import NoCachedTokens
+from cli.sso import credential_process
+from cli.sso.utils import AWS_CFG
+
+CREDENTIAL_PROCESS_CMD = ["sso", "credential-process", "--profile"]
+PROFILES = {
+    "profile dev-qa": {
+        "sso_start_url": "https://dev_tools.apps.com/start",
+        "sso_region": "us-east-2",
+        "region": "us-east-2",
+        "sso_account_id": "12345678902",
+        "sso_role_name": "QA-Developer",
+    }
+}
+
+
+def role_credentials(expiration):
+    return {
+        "aws_access_key_id": "accessKeyId",
+        "aws_secret_access_key": "secretAccessKey",
+        "aws_session_token": "sessionToken",
+        "aws_session_expiration": expiration,
+    }
+
+
+@pytest.fixture
+def mock_profiles(mocker: MockerFixture):
+    mocker.patch.dict(credential_process._CREDENTIALS, clear=True)
+    mocker.patch.object(AWS_CFG, "_credentials", {})
+    mocker.patch.object(
+        type(AWS_CFG), "profiles", new_callable=mocker.PropertyMock
+    ).return_value = PROFILES
+
+
+@pytest.mark.freeze_time("2022-08-24")
+def test_credential_process__fetches_once_then_uses_cache(
+    mocker: MockerFixture, mock_profiles
+):
+    mock_token = mocker.patch.object(AWS_CFG, "get_latest_token", return_value="t")
+    mock_fetch = mocker.patch(
+        "cli.sso.utils.get_role_credentials",
+        return_value=("dev-qa", role_credentials(1661302800000)),
+    )
+    runner = CliRunner()
+    result = runner.invoke(app, CREDENTIAL_PROCESS_CMD + ["dev-qa"])
+    assert result.exit_code == 0
+    assert json.loads(result.stdout) == {
+        "Version": 1,
+        "AccessKeyId": "accessKeyId",
+        "SecretAccessKey": "secretAccessKey",
+        "SessionToken": "sessionToken",
+        "Expiration": "2022-08-24T01:00:00+00:00",
+    }
+    mock_fetch.assert_called_once_with(
+        profile=PROFILES["profile dev-qa"], token="t", profile_name="profile dev-qa"
+    )
+
+    credential_process._CREDENTIALS.clear()
+    result = runner.invoke(app, CREDENTIAL_PROCESS_CMD + ["dev-qa"])
+    assert result.exit_code == 0
+    mock_fetch.assert_called_once()
+    mock_token.assert_called_once()
+
+
+@pytest.mark.freeze_time("2022-08-24")
+def test_credential_process__uses_credentials_file(
+    mocker: MockerFixture, mock_profiles
+):
+    mock_fetch = mocker.patch("cli.sso.utils.get_role_credentials")
+    AWS_CFG._credentials = {"dev-qa": role_credentials("2022-08-24T08:00:00Z")}
+    result = CliRunner().invoke(app, CREDENTIAL_PROCESS_CMD + ["dev-qa"])
+    assert result.exit_code == 0
+    assert json.loads(result.stdout)["Expiration"] == "2022-08-24T08:00:00+00:00"
+    mock_fetch.assert_not_called()
+
+
+@pytest.mark.freeze_time("2022-08-24")
+def test_credential_process__needs_login(mocker: MockerFixture, mock_profiles):
+    AWS_CFG._credentials = {"dev-qa": role_credentials("2022-08-23T08:00:00Z")}
+    mocker.patch.object(AWS_CFG, "get_latest_token", side_effect=NoCachedTokens())
+    result = CliRunner(mix_stderr=False).invoke(
+        app, CREDENTIAL_PROCESS_CMD + ["dev-qa"]
+    )
+    assert result.exit_code == 1
+    assert result.stdout == ""
+    assert "dev sso login" in result.stderr
+
+
+@pytest.mark.freeze_time("2022-08-24")
+def test_credential_process__refetches_within_sdk_refresh_window(
+    mocker: MockerFixture, mock_profiles
+):
+    # 12 minutes left: unexpired, but an SDK would ask again on every call
+    AWS_CFG._credentials = {"dev-qa": role_credentials("2022-08-24T00:12:00Z")}
+    mocker.patch.object(AWS_CFG, "get_latest_token", return_value="t")
+    mock_fetch = mocker.patch(
+        "cli.sso.utils.get_role_credentials",
+        return_value=("dev-qa", role_credentials(1661302800000)),
+    )
+    result = CliRunner().invoke(app, CREDENTIAL_PROCESS_CMD + ["dev-qa"])
+    assert result.exit_code == 0
+    assert json.loads(result.stdout)["Expiration"] == "2022-08-24T01:00:00+00:00"
+    mock_fetch.assert_called_once()
@@ -0,0 +1,151 @@
+import json
+from threading import Event, Thread
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+from pytest_mock import MockerFixture
+
+from cli.services.aws.exceptions import NoCachedTokens
+from cli.sso import credential_process
+from cli.sso import utils as sso_utils
+from cli.sso.credential_server import CredentialProvider, CredentialServer
+from cli.sso.utils import AWS_CFG
+
+PROFILES = {
+    "profile dev-qa": {
+        "sso_start_url": "https://dev_tools.apps.com/start",
+        "sso_region": "us-east-2",
+        "region": "us-east-2",
+        "sso_account_id": "123456789012",
+        "sso_role_name": "QA-Developer",
+    }
+}
+
+
+@pytest.fixture
+def stubbed_sso(mocker: MockerFixture):
+    mocker.patch.dict(credential_process._CREDENTIALS, clear=True)
+    mocker.patch.object(AWS_CFG, "_credentials", {})
+    mocker.patch.object(
+        type(AWS_CFG), "profiles", new_callable=mocker.PropertyMock
+    ).return_value = PROFILES
+    mocker.patch.object(AWS_CFG, "get_latest_token", return_value="token")
+    client = boto3.client(
+        "sso",
+        region_name="us-east-2",
+        aws_access_key_id="testing",
+        aws_secret_access_key="testing",
+    )
+    mocker.patch.dict(
+        sso_utils._SSO_CLIENTS, {("sso", "us-east-2"): client}, clear=True
+    )
+    with Stubber(client) as stubber:
+        yield stubber
+
+
+@pytest.fixture
+def server():
+    server = CredentialServer(("127.0.0.1", 0), CredentialProvider(), "secret")
+    thread = Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05})
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def get(server, path, token="secret"):
+    request = Request(f"{server.url}{path}", headers={"Authorization": token})
+    with urlopen(request, timeout=5) as response:
+        return json.load(response)
+
+
+def error_code(server, path, token="secret") -> int:
+    try:
+        get(server, path, token=token)
+    except HTTPError as e:
+        return e.code
+    pytest.fail(f"GET {path} did not fail")
+
+
+def add_role_credentials_response(stubber: Stubber, expiration: int):
+    stubber.add_response(
+        "get_role_credentials",
+        {
+            "roleCredentials": {
+                "accessKeyId": "accessKeyId",
+                "secretAccessKey": "secretAccessKey",
+                "sessionToken": "sessionToken",
+                "expiration": expiration,
+            }
+        },
+        {
+            "roleName": "QA-Developer",
+            "accountId": "123456789012",
+            "accessToken": "token",
+        },
+    )
+
+
+@pytest.mark.freeze_time("2022-08-24")
+def test_serve_credentials__cached_until_expiring(stubbed_sso, server):
+    add_role_credentials_response(stubbed_sso, expiration=1661302800000)
+    expected = {
+        "AccessKeyId": "accessKeyId",
+        "SecretAccessKey": "secretAccessKey",
+        "Token": "sessionToken",
+        "Expiration": "2022-08-24T01:00:00+00:00",
+    }
+    assert get(server, "/dev-qa") == expected
+    assert get(server, "/dev-qa") == expected
+    stubbed_sso.assert_no_pending_responses()
+    assert server.provider.profiles == {"dev-qa"}
+
+
+def test_serve_credentials__refreshes_expiring_profiles(stubbed_sso, server):
+    add_role_credentials_response(stubbed_sso, expiration=1661302800000)
+    add_role_credentials_response(stubbed_sso, expiration=32503680000000)
+    get(server, "/dev-qa")
+    server.provider.refresh()
+    stubbed_sso.assert_no_pending_responses()
+    assert get(server, "/dev-qa")["Expiration"] == "3000-01-01T00:00:00+00:00"
+
+
+@pytest.mark.freeze_time("2022-08-24")
+def test_serve_credentials__refreshes_ahead_of_sdk_refresh_window(stubbed_sso, server):
+    # 18 minutes left: SDKs accept these now, but would start refreshing them within a few minutes
+    add_role_credentials_response(stubbed_sso, expiration=1661300280000)
+    add_role_credentials_response(stubbed_sso, expiration=1661302800000)
+    assert get(server, "/dev-qa")["Expiration"] == "2022-08-24T00:18:00+00:00"
+    server.provider.refresh()
+    stubbed_sso.assert_no_pending_responses()
+    assert get(server, "/dev-qa")["Expiration"] == "2022-08-24T01:00:00+00:00"
+
+
+def test_serve_credentials__errors(mocker: MockerFixture, stubbed_sso, server):
+    assert error_code(server, "/dev-qa", token="wrong") == 401
+    assert error_code(server, "/nope") == 404
+    AWS_CFG.get_latest_token.side_effect = NoCachedTokens()
+    assert error_code(server, "/dev-qa") == 503
+
+
+def test_credential_provider__slow_profile_does_not_block_others():
+    slow_started, release_slow = Event(), Event()
+
+    def fetch(profile_name: str) -> dict[str, str]:
+        if profile_name == "slow":
+            slow_started.set()
+            release_slow.wait(5)
+        return {"profile": profile_name}
+
+    provider = CredentialProvider(fetch=fetch)
+    slow = Thread(target=provider.get, args=("slow",))
+    slow.start()
+    assert slow_started.wait(5)
+    assert provider.get("fast") == {"profile": "fast"}
+    release_slow.set()
+    slow.join()
+    assert provider.profiles == {"fast", "slow"}
@@ -0,0 +1,241 @@
+import json
+from datetime import datetime, timezone
+from threading import Thread
+from typing import Any
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+from pytest_mock import MockerFixture
+
+from cli.services.aws.config_service import AWS_CFG, AWSConfigService
+from cli.services.aws.exceptions import ExpiredCredentials, NoCachedTokens
+from cli.services.cache_service import cache_path, file_lock, write_json_cache
+from cli.sso import device_auth
+from cli.sso import utils as sso_utils
+from cli.sso.constants import OIDC_DEVICE_GRANT, OIDC_REFRESH_GRANT
+from cli.sso.device_auth import OIDC_CLIENT_CACHE_NAME
+from cli.sso.exceptions import DeviceAuthorizationFailed
+
+START_URL = "https://dev_tools.apps.com/start"
+CLIENT = {"clientId": "id", "clientSecret": "secret"}
+REGISTRATION: dict[str, Any] = {**CLIENT, "clientSecretExpiresAt": 1669161600}
+AUTHORIZATION = {
+    "deviceCode": "device",
+    "userCode": "ABCD-EFGH",
+    "verificationUri": "https://device.sso.us-east-2.amazonaws.com/",
+    "verificationUriComplete": "https://device.sso.us-east-2.amazonaws.com/?user_code=ABCD-EFGH",
+    "expiresIn": 600,
+    "interval": 1,
+}
+CREATE_TOKEN_PARAMS = {
+    **CLIENT,
+    "grantType": OIDC_DEVICE_GRANT,
+    "deviceCode": "device",
+}
+
+
+@pytest.fixture
+def stubbed_oidc(mocker: MockerFixture, tmp_path):
+    token_dir = tmp_path / "sso" / "cache"
+    mocker.patch.object(device_auth, "AWS_ACCESS_TOKEN_CACHE_DIR_PATH", token_dir)
+    mocker.patch(
+        "cli.services.aws.config_service.AWS_ACCESS_TOKEN_CACHE_DIR_PATH", token_dir
+    )
+    mocker.patch.object(
+        AWSConfigService, "_sso_cache", staticmethod(lambda index: index.paths())
+    )
+    client = boto3.client("sso-oidc", region_name="us-east-2")
+    mocker.patch.dict(
+        sso_utils._SSO_CLIENTS, {("sso-oidc", "us-east-2"): client}, clear=True
+    )
+    with Stubber(client) as stubber:
+        yield stubber
+
+
+def add_device_authorization(stubber: Stubber):
+    stubber.add_response(
+        "register_client",
+        {**REGISTRATION, "clientIdIssuedAt": 1661299200},
+        {
+            "clientName": "dev-cli",
+            "clientType": "public",
+            "scopes": ["sso:account:access"],
+        },
+    )
+    stubber.add_response(
+        "start_device_authorization",
+        AUTHORIZATION,
+        {**CLIENT, "startUrl": START_URL},
+    )
+
+
+@pytest.mark.freeze_time("2022-08-24")
+def test_device_authorization__saves_token_for_get_latest_token(stubbed_oidc):
+    add_device_authorization(stubbed_oidc)
+    stubbed_oidc.add_client_error(
+        "create_token",
+        "AuthorizationPendingException",
+        expected_params=CREATE_TOKEN_PARAMS,
+    )
+    stubbed_oidc.add_client_error(
+        "create_token", "SlowDownException", expected_params=CREATE_TOKEN_PARAMS
+    )
+    stubbed_oidc.add_response(
+        "create_token",
+        {"accessToken": "TOKEN", "expiresIn": 28800, "refreshToken": "REFRESH"},
+        CREATE_TOKEN_PARAMS,
+    )
+    sleeps: list[float] = []
+    opened: list[str] = []
+
+    path = device_auth.device_authorization(
+        START_URL, "us-east-2", open_browser=opened.append, sleep=sleeps.append
+    )
+
+    stubbed_oidc.assert_no_pending_responses()
+    assert sleeps == [1, 1, 6]
+    assert opened == [AUTHORIZATION["verificationUriComplete"]]
+    assert json.loads(path.read_text())["expiresAt"] == "2022-08-24T08:00:00Z"
+    assert AWS_CFG.latest_token() == (
+        "TOKEN",
+        datetime(2022, 8, 24, 8, tzinfo=timezone.utc),
+    )
+
+
+@pytest.mark.freeze_time("2022-08-24")
+def test_device_authorization__reuses_client_registration(stubbed_oidc):
+    add_device_authorization(stubbed_oidc)
+    stubbed_oidc.add_client_error(
+        "create_token", "AccessDeniedException", expected_params=CREATE_TOKEN_PARAMS
+    )
+    stubbed_oidc.add_response(
+        "start_device_authorization", AUTHORIZATION, {**CLIENT, "startUrl": START_URL}
+    )
+    stubbed_oidc.add_client_error(
+        "create_token", "ExpiredTokenException", expected_params=CREATE_TOKEN_PARAMS
+    )
+    for expected_error in ["AccessDeniedException", "ExpiredTokenException"]:
+        with pytest.raises(DeviceAuthorizationFailed, match=expected_error):
+            device_auth.device_authorization(
+                START_URL, "us-east-2", open_browser=print, sleep=lambda _: None
+            )
+    stubbed_oidc.assert_no_pending_responses()
+
+
+@pytest.mark.freeze_time("2022-08-24")
+def test_registered_client__ignores_clients_registered_without_scopes(stubbed_oidc):
+    write_json_cache(
+        OIDC_CLIENT_CACHE_NAME, {"us-east-2": {**REGISTRATION, "clientId": "old"}}
+    )
+    stubbed_oidc.add_response(
+        "register_client",
+        {**REGISTRATION, "clientIdIssuedAt": 1661299200},
+        {
+            "clientName": "dev-cli",
+            "clientType": "public",
+            "scopes": ["sso:account:access"],
+        },
+    )
+    assert device_auth.registered_client("us-east-2")["clientId"] == "id"
+    assert device_auth.registered_client("us-east-2")["clientId"] == "id"
+    stubbed_oidc.assert_no_pending_responses()
+
+
+REFRESH_PARAMS = {
+    **CLIENT,
+    "grantType": OIDC_REFRESH_GRANT,
+    "refreshToken": "REFRESH",
+}
+
+
+def write_expired_token(token_dir):
+    token_dir.mkdir(parents=True, exist_ok=True)
+    (token_dir / "token.json").write_text(
+        json.dumps(
+            {
+                "startUrl": START_URL,
+                "region": "us-east-2",
+                "accessToken": "OLD_TOKEN",
+                "expiresAt": "2022-08-23T20:00:00Z",
+                "refreshToken": "REFRESH",
+                "registrationExpiresAt": "2022-11-23T00:00:00Z",
+                **CLIENT,
+            }
+        )
+    )
+
+
+@pytest.mark.freeze_time("2022-08-24")
+def test_with_renewal__renews_expired_token(mocker: MockerFixture, stubbed_oidc):
+    write_expired_token(device_auth.AWS_ACCESS_TOKEN_CACHE_DIR_PATH)
+    stubbed_oidc.add_response(
+        "create_token", {"accessToken": "NEW_TOKEN", "expiresIn": 3600}, REFRESH_PARAMS
+    )
+    assert device_auth.with_renewal(AWS_CFG.get_latest_token) == "NEW_TOKEN"
+    stubbed_oidc.assert_no_pending_responses()
+    saved = json.loads(device_auth.token_cache_path(START_URL).read_text())
+    assert saved["refreshToken"] == "REFRESH"
+    assert saved["expiresAt"] == "2022-08-24T01:00:00Z"
+
+
+@pytest.mark.freeze_time("2022-08-24")
+def test_device_authorization__refresh_token_is_used_for_renewal(stubbed_oidc, freezer):
+    add_device_authorization(stubbed_oidc)
+    stubbed_oidc.add_response(
+        "create_token",
+        {"accessToken": "TOKEN", "expiresIn": 3600, "refreshToken": "REFRESH"},
+        CREATE_TOKEN_PARAMS,
+    )
+    path = device_auth.device_authorization(
+        START_URL, "us-east-2", open_browser=print, sleep=lambda _: None
+    )
+    assert json.loads(path.read_text())["refreshToken"] == "REFRESH"
+
+    freezer.move_to("2022-08-24T02:00:00Z")
+    stubbed_oidc.add_response(
+        "create_token", {"accessToken": "NEW_TOKEN", "expiresIn": 3600}, REFRESH_PARAMS
+    )
+    assert device_auth.with_renewal(AWS_CFG.get_latest_token) == "NEW_TOKEN"
+    stubbed_oidc.assert_no_pending_responses()
+
+
+@pytest.mark.freeze_time("2022-08-24")
+def test_with_renewal__raises_when_renewal_fails(mocker: MockerFixture, stubbed_oidc):
+    write_expired_token(device_auth.AWS_ACCESS_TOKEN_CACHE_DIR_PATH)
+    stubbed_oidc.add_client_error(
+        "create_token", "InvalidGrantException", expected_params=REFRESH_PARAMS
+    )
+    with pytest.raises(ExpiredCredentials):
+        device_auth.with_renewal(AWS_CFG.get_latest_token)
+
+
+@pytest.mark.freeze_time("2022-08-24")
+def test_renew_token__waits_for_other_process(mocker: MockerFixture, stubbed_oidc):
+    token_dir = device_auth.AWS_ACCESS_TOKEN_CACHE_DIR_PATH
+    write_expired_token(token_dir)
+    renewed = []
+    with file_lock(cache_path(device_auth.TOKEN_RENEWAL_LOCK_NAME)):
+        thread = Thread(target=lambda: renewed.append(device_auth.renew_token()))
+        thread.start()
+        thread.join(timeout=0.2)
+        assert thread.is_alive()
+        (token_dir / "renewed.json").write_text(
+            json.dumps({"accessToken": "RENEWED", "expiresAt": "2022-08-24T08:00:00Z"})
+        )
+    thread.join()
+    assert renewed == [True]
+    assert AWS_CFG.get_latest_token() == "RENEWED"
+
+
+def test_login__renews_before_interactive_login(mocker: MockerFixture):
+    mocker.patch.object(
+        AWS_CFG, "get_latest_token", side_effect=[NoCachedTokens(), "TOKEN"]
+    )
+    mock_renew = mocker.patch.object(device_auth, "renew_token", return_value=True)
+    mock_authenticate = mocker.patch("cli.sso.utils.authenticate")
+    mocker.patch("cli.sso.utils.fetch_role_credentials", return_value=({}, {}))
+    mocker.patch.object(AWS_CFG, "write_sections_to_file", return_value=0)
+    sso_utils.generate_credentials_file()
+    mock_renew.assert_called_once()
+    mock_authenticate.assert_not_called()
@@ -0,0 +1,138 @@
+import boto3
+import pytest
+from botocore.stub import Stubber
+from pytest_mock import MockerFixture
+from typer.testing import CliRunner
+
+from cli.main import app
+from cli.services.aws.config_service import WriteableFiles
+from cli.sso import utils as sso_utils
+from cli.sso.discovery import (
+    DiscoveredRole,
+    discover_roles,
+    discovered_profile_name,
+    new_profile_names,
+)
+from cli.sso.utils import AWS_CFG, specify_profile_name
+from cli.types import SimpleNestedDict
+
+START_URL = "https://dev_tools.apps.com/start"
+ROLES = [
+    DiscoveredRole("012345678902", "QA", "QA-Developer"),
+    DiscoveredRole("012345678902", "QA", "QA-SRE"),
+    DiscoveredRole("210987654321", "Data Lake", "AdministratorAccess"),
+]
+
+
+@pytest.fixture
+def stubbed_sso(mocker: MockerFixture):
+    client = boto3.client("sso", region_name="us-east-2")
+    mocker.patch.dict(
+        sso_utils._SSO_CLIENTS, {("sso", "us-east-2"): client}, clear=True
+    )
+    with Stubber(client) as stubber:
+        yield stubber
+
+
+def test_discover_roles__pages_and_caches(stubbed_sso):
+    stubbed_sso.add_response(
+        "list_accounts",
+        {
+            "accountList": [{"accountId": "012345678902", "accountName": "QA"}],
+            "nextToken": "page-2",
+        },
+        {"accessToken": "token"},
+    )
+    stubbed_sso.add_response(
+        "list_accounts",
+        {"accountList": [{"accountId": "210987654321", "accountName": "Data Lake"}]},
+        {"accessToken": "token", "nextToken": "page-2"},
+    )
+    stubbed_sso.add_response(
+        "list_account_roles",
+        {
+            "roleList": [{"roleName": "QA-SRE", "accountId": "012345678902"}],
+            "nextToken": "page-2",
+        },
+        {"accessToken": "token", "accountId": "012345678902"},
+    )
+    stubbed_sso.add_response(
+        "list_account_roles",
+        {"roleList": [{"roleName": "QA-Developer", "accountId": "012345678902"}]},
+        {"accessToken": "token", "accountId": "012345678902", "nextToken": "page-2"},
+    )
+    stubbed_sso.add_response(
+        "list_account_roles",
+        {"roleList": [{"roleName": "AdministratorAccess"}]},
+        {"accessToken": "token", "accountId": "210987654321"},
+    )
+
+    assert discover_roles("token", "us-east-2", START_URL, max_workers=1) == ROLES
+    stubbed_sso.assert_no_pending_responses()
+    assert discover_roles("token", "us-east-2", START_URL) == ROLES
+
+
+def test_new_profile_names__skips_existing_roles():
+    existing: SimpleNestedDict = {
+        "profile dev-qa": {"sso_account_id": "012345678902", "sso_role_name": "QA-SRE"},
+        "profile dev-qa-developer": {},
+    }
+    names = new_profile_names(ROLES, existing_profiles=existing)
+    assert list(names.values()) == [ROLES[0], ROLES[2]]
+    assert list(names)[0].startswith("profile dev-qa-developer-")
+    assert list(names)[1] == "profile dev-data-lake-administratoraccess"
+
+
+@pytest.mark.parametrize(
+    "role, expected",
+    [
+        (DiscoveredRole("012345678902", "QA", "QA-Developer"), "dev-qa-developer"),
+        (DiscoveredRole("012345678902", "QA", "Dev-Developer"), "dev-dev-developer"),
+        (DiscoveredRole("012345678902", "QA", "QA-Data-Eng"), "dev-qa-data-eng"),
+        (DiscoveredRole("012345678902", "QA", "ReadOnly"), "dev-qa-readonly"),
+    ],
+)
+def test_discovered_profile_name(role: DiscoveredRole, expected: str):
+    assert discovered_profile_name(role) == expected
+
+
+@pytest.mark.parametrize(
+    "role_name, expected",
+    [
+        ("QA-Data-Eng", "dev-qa-data-eng"),
+        ("AdministratorAccess", "dev-qa-administratoraccess"),
+    ],
+)
+def test_specify_profile_name__discovered_roles(role_name: str, expected: str):
+    profiles = {
+        "profile dev-qa": {},
+        "profile old": {"sso_account_id": "012345678902", "sso_role_name": role_name},
+    }
+    assert specify_profile_name("profile old", profiles) == expected
+
+
+def test_config_discover(mocker: MockerFixture):
+    mocker.patch.object(AWS_CFG, "get_latest_token", return_value="token")
+    mocker.patch("cli.sso.discovery.discover_roles", return_value=ROLES)
+    mock_writer = mocker.patch.object(AWS_CFG, "write_sections_to_file")
+
+    result = CliRunner().invoke(app, ["sso", "config", "discover"])
+
+    assert result.exit_code == 0
+    sections = mock_writer.call_args.kwargs["sections"]
+    assert mock_writer.call_args.kwargs["file"] == WriteableFiles.CONFIG
+    assert sections["profile dev-data-lake-administratoraccess"] == {
+        "sso_start_url": START_URL,
+        "sso_region": "us-east-2",
+        "region": "us-east-2",
+        "output": "yaml",
+        "sso_account_id": "210987654321",
+        "sso_role_name": "AdministratorAccess",
+    }
+    assert "profile dev" in sections
+
+    mock_writer.reset_mock()
+    result = CliRunner().invoke(app, ["sso", "config", "discover", "--dry-run"])
+    assert result.exit_code == 0
+    assert "Would add" in result.stdout
+    mock_writer.assert_not_called()
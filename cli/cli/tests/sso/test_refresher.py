@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pytest_mock import MockerFixture
+from typer.testing import CliRunner
+
+from cli.main import app
+from cli.services.aws.constants import MIN_TTL
+from cli.services.aws.exceptions import NoCachedTokens
+from cli.sso import refresher as refresher_module
+from cli.sso.constants import REFRESH_BACKOFF_MIN, REFRESH_LEAD
+from cli.sso.refresher import CredentialRefresher, read_status
+from cli.sso.utils import AWS_CFG, profiles_needing_refresh
+from cli.types import SimpleNestedDict
+
+NOW = datetime(2022, 8, 24, tzinfo=timezone.utc)
+EXPIRES = NOW + timedelta(hours=1)
+PROFILES: SimpleNestedDict = {"profile dev": {}, "profile dev-qa": {}}
+
+
+@pytest.fixture
+def mock_refresh(mocker: MockerFixture):
+    mocker.patch.object(
+        type(AWS_CFG), "profiles", new_callable=mocker.PropertyMock
+    ).return_value = PROFILES
+    mocker.patch.object(
+        AWS_CFG, "latest_token", return_value=("token", NOW + timedelta(hours=8))
+    )
+    mocker.patch.object(AWS_CFG, "credential_expiry", return_value=EXPIRES)
+    return mocker.patch(
+        "cli.sso.refresher.generate_credentials_file", return_value=(0, {}, {})
+    )
+
+
+@pytest.mark.freeze_time(NOW)
+def test_refresher__schedules_refresh_before_min_ttl(mock_refresh):
+    next_refresh = CredentialRefresher().run_once()
+    assert next_refresh == EXPIRES - MIN_TTL - REFRESH_LEAD
+    mock_refresh.assert_called_once_with(
+        refresh=True, interactive=False, min_ttl=MIN_TTL + REFRESH_LEAD
+    )
+    status = read_status()
+    assert status["profiles"]["dev-qa"] == {
+        "expires": EXPIRES.isoformat(),
+        "next_refresh": next_refresh.isoformat(),
+        "failures": 0,
+        "last_error": None,
+    }
+
+
+@pytest.mark.freeze_time(NOW)
+def test_refresher__backs_off_failing_profiles(mock_refresh):
+    mock_refresh.return_value = (0, {}, {"profile dev-qa": Exception("Forbidden")})
+    refresher = CredentialRefresher()
+    assert refresher.run_once() == NOW + REFRESH_BACKOFF_MIN
+    assert refresher.run_once() == NOW + REFRESH_BACKOFF_MIN * 2
+    assert refresher.profiles["dev"]["failures"] == 0
+    assert read_status()["profiles"]["dev-qa"]["last_error"] == "Forbidden"
+
+    # Not refetched, so not recorded as refreshed
+    mock_refresh.return_value = (0, {}, {})
+    refresher.run_once()
+    assert refresher.profiles["dev-qa"]["failures"] == 2
+
+    mock_refresh.return_value = (0, {"dev-qa": {}}, {})
+    assert refresher.run_once() == EXPIRES - MIN_TTL - REFRESH_LEAD
+    assert refresher.profiles["dev-qa"]["failures"] == 0
+    assert refresher.profiles["dev-qa"]["last_error"] is None
+
+
+@pytest.mark.freeze_time(NOW)
+def test_refresher__needs_login(mocker: MockerFixture, mock_refresh):
+    AWS_CFG.latest_token.side_effect = NoCachedTokens()
+    refresher = CredentialRefresher()
+    assert refresher.run_once() == NOW + REFRESH_BACKOFF_MIN
+    mock_refresh.assert_not_called()
+    status = read_status()
+    assert "dev sso login" in status["last_error"]
+    assert {p["failures"] for p in status["profiles"].values()} == {1}
+
+
+@pytest.mark.freeze_time(NOW)
+def test_status(mocker: MockerFixture, mock_refresh):
+    result = CliRunner().invoke(app, ["sso", "status"])
+    assert result.exit_code == 1
+
+    CredentialRefresher().run_once()
+    mocker.patch.object(refresher_module, "is_running", return_value=True)
+    result = CliRunner().invoke(app, ["sso", "status"], env={"COLUMNS": "200"})
+    assert result.exit_code == 0
+    assert "running" in result.stdout
+    assert "dev-qa" in result.stdout
+    assert (EXPIRES - MIN_TTL - REFRESH_LEAD).isoformat() in result.stdout
+
+
+@pytest.mark.freeze_time(NOW)
+def test_profiles_needing_refresh__min_ttl(mocker: MockerFixture):
+    expiry = NOW + MIN_TTL + REFRESH_LEAD / 2
+    mocker.patch.object(AWS_CFG, "credential_expiry", return_value=expiry)
+    assert profiles_needing_refresh(PROFILES) == {}
+    assert (
+        profiles_needing_refresh(PROFILES, min_ttl=MIN_TTL + REFRESH_LEAD) == PROFILES
+    )
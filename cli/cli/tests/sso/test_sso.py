@@ -3,11 +3,13 @@ from collections import defaultdict
 from unittest.mock import MagicMock
 
 import pytest
+from botocore.exceptions import ClientError
 from pytest_mock import MockerFixture
 from typer.testing import CliRunner
 
 from cli.main import app
 from cli.services.aws.config_service import WriteableFiles
+from cli.sso import utils as sso_utils
 from cli.sso.utils import AWS_CFG
 from cli.types import SimpleNestedDict
 
@@ -301,7 +303,9 @@ EXPECTED_EXIT_CODE["EMPTY"] = 1
     "name,mock_config_object",
     [(name, config) for name, config in TEST_CONFIGS.items() if name.isupper()],
 )
-def test_login(mocker: MockerFixture, name: str, mock_config_object: dict):
+def test_login(
+    mocker: MockerFixture, name: str, mock_config_object: dict, mock_aws_config
+):
     mocker.patch(
         "cli.sso.utils.get_role_credentials",
         lambda profile, token, profile_name: (
@@ -317,26 +321,21 @@ def test_login(mocker: MockerFixture, name: str, mock_config_object: dict):
     mocker.patch.object(AWS_CFG, "get_latest_token")
     mocker.patch("cli.sso.utils.authenticate", return_value=0)
     AWS_CFG._reset()
-    mocker.patch.object(
-        AWS_CFG,
-        "_config",
-        config_from_dict(mock_config_object),
-    )
+    mock_aws_config.return_value = config_from_dict(mock_config_object)
     mock_writer = mocker.patch.object(AWS_CFG, "write_sections_to_file")
     runner = CliRunner()
     result = runner.invoke(app, LOGIN_CMD)
     mock_writer.assert_called_once_with(
-        sections=EXPECTED_CREDENTIALS[name], file=WriteableFiles.CREDS, overwrite=True
+        sections=EXPECTED_CREDENTIALS[name],
+        file=WriteableFiles.CREDS,
+        overwrite=True,
+        backup=True,
     )
     assert result.exit_code == EXPECTED_EXIT_CODE[name]
 
 
-def test_config_update(mocker: MockerFixture):
-    mocker.patch.object(
-        AWS_CFG,
-        "_config",
-        config_from_dict(TEST_CONFIGS["GOOGLE"]),
-    )
+def test_config_update(mocker: MockerFixture, mock_aws_config):
+    mock_aws_config.return_value = config_from_dict(TEST_CONFIGS["GOOGLE"])
     mock_writer = mocker.patch.object(AWS_CFG, "write_sections_to_file")
     runner = CliRunner()
     result = runner.invoke(app, UPDATE_CMD)
@@ -356,13 +355,11 @@ def test_config_update(mocker: MockerFixture):
         ["Prod-SRE"],
     ],
 )
-def test_config_add_profiles__empty_base__happy_path(mocker, profiles_to_add):
+def test_config_add_profiles__empty_base__happy_path(
+    mocker, profiles_to_add, mock_aws_config
+):
     AWS_CFG._reset()
-    mocker.patch.object(
-        AWS_CFG,
-        "_config",
-        config_from_dict({}),
-    )
+    mock_aws_config.return_value = config_from_dict({})
     mock_writer = mocker.patch.object(AWS_CFG, "write_sections_to_file")
     runner = CliRunner()
     result = runner.invoke(app, ADD_PROFILES_CMD + profiles_to_add)
@@ -380,13 +377,11 @@ def test_config_add_profiles__empty_base__happy_path(mocker, profiles_to_add):
         ["QA-DevOps", "GGL-SRE-v2"],
     ],
 )
-def test_config_add_profiles__empty_base__error(mocker, profiles_to_add):
+def test_config_add_profiles__empty_base__error(
+    mocker, profiles_to_add, mock_aws_config
+):
     AWS_CFG._reset()
-    mocker.patch.object(
-        AWS_CFG,
-        "_config",
-        config_from_dict({}),
-    )
+    mock_aws_config.return_value = config_from_dict({})
     mock_writer = mocker.patch.object(AWS_CFG, "write_sections_to_file")
     runner = CliRunner()
     result = runner.invoke(app, ADD_PROFILES_CMD + profiles_to_add)
@@ -411,7 +406,7 @@ def test_new__success(mocker: MockerFixture):
     assert result.exit_code == 0
 
 
-def test_new__fail(mocker: MockerFixture):
+def test_new__fail(mocker: MockerFixture, mock_aws_config):
     mock_writer = mocker.spy(AWS_CFG, "write_sections_to_file")
     MockWriteableFiles = mocker.patch(
         "cli.sso.manage_config.WriteableFiles",
@@ -419,11 +414,7 @@ def test_new__fail(mocker: MockerFixture):
     )
 
     AWS_CFG._reset()
-    mocker.patch.object(
-        AWS_CFG,
-        "_config",
-        config_from_dict(TEST_CONFIGS["BASIC_ADMIN"]),
-    )
+    mock_aws_config.return_value = config_from_dict(TEST_CONFIGS["BASIC_ADMIN"])
     runner = CliRunner()
     result = runner.invoke(app, NEW_CMD)
     mock_writer.assert_called_once_with(
@@ -436,18 +427,14 @@ def test_new__fail(mocker: MockerFixture):
 
 
 @pytest.mark.parametrize("flag", [["--destroy-existing"], ["-f"]])
-def test_new__overwrite_success(mocker, flag):
+def test_new__overwrite_success(mocker, flag, mock_aws_config):
     mock_writer = mocker.spy(AWS_CFG, "write_sections_to_file")
     MockWriteableFiles = mocker.patch(
         "cli.sso.manage_config.WriteableFiles",
         MagicMock(**{"CONFIG.value.exists": MagicMock(return_value=True)}),
     )
     AWS_CFG._reset()
-    mocker.patch.object(
-        AWS_CFG,
-        "_config",
-        config_from_dict(TEST_CONFIGS["BASIC_ADMIN"]),
-    )
+    mock_aws_config.return_value = config_from_dict(TEST_CONFIGS["BASIC_ADMIN"])
     runner = CliRunner()
     result = runner.invoke(app, NEW_CMD + flag)
     mock_writer.assert_called_once_with(
@@ -624,13 +611,11 @@ def test_new__overwrite_success(mocker, flag):
         ),
     ],
 )
-def test_make_primary__success(mocker, profile_name, expected_sections):
+def test_make_primary__success(
+    mocker, profile_name, expected_sections, mock_aws_config
+):
     mock_writer = mocker.patch.object(AWS_CFG, "write_sections_to_file")
-    mocker.patch.object(
-        AWS_CFG,
-        "_config",
-        config_from_dict(TEST_CONFIGS["MULTIPLE_ROLES"]),
-    )
+    mock_aws_config.return_value = config_from_dict(TEST_CONFIGS["MULTIPLE_ROLES"])
     runner = CliRunner()
     result = runner.invoke(app, MAKE_PRIMARY_CMD + profile_name)
     if expected_sections:
@@ -641,3 +626,160 @@ def test_make_primary__success(mocker, profile_name, expected_sections):
     else:
         mock_writer.assert_not_called()
     assert result.exit_code == 0
+
+
+def test_fetch_role_credentials__dedupes_roles_and_reports_errors(
+    mocker: MockerFixture,
+):
+    mocker.patch.dict(sso_utils._SSO_CLIENTS, clear=True)
+    mock_client = MagicMock()
+    mock_boto3_client = mocker.patch(
+        "cli.sso.utils.boto3.client", return_value=mock_client
+    )
+
+    def get_role_credentials(roleName, accountId, accessToken):
+        if roleName == "QA-Broken":
+            raise ClientError({"Error": {"Code": "ForbiddenException"}}, "Get")
+        return {
+            "roleCredentials": {
+                "accessKeyId": f"{accountId}-{roleName}",
+                "secretAccessKey": "secretAccessKey",
+                "sessionToken": "sessionToken",
+                "expiration": 1661299200000,
+            }
+        }
+
+    mock_client.get_role_credentials.side_effect = get_role_credentials
+    profiles = {
+        "profile dev-qa": TEST_CONFIGS["NEW"]["profile dev-qa"],
+        "profile dev-qa-copy": TEST_CONFIGS["NEW"]["profile dev-qa"],
+        "profile dev-stage": TEST_CONFIGS["NEW"]["profile dev-stage"],
+        "profile dev-broken": {
+            **TEST_CONFIGS["NEW"]["profile dev-qa"],
+            "sso_role_name": "QA-Broken",
+        },
+    }
+
+    credentials, errors = sso_utils.fetch_role_credentials(profiles, token="token")
+
+    assert list(credentials) == ["dev-qa", "dev-qa-copy", "dev-stage"]
+    assert credentials["dev-qa-copy"]["aws_access_key_id"] == "12345678902-QA-Developer"
+    assert list(errors) == ["profile dev-broken"]
+    assert mock_client.get_role_credentials.call_count == 3
+    mock_boto3_client.assert_called_once_with("sso", region_name="us-east-2")
+
+
+def mock_role_credentials(profile, token, profile_name):
+    return profile_name.split(" ")[-1], {
+        "aws_access_key_id": "newAccessKeyId",
+        "aws_secret_access_key": "secretAccessKey",
+        "aws_session_token": "sessionToken",
+        "aws_session_expiration": "1661389200000",
+    }
+
+
+@pytest.mark.freeze_time("2022-08-24")
+def test_login__refresh_fetches_only_stale_profiles(
+    mocker: MockerFixture, mock_aws_config
+):
+    mock_fetch = mocker.patch(
+        "cli.sso.utils.get_role_credentials", side_effect=mock_role_credentials
+    )
+    mocker.patch.object(AWS_CFG, "get_latest_token")
+    AWS_CFG._reset()
+    mock_aws_config.return_value = config_from_dict(TEST_CONFIGS["NEW"])
+    valid = {
+        "aws_access_key_id": "accessKeyId",
+        "aws_secret_access_key": "secretAccessKey",
+        "aws_session_token": "sessionToken",
+        "aws_session_expiration": "2022-08-24T08:00:00Z",
+    }
+    expired = {**valid, "aws_session_expiration": "2022-08-23T23:00:00Z"}
+    mocker.patch.object(
+        AWS_CFG, "_credentials", {"dev": valid, "dev-qa": expired, "old": valid}
+    )
+    mock_writer = mocker.patch.object(AWS_CFG, "write_sections_to_file")
+
+    result = CliRunner().invoke(app, LOGIN_CMD + ["--refresh"])
+
+    assert result.exit_code == 0
+    assert mock_fetch.call_count == 2
+    sections = mock_writer.call_args.kwargs["sections"]
+    assert sections["dev"] == valid
+    assert sections["old"] == valid
+    assert sections["dev-qa"]["aws_access_key_id"] == "newAccessKeyId"
+    assert sections["dev-stage"]["aws_access_key_id"] == "newAccessKeyId"
+
+
+@pytest.mark.freeze_time("2022-08-24")
+def test_login__refresh_skips_write_when_all_valid(
+    mocker: MockerFixture, mock_aws_config
+):
+    mock_fetch = mocker.patch("cli.sso.utils.get_role_credentials")
+    mock_token = mocker.patch.object(AWS_CFG, "get_latest_token")
+    AWS_CFG._reset()
+    mock_aws_config.return_value = config_from_dict(TEST_CONFIGS["BASIC_ADMIN"])
+    valid = {"aws_session_expiration": "2022-08-24T08:00:00Z"}
+    mocker.patch.object(AWS_CFG, "_credentials", {"dev": valid, "dev-qa": valid})
+    mock_writer = mocker.patch.object(AWS_CFG, "write_sections_to_file")
+
+    result = CliRunner().invoke(app, LOGIN_CMD + ["--refresh"])
+
+    assert result.exit_code == 0
+    assert "nothing to refresh" in result.stdout
+    mock_fetch.assert_not_called()
+    mock_token.assert_not_called()
+    mock_writer.assert_not_called()
+
+
+@pytest.mark.freeze_time("2022-08-24")
+def test_login__refresh_skips_write_when_credentials_are_unchanged(
+    mocker: MockerFixture, mock_aws_config
+):
+    # SSO can hand back the same credentials, with the expiration as a number
+    current = {
+        "aws_access_key_id": "accessKeyId",
+        "aws_secret_access_key": "secretAccessKey",
+        "aws_session_token": "sessionToken",
+        "aws_session_expiration": "1661299440000",
+    }
+    mock_client = mocker.patch("cli.sso.utils.sso_client").return_value
+    mock_client.get_role_credentials.return_value = {
+        "roleCredentials": {
+            "accessKeyId": "accessKeyId",
+            "secretAccessKey": "secretAccessKey",
+            "sessionToken": "sessionToken",
+            "expiration": 1661299440000,
+        }
+    }
+    mocker.patch.object(AWS_CFG, "get_latest_token")
+    AWS_CFG._reset()
+    mock_aws_config.return_value = config_from_dict(TEST_CONFIGS["BASIC_ADMIN"])
+    mocker.patch.object(AWS_CFG, "_credentials", {"dev": current, "dev-qa": current})
+    mock_writer = mocker.patch.object(AWS_CFG, "write_sections_to_file")
+
+    assert sso_utils.generate_credentials_file(refresh=True) == (0, {}, {})
+    assert mock_client.get_role_credentials.called
+    mock_writer.assert_not_called()
+
+
+@pytest.mark.freeze_time("2022-08-24")
+def test_login__reuses_credentials_written_while_waiting(
+    mocker: MockerFixture, mock_aws_config
+):
+    mocker.patch("cli.sso.utils.file_signature", side_effect=[None, (1, 2, 3)])
+    mock_token = mocker.patch.object(AWS_CFG, "get_latest_token")
+    mock_fetch = mocker.patch("cli.sso.utils.fetch_role_credentials")
+    mock_writer = mocker.patch.object(AWS_CFG, "write_sections_to_file")
+    AWS_CFG._reset()
+    mock_aws_config.return_value = config_from_dict(TEST_CONFIGS["BASIC_ADMIN"])
+    valid = {"aws_session_expiration": "2022-08-24T08:00:00Z"}
+    mocker.patch(
+        "cli.services.aws.config_service.load_credentials_from_file",
+        return_value=config_from_dict({"dev": valid, "dev-qa": valid}),
+    )
+
+    assert sso_utils.generate_credentials_file() == (0, {}, {})
+    mock_token.assert_not_called()
+    mock_fetch.assert_not_called()
+    mock_writer.assert_not_called()
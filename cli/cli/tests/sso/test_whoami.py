@@ -0,0 +1,77 @@
+import json
+import time
+
+import pytest
+from pytest_mock import MockerFixture
+from typer.testing import CliRunner
+
+from cli.main import app
+from cli.services.aws import clients_service
+from cli.services.aws.session_service import SessionFactory
+from cli.sso import whoami
+from cli.sso.utils import AWS_CFG
+
+CREDENTIALS = {
+    "aws_access_key_id": "testing",
+    "aws_secret_access_key": "testing",
+    "aws_session_token": "testing",
+    "aws_session_expiration": "2999-01-01T00:00:00Z",
+}
+
+
+@pytest.fixture
+def mock_sessions(mocker: MockerFixture):
+    AWS_CFG._reset()
+    mocker.patch.object(
+        AWS_CFG, "_credentials", {"dev": CREDENTIALS, "dev-qa": CREDENTIALS}
+    )
+    mocker.patch.object(clients_service, "SESSIONS", SessionFactory())
+    mocker.patch.object(clients_service.EnvManager, "_profile_managers", {})
+
+
+def test_whoami__all_profiles(mock_sts_client, mock_sessions, mock_aws_files):
+    result = CliRunner().invoke(app, ["sso", "whoami", "--all", "--json"])
+    assert result.exit_code == 0
+    checks = json.loads(result.stdout)
+    assert [check["profile"] for check in checks] == ["dev", "dev-qa"]
+    assert all(check["account"] == "123456789012" for check in checks)
+    assert checks[0]["expires"] == "2999-01-01T00:00:00+00:00"
+    assert checks[0]["error"] is None
+
+
+def test_check_identities__times_out_slow_profiles(mocker: MockerFixture):
+    def check_identity(profile_name, timeout):
+        if profile_name == "slow":
+            time.sleep(1)
+        return whoami.IdentityCheck(profile_name, account="123456789012")
+
+    mocker.patch.object(whoami, "check_identity", check_identity)
+    checks = whoami.check_identities(["fast", "slow"], timeout=0.1)
+    assert checks[0] == whoami.IdentityCheck("fast", account="123456789012")
+    assert checks[1] == whoami.IdentityCheck("slow", error="Timed out after 0.1s")
+
+
+def test_check_identities__timeout_counts_from_each_check_start(
+    mocker: MockerFixture,
+):
+    def check_identity(profile_name, timeout):
+        if profile_name == "slow":
+            time.sleep(0.3)
+        return whoami.IdentityCheck(profile_name, account="123456789012")
+
+    mocker.patch.object(whoami, "check_identity", check_identity)
+    checks = whoami.check_identities(["slow", "fast"], timeout=0.2, max_workers=1)
+    # "slow" answered within the time both batches had, but after its own timeout
+    assert checks[0] == whoami.IdentityCheck("slow", error="Timed out after 0.2s")
+    assert checks[1] == whoami.IdentityCheck("fast", account="123456789012")
+
+
+def test_whoami__reports_errors(mocker: MockerFixture):
+    mocker.patch.object(
+        whoami,
+        "check_identities",
+        return_value=[whoami.IdentityCheck("dev", error="ExpiredToken")],
+    )
+    result = CliRunner().invoke(app, ["sso", "whoami"], env={"COLUMNS": "200"})
+    assert result.exit_code == 1
+    assert "ExpiredToken" in result.stdout
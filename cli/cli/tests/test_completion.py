@@ -0,0 +1,126 @@
+import mmap
+import os
+import subprocess
+import sys
+import time
+from pathlib import PosixPath
+
+import pytest
+from pytest_mock import MockerFixture
+
+from cli import completion
+from cli.completion import complete_parameter_path, write_prefix_index
+
+NAMES = [
+    "/qa/api/db/password",
+    "/qa/api/db/user",
+    "/qa/api/key",
+    "/qa/api-gateway/key",
+    "/qa/secret",
+    "/qa/service/a",
+    "/qa/service/b/c",
+    "/qa/service-two",
+]
+
+
+@pytest.fixture
+def prefix_index():
+    write_prefix_index("qa", NAMES, stale_after=time.time() + 3600)
+    write_prefix_index("dev", ["/dev/a"], stale_after=time.time() + 3600)
+
+
+@pytest.mark.parametrize(
+    "incomplete,expected",
+    [
+        ("", ["/dev/", "/qa/"]),
+        ("/q", ["/qa/"]),
+        (
+            "/qa/",
+            [
+                "/qa/api-gateway/",
+                "/qa/api/",
+                "/qa/secret",
+                "/qa/service-two",
+                "/qa/service/",
+            ],
+        ),
+        ("/qa/se", ["/qa/secret", "/qa/service-two", "/qa/service/"]),
+        ("/qa/api/", ["/qa/api/db/", "/qa/api/key"]),
+        ("/qa/api/db/p", ["/qa/api/db/password"]),
+        ("/qa/nope", []),
+        ("/stage/", []),
+    ],
+)
+def test_complete_parameter_path(prefix_index, incomplete, expected):
+    assert complete_parameter_path(incomplete) == expected
+
+
+def test_complete_parameter_path__stale_index_refreshes_in_background(
+    mocker: MockerFixture,
+):
+    write_prefix_index("qa", NAMES, stale_after=time.time() - 1)
+    popen = mocker.patch("subprocess.Popen")
+    assert complete_parameter_path("/qa/sec") == ["/qa/secret"]
+    assert complete_parameter_path("/qa/sec") == ["/qa/secret"]
+    popen.assert_called_once()
+    assert popen.call_args.args[0][-3:] == ["refresh-index", "--env", "qa"]
+
+
+def test_lower_bound():
+    names = sorted(f"/qa/{i:05}".encode() for i in range(1000))
+    data = b"# stale-after 0\n" + b"".join(name + b"\n" for name in names)
+    index = mmap.mmap(-1, len(data))
+    index.write(data)
+    for key in (b"/qa/00000", b"/qa/00500", b"/qa/005", b"/qa/00999", b"/qa/1"):
+        pos = completion.lower_bound(index, key)
+        end = index.find(b"\n", pos)
+        first = index[pos:end] if pos < len(index) else None
+        assert first == next((name for name in names if name >= key), None)
+
+
+def run_completion(
+    env: dict[str, str], cache_dir: PosixPath
+) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "cli"],
+        capture_output=True,
+        text=True,
+        env={
+            **os.environ,
+            "XDG_CACHE_HOME": str(cache_dir.parent),
+            "_DEV_COMPLETE": "complete_bash",
+            **env,
+        },
+        cwd=PosixPath(__file__).parents[2],
+    )
+
+
+def test_completion__without_importing_the_cli(tmp_path):
+    cache_dir = tmp_path / "dev-cli"
+    names = [f"/qa/service-{i // 100}/param-{i}" for i in range(50_000)]
+    index = cache_dir / "ssm-names-qa.txt"
+    cache_dir.mkdir()
+    index.write_bytes(
+        b"# stale-after 9999999999\n"
+        + "".join(f"{n}\n" for n in sorted(names)).encode()
+    )
+
+    result = run_completion(
+        {"COMP_WORDS": "dev params request /qa/service-49", "COMP_CWORD": "3"},
+        cache_dir,
+    )
+
+    assert result.returncode == 0
+    assert result.stdout.splitlines() == ["/qa/service-49/"] + [
+        f"/qa/service-49{i}/" for i in range(10)
+    ]
+    imported = {line.split("|")[-1].strip() for line in result.stderr.splitlines()}
+    assert not {"typer", "rich", "boto3", "click", "cli.main"} & imported
+
+
+def test_completion__other_arguments_are_left_to_typer(tmp_path):
+    result = run_completion(
+        {"COMP_WORDS": "dev params ", "COMP_CWORD": "2"}, tmp_path / "dev-cli"
+    )
+    assert result.returncode == 0
+    assert "request" in result.stdout.split()
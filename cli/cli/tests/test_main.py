@@ -0,0 +1,79 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from typer.testing import CliRunner
+
+from cli.main import app
+
+LOADED_MODULES_AFTER = """
+import sys
+from cli.main import app
+try:
+    app(prog_name='dev', args={args})
+except SystemExit:
+    pass
+print(' '.join(sorted(sys.modules)))
+"""
+
+
+def loaded_modules(args: list[str], env: dict[str, str] = None) -> set[str]:
+    proc = subprocess.run(
+        [sys.executable, "-c", LOADED_MODULES_AFTER.format(args=args)],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, **(env or {})},
+    )
+    return set(proc.stdout.splitlines()[-1].split())
+
+
+@pytest.mark.parametrize(
+    "args,expected,not_expected",
+    [
+        (["--help"], set(), {"cli.parameter_store", "cli.sso", "boto3", "pydantic"}),
+        (
+            ["sso", "--help"],
+            {"cli.sso"},
+            {"cli.parameter_store", "cli.sso.manage_config", "boto3", "pydantic"},
+        ),
+        (["sso", "config", "--help"], {"cli.sso.manage_config"}, {"pydantic"}),
+        (["params", "--help"], {"cli.parameter_store"}, {"cli.sso"}),
+    ],
+)
+def test_subcommands_are_loaded_lazily(args, expected, not_expected):
+    modules = loaded_modules(args)
+    assert expected <= modules
+    assert not (not_expected & modules)
+
+
+def test_help_lists_lazy_subcommands():
+    result = CliRunner().invoke(app, ["--help"])
+    assert result.exit_code == 0
+    assert "params" in result.output
+    assert "Manage your aws credentials" in result.output
+
+
+def test_credential_process__cached_credentials_skip_boto3(tmp_path):
+    cache_dir = tmp_path / "dev-cli"
+    cache_dir.mkdir()
+    (cache_dir / "role-credentials.json").write_text(
+        json.dumps(
+            {
+                "dev-qa": {
+                    "aws_access_key_id": "accessKeyId",
+                    "aws_secret_access_key": "secretAccessKey",
+                    "aws_session_token": "sessionToken",
+                    "aws_session_expiration": "2999-01-01T00:00:00Z",
+                }
+            }
+        )
+    )
+    modules = loaded_modules(
+        ["sso", "credential-process", "--profile", "dev-qa"],
+        env={"XDG_CACHE_HOME": str(tmp_path)},
+    )
+    assert "cli.sso.credential_process" in modules
+    assert "boto3" not in modules
@@ -0,0 +1,78 @@
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+ENTRY_POINT = "from cli.main import app; app(prog_name='dev')"
+COMMANDS = [
+    ["--help"],
+    ["params", "--help"],
+    ["params", "request", "--help"],
+    ["params", "review", "--help"],
+    ["sso", "--help"],
+    ["sso", "login", "--help"],
+    ["sso", "config", "--help"],
+]
+TRACKED_PACKAGES = ["boto3", "botocore", "rich", "pydantic", "dateutil", "typer", "cli"]
+
+
+def time_command(args: list[str], runs: int) -> float:
+    """
+    Median wall clock time, in milliseconds, for `dev {args}` in a fresh interpreter.
+    """
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", ENTRY_POINT, *args],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def import_times(args: list[str]) -> dict[str, float]:
+    """
+    Cumulative import time, in milliseconds, of each tracked top-level package for `dev {args}`.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", ENTRY_POINT, *args],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    by_package: dict[str, float] = defaultdict(float)
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, _cumulative_us, name = line.removeprefix("import time:").split("|")
+        if not self_us.strip().isdigit():
+            continue
+        package = name.strip().split(".")[0]
+        if package in TRACKED_PACKAGES:
+            by_package[package] += int(self_us) / 1000
+    return by_package
+
+
+def main(runs: int):
+    header = ["command", "wall (ms)", *TRACKED_PACKAGES]
+    print(" | ".join(header))
+    print(" | ".join("---" for _ in header))
+    for args in COMMANDS:
+        wall = time_command(args, runs=runs)
+        by_package = import_times(args)
+        row = [f"dev {' '.join(args)}", f"{wall:.0f}"] + [
+            f"{by_package[p]:.0f}" if p in by_package else "-" for p in TRACKED_PACKAGES
+        ]
+        print(" | ".join(row))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure `dev` startup time and per-package import time for each subcommand"
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Runs per command")
+    main(runs=parser.parse_args().runs)